@@ -2,8 +2,13 @@
 Comandos administrativos y de gestión del bot.
 """
 import discord
+from typing import Optional
 from discord import app_commands
-from config import target_channels
+from utils.channel_router import channel_router
+from utils.command_sync import record_manual_sync
+from utils.guild_store import watch_channel, unwatch_channel
+from utils.helpers import get_bot_member
+from utils.watchdog import watchdog
 
 # Variable global para almacenar las referencias
 _bot = None
@@ -29,6 +34,7 @@ def register_commands(tree):
         try:
             # Sync to this guild
             synced = await tree.sync(guild=interaction.guild)
+            await record_manual_sync(tree, interaction.guild)
             cmd_names = [cmd.name for cmd in synced]
             
             await interaction.followup.send(
@@ -38,18 +44,59 @@ def register_commands(tree):
         except Exception as e:
             await interaction.followup.send(f"❌ Error durante la sincronización: {e}")
     
-    @tree.command(name='canal', description='Establece qué canal monitorizar para mensajes con IP')
-    @app_commands.describe(channel='El canal para monitorizar mensajes connect+IP')
+    @tree.command(name='canal', description='Gestiona los canales vigilados para mensajes con IP')
+    @app_commands.describe(
+        channel='El canal para monitorizar mensajes connect+IP',
+        accion='Añadir o quitar el canal, o listar los canales vigilados',
+        editados='Revisar también los mensajes editados (por defecto sí)',
+        avisar='Avisar al usuario cuando se elimina su mensaje (por defecto sí)'
+    )
+    @app_commands.choices(accion=[
+        app_commands.Choice(name='añadir', value='add'),
+        app_commands.Choice(name='quitar', value='remove'),
+        app_commands.Choice(name='listar', value='list'),
+    ])
     @app_commands.checks.has_permissions(manage_channels=True)
-    async def set_channel(interaction: discord.Interaction, channel: discord.TextChannel):
-        """Establece qué canal debe ser monitoreado para mensajes connect+IP.
+    async def set_channel(interaction: discord.Interaction, channel: Optional[discord.TextChannel] = None,
+                          accion: str = 'add', editados: bool = True, avisar: bool = True):
+        """Gestiona qué canales deben ser monitoreados para mensajes connect+IP.
         Solo usuarios con permiso 'Gestionar Canales' pueden usar este comando."""
         
         guild_id = interaction.guild.id
-        target_channels[guild_id] = channel.id
+        
+        if accion == 'list':
+            policies = channel_router.channels_for_guild(guild_id)
+            if not policies:
+                await interaction.response.send_message("❓ No hay ningún canal vigilado. Usa /canal para añadir uno.")
+                return
+            lines = []
+            for policy in policies:
+                target_channel = interaction.guild.get_channel(policy.channel_id)
+                name = f"#{target_channel.name}" if target_channel else f"(canal eliminado {policy.channel_id})"
+                options = []
+                if policy.check_edits:
+                    options.append("editados")
+                if policy.notify:
+                    options.append("avisos")
+                lines.append(f"- {name}" + (f" ({', '.join(options)})" if options else ""))
+            await interaction.response.send_message("**Canales vigilados:**\n" + "\n".join(lines))
+            return
+        
+        if channel is None:
+            await interaction.response.send_message("Indica el canal que quieres añadir o quitar.", ephemeral=True)
+            return
+        
+        if accion == 'remove':
+            if await unwatch_channel(channel.id):
+                await interaction.response.send_message(f"✅ Ya no se monitoriza el canal #{channel.name}.")
+            else:
+                await interaction.response.send_message(f"❓ El canal #{channel.name} no estaba vigilado.", ephemeral=True)
+            return
+        
+        await watch_channel(guild_id, channel.id, check_edits=editados, notify=avisar)
         
         # Verificar si el bot tiene permisos para eliminar mensajes en este canal
-        bot_member = interaction.guild.get_member(_bot.user.id)
+        bot_member = await get_bot_member(_bot, interaction.guild)
         channel_perms = channel.permissions_for(bot_member)
         
         if channel_perms.manage_messages:
@@ -75,27 +122,59 @@ def register_commands(tree):
                 ephemeral=True
             )
     
+    @tree.command(name='diagnostico', description='Ver el retraso del bucle de eventos y los últimos bloqueos (solo administradores)')
+    @app_commands.checks.has_permissions(administrator=True)
+    async def diagnostics(interaction: discord.Interaction):
+        """Muestra el estado del watchdog y la pila de los últimos bloqueos detectados."""
+        stats = watchdog.stats()
+        embed = discord.Embed(
+            title="Diagnóstico del bucle de eventos",
+            color=discord.Color.red() if stats['blocked_now'] else discord.Color.green()
+        )
+        embed.add_field(name="Retraso actual", value=f"{stats['lag'] * 1000:.1f} ms", inline=True)
+        embed.add_field(name="Retraso máximo", value=f"{stats['max_lag'] * 1000:.1f} ms", inline=True)
+        embed.add_field(name="Latencia gateway", value=f"{_bot.latency * 1000:.0f} ms", inline=True)
+        embed.add_field(
+            name="Bloqueos",
+            value=f"{stats['blocks']} por encima de {stats['threshold'] * 1000:.0f} ms",
+            inline=False
+        )
+        
+        # Últimos bloqueos, del más reciente al más antiguo
+        for incident in list(watchdog.incidents)[-3:][::-1]:
+            stack = incident.stack or "(sin muestra de pila)"
+            value = f"`{incident.culprit}`\n```{stack[-900:]}```"
+            embed.add_field(
+                name=f"{incident.duration:.2f} s · <t:{int(incident.started_at)}:R>",
+                value=value,
+                inline=False
+            )
+        
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+    
     @tree.command(name='checkperms', description='Comprobar si el bot tiene los permisos necesarios')
     async def check_permissions(interaction: discord.Interaction):
         """Verifica si el bot tiene los permisos necesarios."""
         guild_id = interaction.guild.id
-        bot_member = interaction.guild.get_member(_bot.user.id)
+        bot_member = await get_bot_member(_bot, interaction.guild)
         permissions = bot_member.guild_permissions
         
-        # Verificar si existe el canal objetivo
-        if guild_id in target_channels:
-            target_channel = interaction.guild.get_channel(target_channels[guild_id])
-            if target_channel:
-                channel_status = f"✅ Actualmente monitorizando canal: #{target_channel.name}"
-                
-                # Verificar permisos en el canal objetivo
-                channel_perms = target_channel.permissions_for(bot_member)
-                if channel_perms.manage_messages:
-                    channel_status += "\n✅ Puedo eliminar mensajes en este canal."
+        # Verificar los canales vigilados
+        policies = channel_router.channels_for_guild(guild_id)
+        if policies:
+            status_lines = []
+            for policy in policies:
+                target_channel = interaction.guild.get_channel(policy.channel_id)
+                if target_channel:
+                    # Verificar permisos en el canal vigilado
+                    channel_perms = target_channel.permissions_for(bot_member)
+                    if channel_perms.manage_messages:
+                        status_lines.append(f"✅ Monitorizando #{target_channel.name} y puedo eliminar mensajes.")
+                    else:
+                        status_lines.append(f"❌ Monitorizando #{target_channel.name}, ¡pero NO tengo permiso para eliminar mensajes!")
                 else:
-                    channel_status += "\n❌ ¡NO tengo permiso para eliminar mensajes en este canal!"
-            else:
-                channel_status = "❌ ¡El canal objetivo configurado previamente ya no existe! Por favor, usa /canal para configurar un nuevo canal."
+                    status_lines.append("❌ ¡Un canal configurado previamente ya no existe! Por favor, usa /canal para configurar un nuevo canal.")
+            channel_status = "\n".join(status_lines)
         else:
             channel_status = "❓ No hay ningún canal configurado actualmente para monitorizar. Usa /canal para configurar uno."
         
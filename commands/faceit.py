@@ -1,12 +1,31 @@
 """
 Comandos relacionados con la integración de FACEIT.
 """
+import asyncio
+import logging
+import re
 import discord
-from discord import app_commands
-import requests
 from datetime import datetime
-from config import FACEIT_API_KEY, FACEIT_API_URL
+from typing import Optional
+from discord import app_commands
+from config import FACEIT_API_KEY, RECENT_WINDOWS, PROGRESS_EDIT_INTERVAL
+from utils.elo_tracker import elo_tracker
+from utils.faceit_client import get_client
+from utils.history_sync import sync_player_history, get_player_history
+from utils.leaderboard import leaderboard, METRICS, RANKING_WINDOW
+from utils.match_columns import get_player_columns, find_map, map_name, map_names
+from utils.match_store import get_match_store
 from utils.helpers import format_timestamp
+from utils.progress import ThrottledEditor
+
+logger = logging.getLogger(__name__)
+
+# Máximo de jugadores en /elos (un lobby de FACEIT)
+MAX_LOBBY_PLAYERS = 10
+# Máximo de partidas locales que analiza /historial
+MAX_HISTORY_WINDOW = 1000
+# Jugadores por página de /ranking
+RANKING_PAGE_SIZE = 10
 
 # Variable global para almacenar las referencias
 _bot = None
@@ -20,6 +39,111 @@ def setup(bot, tree):
     
     register_commands(tree)
 
+def parse_nicknames(text):
+    """Separa nicknames por comas o espacios, sin repetir (ignorando mayúsculas)."""
+    nicknames = {}
+    for nickname in re.split(r'[\s,;]+', text or ''):
+        if nickname:
+            nicknames.setdefault(nickname.lower(), nickname)
+    return list(nicknames.values())
+
+def _player_summary(nickname, response):
+    """(nickname, nivel, elo) de una respuesta de /players, o None si no se encontró."""
+    if isinstance(response, BaseException) or response.status != 200:
+        return None
+    data = response.json()
+    cs2 = data.get('games', {}).get('cs2', {})
+    if 'faceit_elo' not in cs2:
+        return None
+    return data.get('nickname', nickname), cs2.get('skill_level', 0), cs2['faceit_elo']
+
+def lobby_embed(summaries, missing):
+    """Embed compacto con nivel y ELO de cada jugador y la media del grupo."""
+    summaries = sorted(summaries, key=lambda summary: summary[2], reverse=True)
+    lines = [f"`{level:>2}` ⭐ **{nickname}** — {elo} ELO" for nickname, level, elo in summaries]
+    embed = discord.Embed(
+        title=f"ELO de {len(summaries)} jugadores en FACEIT",
+        description="\n".join(lines) or "Ningún jugador encontrado.",
+        color=0xFF5500  # Color naranja de FACEIT
+    )
+    if summaries:
+        average_elo = sum(elo for _, _, elo in summaries) / len(summaries)
+        average_level = sum(level for _, level, _ in summaries) / len(summaries)
+        embed.add_field(name="Media del equipo", value=f"{average_elo:.0f} ELO · nivel {average_level:.1f}", inline=False)
+    if missing:
+        embed.add_field(name="No encontrados", value=", ".join(missing), inline=False)
+    embed.set_footer(text=f"Información actualizada el {format_timestamp()}")
+    return embed
+
+def recent_embed(player_data, nickname, partidas, window, progress=None):
+    """Embed de /recientes con el perfil y los agregados de la ventana.
+
+    `progress` = (hechas, total) mientras se descargan las partidas; total es
+    None si aún no se conoce el historial.
+    """
+    player_nickname = player_data.get('nickname', nickname)
+    cs2 = player_data.get('games', {}).get('cs2', {})
+    embed = discord.Embed(
+        title=f"Últimas {partidas} partidas de {player_nickname} en FACEIT",
+        url=f"https://www.faceit.com/es/players/{player_nickname}",
+        color=0xFF5500  # Color naranja de FACEIT
+    )
+    
+    # Añadir avatar del jugador si está disponible
+    avatar_url = player_data.get('avatar')
+    if avatar_url:
+        embed.set_thumbnail(url=avatar_url)
+    
+    # El perfil ya se conoce desde la primera respuesta
+    embed.add_field(name="Nivel", value=f"{cs2.get('skill_level', 0)} ⭐", inline=True)
+    embed.add_field(name="ELO", value=cs2.get('faceit_elo', 'Desconocido'), inline=True)
+    
+    if progress is not None:
+        done, total = progress
+        embed.add_field(
+            name="⏳ Cargando partidas",
+            value="Buscando historial…" if total is None else f"{done}/{total} estadísticas descargadas",
+            inline=False
+        )
+    
+    if window.matches == 0:
+        if progress is None:
+            embed.add_field(
+                name="Sin partidas recientes",
+                value="No se encontraron partidas recientes para este jugador.",
+                inline=False
+            )
+    else:
+        wins = window.wins
+        losses = window.losses
+        
+        # Calcular estadísticas
+        maps_played = wins + losses
+        win_rate = (wins / maps_played) * 100 if maps_played > 0 else 0
+        avg_kd = window.kills / window.deaths if window.deaths > 0 else 0
+        hs_percentage = (window.headshots / window.kills) * 100 if window.kills > 0 else 0
+        
+        # Añadir estadísticas al embed
+        embed.add_field(name="Partidas analizadas", value=f"{window.analyzed}/{window.matches}", inline=True)
+        embed.add_field(name="Victorias", value=f"{wins}", inline=True)
+        embed.add_field(name="Derrotas", value=f"{losses}", inline=True)
+        embed.add_field(name="% Victoria", value=f"{win_rate:.1f}%", inline=True)
+        embed.add_field(name="K/D", value=f"{avg_kd:.2f}", inline=True)
+        embed.add_field(name="% Headshots", value=f"{hs_percentage:.1f}%", inline=True)
+        
+        # Información sobre la tendencia
+        if maps_played > 0:
+            trend = "🟩 POSITIVA" if win_rate >= 50 else "🟥 NEGATIVA"
+            embed.add_field(
+                name="Tendencia",
+                value=f"{trend} ({'+' if win_rate >= 50 else '-'}{abs(wins - losses)} partidas)",
+                inline=False
+            )
+    
+    # Añadir pie de página
+    embed.set_footer(text=f"Información actualizada el {format_timestamp()}")
+    return embed
+
 def register_commands(tree):
     """Registra todos los comandos FACEIT en el árbol."""
     
@@ -38,19 +162,13 @@ def register_commands(tree):
         await interaction.response.defer(thinking=True)
         
         try:
-            # Buscar al jugador por nickname (case insensitive)
-            headers = {
-                "Authorization": f"Bearer {FACEIT_API_KEY}",
-                "Accept": "application/json"
-            }
-            
             # Utilizamos la búsqueda por nickname, que es insensible a mayúsculas/minúsculas
             # La API de FACEIT por defecto trata las búsquedas como case insensitive
-            player_url = f"{FACEIT_API_URL}/players?nickname={nickname}&game=cs2"
-            player_response = requests.get(player_url, headers=headers)
+            client = get_client()
+            player_response = await client.get_player(nickname)
             
-            if player_response.status_code != 200:
-                await interaction.followup.send(f"❌ No se encontró el jugador '{nickname}' en FACEIT o hubo un error en la API. Código: {player_response.status_code}")
+            if player_response.status != 200:
+                await interaction.followup.send(f"❌ No se encontró el jugador '{nickname}' en FACEIT o hubo un error en la API. Código: {player_response.status}")
                 return
             
             player_data = player_response.json()
@@ -82,7 +200,56 @@ def register_commands(tree):
             await interaction.followup.send(embed=embed)
             
         except Exception as e:
-            print(f"ERROR consultando FACEIT API: {e}")
+            logger.exception("Error consultando FACEIT API", extra={'command': interaction.command.name if interaction.command else None})
+            await interaction.followup.send(f"❌ Ocurrió un error al procesar la solicitud: {str(e)}")
+
+    @tree.command(name='elos', description='Buscar el ELO de varios jugadores a la vez o de tu canal de voz')
+    @app_commands.describe(nicknames='Hasta 10 nicknames separados por espacios o comas (vacío = tu canal de voz)')
+    async def faceit_lobby(interaction: discord.Interaction, nicknames: Optional[str] = None):
+        """Busca el ELO de todo un lobby en una sola interacción."""
+        if not FACEIT_API_KEY:
+            await interaction.response.send_message(
+                "⚠️ No se ha configurado la API key de FACEIT. El administrador debe configurarla en las variables de entorno.",
+                ephemeral=True
+            )
+            return
+        
+        names = parse_nicknames(nicknames)
+        if not names:
+            # Sin nicknames: los miembros del canal de voz del usuario (su nombre en el servidor)
+            voice = getattr(interaction.user, 'voice', None)
+            if voice is None or voice.channel is None:
+                await interaction.response.send_message(
+                    "❌ Indica uno o más nicknames o únete a un canal de voz.", ephemeral=True
+                )
+                return
+            names = parse_nicknames(" ".join(
+                member.display_name.replace(" ", "") for member in voice.channel.members if not member.bot
+            ))
+        if len(names) > MAX_LOBBY_PLAYERS:
+            await interaction.response.send_message(
+                f"❌ Como máximo {MAX_LOBBY_PLAYERS} jugadores a la vez ({len(names)} indicados).", ephemeral=True
+            )
+            return
+        
+        await interaction.response.defer(thinking=True)
+        
+        try:
+            # Todas las búsquedas en paralelo a través de la caché compartida
+            client = get_client()
+            responses = await asyncio.gather(*[client.get_player(name) for name in names], return_exceptions=True)
+            summaries = []
+            missing = []
+            for name, response in zip(names, responses):
+                summary = _player_summary(name, response)
+                if summary is None:
+                    missing.append(name)
+                else:
+                    summaries.append(summary)
+            await interaction.followup.send(embed=lobby_embed(summaries, missing))
+            
+        except Exception as e:
+            logger.exception("Error consultando FACEIT API", extra={'command': interaction.command.name if interaction.command else None})
             await interaction.followup.send(f"❌ Ocurrió un error al procesar la solicitud: {str(e)}")
 
     @tree.command(name='stats', description='Buscar estadísticas generales de un jugador en FACEIT')
@@ -101,16 +268,11 @@ def register_commands(tree):
         
         try:
             # Buscar al jugador por nickname
-            headers = {
-                "Authorization": f"Bearer {FACEIT_API_KEY}",
-                "Accept": "application/json"
-            }
-            
-            player_url = f"{FACEIT_API_URL}/players?nickname={nickname}&game=cs2"
-            player_response = requests.get(player_url, headers=headers)
+            client = get_client()
+            player_response = await client.get_player(nickname)
             
-            if player_response.status_code != 200:
-                await interaction.followup.send(f"❌ No se encontró el jugador '{nickname}' en FACEIT o hubo un error en la API. Código: {player_response.status_code}")
+            if player_response.status != 200:
+                await interaction.followup.send(f"❌ No se encontró el jugador '{nickname}' en FACEIT o hubo un error en la API. Código: {player_response.status}")
                 return
             
             player_data = player_response.json()
@@ -121,11 +283,10 @@ def register_commands(tree):
                 return
             
             # Obtener estadísticas del jugador
-            stats_url = f"{FACEIT_API_URL}/players/{player_id}/stats/cs2"
-            stats_response = requests.get(stats_url, headers=headers)
+            stats_response = await client.get_player_stats(player_id)
             
-            if stats_response.status_code != 200:
-                await interaction.followup.send(f"⚠️ Jugador encontrado, pero no se pudieron obtener estadísticas. Código: {stats_response.status_code}")
+            if stats_response.status != 200:
+                await interaction.followup.send(f"⚠️ Jugador encontrado, pero no se pudieron obtener estadísticas. Código: {stats_response.status}")
                 return
             
             stats_data = stats_response.json()
@@ -172,13 +333,15 @@ def register_commands(tree):
             await interaction.followup.send(embed=embed)
             
         except Exception as e:
-            print(f"ERROR consultando FACEIT API: {e}")
+            logger.exception("Error consultando FACEIT API", extra={'command': interaction.command.name if interaction.command else None})
             await interaction.followup.send(f"❌ Ocurrió un error al procesar la solicitud: {str(e)}")
 
-    @tree.command(name='recientes', description='Ver estadísticas de las últimas 20 partidas en FACEIT')
-    @app_commands.describe(nickname='Nickname de FACEIT del jugador')
-    async def faceit_recent(interaction: discord.Interaction, nickname: str):
-        """Busca y muestra estadísticas de las últimas 20 partidas de un jugador en FACEIT."""
+    @tree.command(name='recientes', description='Ver estadísticas de las últimas partidas en FACEIT (20 por defecto)')
+    @app_commands.describe(nickname='Nickname de FACEIT del jugador', partidas='Número de partidas a analizar')
+    @app_commands.choices(partidas=[app_commands.Choice(name=str(size), value=size) for size in RECENT_WINDOWS])
+    async def faceit_recent(interaction: discord.Interaction, nickname: str, partidas: int = RECENT_WINDOWS[0]):
+        """Busca y muestra estadísticas de las últimas partidas de un jugador en FACEIT.
+        El perfil se envía en cuanto se conoce y el mensaje se va editando según llegan las partidas."""
         if not FACEIT_API_KEY:
             await interaction.response.send_message(
                 "⚠️ No se ha configurado la API key de FACEIT. El administrador debe configurarla en las variables de entorno.",
@@ -189,131 +352,280 @@ def register_commands(tree):
         # Primero, indicar que estamos procesando
         await interaction.response.defer(thinking=True)
         
+        editor = None
         try:
             # Buscar al jugador por nickname
-            headers = {
-                "Authorization": f"Bearer {FACEIT_API_KEY}",
-                "Accept": "application/json"
-            }
-            
-            player_url = f"{FACEIT_API_URL}/players?nickname={nickname}&game=cs2"
-            player_response = requests.get(player_url, headers=headers)
+            client = get_client()
+            player_response = await client.get_player(nickname)
             
-            if player_response.status_code != 200:
-                await interaction.followup.send(f"❌ No se encontró el jugador '{nickname}' en FACEIT o hubo un error en la API. Código: {player_response.status_code}")
+            if player_response.status != 200:
+                await interaction.followup.send(f"❌ No se encontró el jugador '{nickname}' en FACEIT o hubo un error en la API. Código: {player_response.status}")
                 return
             
             player_data = player_response.json()
             player_id = player_data.get('player_id')
-            player_nickname = player_data.get('nickname', nickname)
             
             if not player_id:
                 await interaction.followup.send(f"❌ No se encontró el jugador '{nickname}' en FACEIT.")
                 return
             
-            # Obtener historial de las últimas 20 partidas
-            history_url = f"{FACEIT_API_URL}/players/{player_id}/history?game=cs2&offset=0&limit=20"
-            history_response = requests.get(history_url, headers=headers)
+            # Respuesta progresiva: perfil y ELO ya, y el mismo mensaje se edita según llegan las partidas
+            on_progress = None
+            if PROGRESS_EDIT_INTERVAL > 0:
+                history = get_player_history(player_id)
+                message = await interaction.followup.send(
+                    embed=recent_embed(player_data, nickname, partidas, history.window(partidas), progress=(0, None)),
+                    wait=True
+                )
+                editor = ThrottledEditor(message)
+                on_progress = lambda done, total: editor.update(
+                    embed=recent_embed(player_data, nickname, partidas, history.window(partidas), progress=(done, total))
+                )
+            
+            # Sincronizar el historial: solo se descargan las partidas nuevas desde la última consulta
+            history_response, history = await sync_player_history(
+                client, get_match_store(), player_id, partidas, on_progress=on_progress
+            )
             
-            if history_response.status_code != 200:
-                await interaction.followup.send(f"⚠️ Jugador encontrado, pero no se pudo obtener historial de partidas. Código: {history_response.status_code}")
+            if not history_response.ok and history.watermark is None:
+                text = f"⚠️ Jugador encontrado, pero no se pudo obtener historial de partidas. Código: {history_response.status}"
+                if editor is not None:
+                    await editor.finish(content=text, embed=None)
+                else:
+                    await interaction.followup.send(text)
                 return
             
-            history_data = history_response.json()
+            embed = recent_embed(player_data, nickname, partidas, history.window(partidas))
+            if editor is not None:
+                await editor.finish(embed=embed)
+            else:
+                await interaction.followup.send(embed=embed)
+            
+        except Exception as e:
+            logger.exception("Error consultando FACEIT API", extra={'command': interaction.command.name if interaction.command else None})
+            text = f"❌ Ocurrió un error al procesar la solicitud: {str(e)}"
+            if editor is not None:
+                # El error sustituye al mensaje de progreso para que no se quede "cargando"
+                try:
+                    await editor.finish(content=text, embed=None)
+                    return
+                except discord.HTTPException:
+                    pass
+            await interaction.followup.send(text)
+
+    async def map_autocomplete(interaction: discord.Interaction, current: str):
+        current = current.lower()
+        return [app_commands.Choice(name=name, value=name) for name in map_names() if current in name.lower()][:25]
+
+    @tree.command(name='historial', description='Estadísticas de las partidas guardadas de un jugador, por mapa y con tendencia')
+    @app_commands.describe(
+        nickname='Nickname de FACEIT del jugador',
+        partidas=f'Número de partidas a analizar (1-{MAX_HISTORY_WINDOW})',
+        mapa='Solo partidas en este mapa (p. ej. mirage)'
+    )
+    @app_commands.autocomplete(mapa=map_autocomplete)
+    async def faceit_history(interaction: discord.Interaction, nickname: str,
+                             partidas: app_commands.Range[int, 1, MAX_HISTORY_WINDOW] = RECENT_WINDOWS[0],
+                             mapa: Optional[str] = None):
+        """Variante de /recientes que responde solo con las partidas guardadas localmente."""
+        if not FACEIT_API_KEY:
+            await interaction.response.send_message(
+                "⚠️ No se ha configurado la API key de FACEIT. El administrador debe configurarla en las variables de entorno.",
+                ephemeral=True
+            )
+            return
+        
+        await interaction.response.defer(thinking=True)
+        
+        try:
+            # El perfil sale de la caché de FACEIT; las estadísticas, del almacén local
+            player_response = await get_client().get_player(nickname)
+            player_id = player_response.json().get('player_id') if player_response.ok else None
+            if not player_id:
+                await interaction.followup.send(f"❌ No se encontró el jugador '{nickname}' en FACEIT.")
+                return
+            player_nickname = player_response.json().get('nickname', nickname)
+            
+            columns = await get_player_columns(get_match_store(), player_id)
+            code = None
+            if mapa:
+                code = find_map(mapa)
+                if code is None:
+                    await interaction.followup.send(f"❌ No hay partidas guardadas en el mapa '{mapa}'.")
+                    return
+            selection = columns.select(last=partidas, code=code)
+            if not len(selection):
+                await interaction.followup.send(
+                    f"⚠️ No hay partidas guardadas de {player_nickname}"
+                    + (f" en {mapa}" if mapa else "") + ". Usa /recientes para descargarlas."
+                )
+                return
             
-            # Crear un embed de Discord para las estadísticas recientes
+            totals = selection.totals()
+            title = f"Últimas {len(selection)} partidas de {player_nickname}"
             embed = discord.Embed(
-                title=f"Últimas partidas de {player_nickname} en FACEIT",
+                title=title + (f" en {map_name(code)}" if code else ""),
                 url=f"https://www.faceit.com/es/players/{player_nickname}",
                 color=0xFF5500  # Color naranja de FACEIT
             )
-            
-            # Añadir avatar del jugador si está disponible
-            avatar_url = player_data.get('avatar')
-            if avatar_url:
-                embed.set_thumbnail(url=avatar_url)
-            
-            # Analizar partidas recientes
-            recent_matches = history_data.get('items', [])
-            wins = 0
-            losses = 0
-            total_kills = 0
-            total_deaths = 0
-            total_hs = 0
-            total_maps = 0
-            
-            if not recent_matches:
+            embed.add_field(name="Partidas", value=f"{len(selection)}/{partidas}", inline=True)
+            embed.add_field(name="Victorias", value=f"{totals.wins}", inline=True)
+            embed.add_field(name="Derrotas", value=f"{totals.losses}", inline=True)
+            embed.add_field(name="% Victoria", value=f"{totals.win_rate:.1f}%", inline=True)
+            embed.add_field(name="K/D", value=f"{totals.kd:.2f}", inline=True)
+            embed.add_field(name="% Headshots", value=f"{totals.hs_rate:.1f}%", inline=True)
+            
+            if code is None:
+                lines = [
+                    f"**{name}**: {map_totals.matches} · {map_totals.win_rate:.0f}% · K/D {map_totals.kd:.2f}"
+                    for name, map_totals in selection.by_map()[:7]
+                ]
+                embed.add_field(name="Por mapa", value="\n".join(lines), inline=False)
+            
+            if len(selection) >= 4:
+                older, newer = selection.trend()
+                arrow = "🟩" if newer.kd >= older.kd else "🟥"
                 embed.add_field(
-                    name="Sin partidas recientes",
-                    value="No se encontraron partidas recientes para este jugador.",
+                    name="Tendencia (primera mitad → segunda)",
+                    value=f"{arrow} K/D {older.kd:.2f} → {newer.kd:.2f} · victorias {older.win_rate:.0f}% → {newer.win_rate:.0f}%",
                     inline=False
                 )
-            else:
-                # Obtener detalles de cada partida para contar victorias/derrotas
-                for match in recent_matches:
-                    match_id = match.get('match_id')
-                    total_maps += 1
-                    
-                    # Obtener detalles de la partida
-                    match_stats_url = f"{FACEIT_API_URL}/matches/{match_id}/stats"
-                    match_stats_response = requests.get(match_stats_url, headers=headers)
-                    
-                    if match_stats_response.status_code == 200:
-                        match_stats = match_stats_response.json()
-                        rounds = match_stats.get('rounds', [])
-                        
-                        if rounds:
-                            for round_info in rounds:
-                                teams = round_info.get('teams', [])
-                                
-                                for team in teams:
-                                    players = team.get('players', [])
-                                    
-                                    for player in players:
-                                        if player.get('player_id') == player_id:
-                                            # Encontramos al jugador, extraemos sus estadísticas
-                                            player_stats = player.get('player_stats', {})
-                                            total_kills += int(player_stats.get('Kills', '0'))
-                                            total_deaths += int(player_stats.get('Deaths', '0'))
-                                            total_hs += int(player_stats.get('Headshots', '0'))
-                                            
-                                            # También determinamos si ganó
-                                            team_won = team.get('team_win', '0') == '1'
-                                            if team_won:
-                                                wins += 1
-                                            else:
-                                                losses += 1
-                
-                # Calcular estadísticas
-                matches_with_stats = wins + losses
-                win_rate = (wins / matches_with_stats) * 100 if matches_with_stats > 0 else 0
-                avg_kd = total_kills / total_deaths if total_deaths > 0 else 0
-                hs_percentage = (total_hs / total_kills) * 100 if total_kills > 0 else 0
-                
-                # Añadir estadísticas al embed
-                embed.add_field(name="Partidas analizadas", value=f"{matches_with_stats}/{len(recent_matches)}", inline=True)
-                embed.add_field(name="Victorias", value=f"{wins}", inline=True)
-                embed.add_field(name="Derrotas", value=f"{losses}", inline=True)
-                embed.add_field(name="% Victoria", value=f"{win_rate:.1f}%", inline=True)
-                embed.add_field(name="K/D", value=f"{avg_kd:.2f}", inline=True)
-                embed.add_field(name="% Headshots", value=f"{hs_percentage:.1f}%", inline=True)
-                
-                # Información sobre la tendencia
-                if matches_with_stats > 0:
-                    trend = "🟩 POSITIVA" if win_rate >= 50 else "🟥 NEGATIVA"
-                    embed.add_field(
-                        name="Tendencia",
-                        value=f"{trend} ({'+' if win_rate >= 50 else '-'}{abs(wins - losses)} partidas)",
-                        inline=False
-                    )
             
-            # Añadir pie de página
-            embed.set_footer(text=f"Información actualizada el {format_timestamp()}")
+            first, last = selection.period()
+            embed.set_footer(text=(
+                f"Partidas del {datetime.fromtimestamp(first).strftime('%d/%m/%Y')} "
+                f"al {datetime.fromtimestamp(last).strftime('%d/%m/%Y')} · datos locales"
+            ))
+            await interaction.followup.send(embed=embed)
             
+        except Exception as e:
+            logger.exception("Error consultando FACEIT API", extra={'command': interaction.command.name if interaction.command else None})
+            await interaction.followup.send(f"❌ Ocurrió un error al procesar la solicitud: {str(e)}")
+
+    @tree.command(name='ranking', description='Clasificación de los jugadores seguidos en este servidor')
+    @app_commands.describe(metrica='Ordenar por ELO, K/D o % de victorias recientes', pagina='Página de la clasificación')
+    @app_commands.choices(metrica=[app_commands.Choice(name=name, value=metric) for metric, name in METRICS.items()])
+    async def faceit_ranking(interaction: discord.Interaction, metrica: str = 'elo',
+                             pagina: app_commands.Range[int, 1, 1000] = 1):
+        """Muestra una página de la clasificación sin consultar la API de FACEIT."""
+        if interaction.guild is None:
+            await interaction.response.send_message("❌ Este comando solo funciona en servidores.", ephemeral=True)
+            return
+        
+        # La primera carga del seguimiento lee el almacén y las partidas de cada jugador
+        await interaction.response.defer(thinking=True)
+        await elo_tracker.load()
+        rows, total = leaderboard.page(interaction.guild.id, metrica, pagina, RANKING_PAGE_SIZE)
+        if not total:
+            await interaction.followup.send(
+                "❓ Todavía no hay datos para esta clasificación. Usa /seguimiento para seguir jugadores"
+                + (" y /recientes para sincronizar sus partidas." if metrica != 'elo' else ".")
+            )
+            return
+        pages = (total + RANKING_PAGE_SIZE - 1) // RANKING_PAGE_SIZE
+        if not rows:
+            await interaction.followup.send(f"❌ Solo hay {pages} páginas.")
+            return
+        
+        medals = {1: "🥇", 2: "🥈", 3: "🥉"}
+        formats = {'elo': "{:.0f} ELO", 'kd': "K/D {:.2f}", 'winrate': "{:.1f}%"}
+        lines = [f"{medals.get(rank, f'`#{rank}`')} **{nickname}** — {formats[metrica].format(value)}"
+                 for rank, nickname, value in rows]
+        embed = discord.Embed(
+            title=f"Ranking de {interaction.guild.name} por {METRICS[metrica]}",
+            description="\n".join(lines),
+            color=0xFF5500  # Color naranja de FACEIT
+        )
+        window_note = f" · últimas {RANKING_WINDOW} partidas sincronizadas" if metrica != 'elo' else ""
+        embed.set_footer(text=f"Página {pagina}/{pages} · {total} jugadores{window_note}")
+        await interaction.followup.send(embed=embed)
+
+    @tree.command(name='seguimiento', description='Seguir el ELO de jugadores de FACEIT y avisar en este canal cuando cambie')
+    @app_commands.describe(
+        nickname='Nickname de FACEIT del jugador',
+        accion='Seguir o dejar de seguir al jugador, o listar los jugadores seguidos'
+    )
+    @app_commands.choices(accion=[
+        app_commands.Choice(name='añadir', value='add'),
+        app_commands.Choice(name='quitar', value='remove'),
+        app_commands.Choice(name='listar', value='list'),
+    ])
+    async def faceit_track(interaction: discord.Interaction, nickname: Optional[str] = None, accion: str = 'add'):
+        """Gestiona los jugadores cuyo ELO sigue el bot en este servidor.
+        Añadir y quitar requiere el permiso 'Gestionar Canales'; listar no consulta la API."""
+        if interaction.guild is None:
+            await interaction.response.send_message("❌ Este comando solo funciona en servidores.", ephemeral=True)
+            return
+        guild_id = interaction.guild.id
+        
+        if accion == 'list':
+            await interaction.response.defer(thinking=True)
+            await elo_tracker.load()
+            players = elo_tracker.players_for_guild(guild_id)
+            if not players:
+                await interaction.followup.send("❓ No se sigue a ningún jugador. Usa /seguimiento para añadir uno.")
+                return
+            lines = [
+                f"`{player.level:>2}` ⭐ **{player.nickname}** — {player.elo} ELO" if player.elo is not None
+                else f"`--` **{player.nickname}** — sin datos todavía"
+                for player in players
+            ]
+            embed = discord.Embed(
+                title=f"Jugadores seguidos ({len(players)})",
+                description="\n".join(lines),
+                color=0xFF5500  # Color naranja de FACEIT
+            )
+            embed.set_footer(text=f"Se consultan cada {elo_tracker.cycle_duration(len(elo_tracker)) / 60:.0f} minutos")
             await interaction.followup.send(embed=embed)
+            return
+        
+        if not interaction.permissions.manage_channels:
+            await interaction.response.send_message(
+                "Necesitas el permiso 'Gestionar Canales' para usar este comando.", ephemeral=True
+            )
+            return
+        if not nickname:
+            await interaction.response.send_message("Indica el nickname del jugador.", ephemeral=True)
+            return
+        
+        if accion == 'remove':
+            await interaction.response.defer(thinking=True)
+            player = await elo_tracker.remove(guild_id, nickname)
+            if player is None:
+                await interaction.followup.send(f"❓ No se seguía a '{nickname}' en este servidor.")
+            else:
+                await interaction.followup.send(f"✅ Ya no se sigue el ELO de {player.nickname}.")
+            return
+        
+        if not FACEIT_API_KEY:
+            await interaction.response.send_message(
+                "⚠️ No se ha configurado la API key de FACEIT. El administrador debe configurarla en las variables de entorno.",
+                ephemeral=True
+            )
+            return
+        
+        await interaction.response.defer(thinking=True)
+        
+        try:
+            player_response = await get_client().get_player(nickname)
+            summary = _player_summary(nickname, player_response)
+            player_id = player_response.json().get('player_id')
+            if summary is None or not player_id:
+                await interaction.followup.send(f"❌ No se encontró el jugador '{nickname}' en FACEIT.")
+                return
+            player_nickname, level, elo = summary
+            try:
+                await elo_tracker.add(guild_id, interaction.channel_id, player_id, player_nickname, elo, level)
+            except ValueError as e:
+                await interaction.followup.send(f"❌ {e}.")
+                return
+            await interaction.followup.send(
+                f"✅ Siguiendo a **{player_nickname}** ({elo} ELO, nivel {level}). "
+                f"Los cambios se avisarán en este canal."
+            )
             
         except Exception as e:
-            print(f"ERROR consultando FACEIT API: {e}")
+            logger.exception("Error consultando FACEIT API", extra={'command': interaction.command.name if interaction.command else None})
             await interaction.followup.send(f"❌ Ocurrió un error al procesar la solicitud: {str(e)}")
             
     # Añadir los manejadores de errores para los comandos
@@ -325,6 +637,14 @@ def register_commands(tree):
             ephemeral=True
         )
         
+    @faceit_lobby.error
+    async def faceit_lobby_error(interaction: discord.Interaction, error):
+        """Maneja errores para el comando faceit_lobby."""
+        await interaction.response.send_message(
+            f"❌ Error al buscar el ELO de los jugadores: {str(error)}",
+            ephemeral=True
+        )
+        
     @faceit_stats.error
     async def faceit_stats_error(interaction: discord.Interaction, error):
         """Maneja errores para el comando faceit_stats."""
@@ -333,6 +653,30 @@ def register_commands(tree):
             ephemeral=True
         )
         
+    @faceit_history.error
+    async def faceit_history_error(interaction: discord.Interaction, error):
+        """Maneja errores para el comando faceit_history."""
+        await interaction.response.send_message(
+            f"❌ Error al consultar el historial guardado: {str(error)}",
+            ephemeral=True
+        )
+        
+    @faceit_ranking.error
+    async def faceit_ranking_error(interaction: discord.Interaction, error):
+        """Maneja errores para el comando faceit_ranking."""
+        await interaction.response.send_message(
+            f"❌ Error al mostrar la clasificación: {str(error)}",
+            ephemeral=True
+        )
+        
+    @faceit_track.error
+    async def faceit_track_error(interaction: discord.Interaction, error):
+        """Maneja errores para el comando faceit_track."""
+        await interaction.response.send_message(
+            f"❌ Error al gestionar el seguimiento de ELO: {str(error)}",
+            ephemeral=True
+        )
+        
     @faceit_recent.error
     async def faceit_recent_error(interaction: discord.Interaction, error):
         """Maneja errores para el comando faceit_recent."""
@@ -3,7 +3,6 @@ Comandos generales y básicos del bot.
 """
 import discord
 from discord import app_commands
-from config import target_channels
 from utils.helpers import get_target_channel_info
 
 # Variable global para almacenar las referencias
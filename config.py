@@ -3,18 +3,95 @@ Configuraciones globales para el bot.
 Centraliza todas las variables de configuración, patrones y constantes.
 """
 import os
-import re
 
 # Canal predeterminado para monitorear mensajes
 DEFAULT_CHANNEL_NAME = "〖🔫〗cs2"
 
-# Detectar cualquier IPv4 en el mensaje
-IP_PATTERN = re.compile(r'((?:\d{1,3}\.){3}\d{1,3})')
+# Ventana (segundos) para agrupar borrados y avisos de moderación durante ráfagas
+MODERATION_BATCH_WINDOW = float(os.environ.get('MODERATION_BATCH_WINDOW', '1.0'))
+
+# Caché de huellas de contenido de mensajes revisados (para no re-escanear ediciones sin cambios)
+SCAN_CACHE_MAX_ENTRIES = int(os.environ.get('SCAN_CACHE_MAX_ENTRIES', '10000'))
+SCAN_CACHE_TTL = float(os.environ.get('SCAN_CACHE_TTL', '900'))  # segundos
+
+# Modo ligero: intents mínimos, sin caché de miembros ni chunking y caché de mensajes acotada
+LEAN_MODE = os.environ.get('LEAN_MODE', '0').lower() in ('1', 'true', 'yes', 'on')
+# Tamaño de la caché de mensajes en modo ligero (0 = sin caché de mensajes). Es una
+# única cola para todos los canales: las ediciones las cubre el evento crudo
+MESSAGE_CACHE_SIZE = int(os.environ.get('MESSAGE_CACHE_SIZE', '200'))
+
+# Sincronizaciones de comandos slash simultáneas al arrancar
+COMMAND_SYNC_CONCURRENCY = int(os.environ.get('COMMAND_SYNC_CONCURRENCY', '4'))
+
+# Logs: nivel, formato ('json' o 'text') y máximo de eventos muestreados por segundo
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json').lower()
+LOG_SAMPLE_PER_SECOND = int(os.environ.get('LOG_SAMPLE_PER_SECOND', '5'))
+
+# Servidor HTTP interno (/metrics); PORT lo definen plataformas como Railway. 0 = desactivado
+HTTP_HOST = os.environ.get('HTTP_HOST', '0.0.0.0')
+HTTP_PORT = int(os.environ.get('HTTP_PORT', os.environ.get('PORT', '8080')))
+
+# Watchdog del bucle de eventos: intervalo de latido y umbral de bloqueo (segundos)
+WATCHDOG_INTERVAL = float(os.environ.get('WATCHDOG_INTERVAL', '0.5'))
+WATCHDOG_BLOCK_THRESHOLD = float(os.environ.get('WATCHDOG_BLOCK_THRESHOLD', '0.25'))
+WATCHDOG_MAX_INCIDENTS = int(os.environ.get('WATCHDOG_MAX_INCIDENTS', '20'))
+
+# Shards del gateway: SHARD_COUNT vacío = sin shards, 'auto' o un número; SHARD_IDS = rango de este
+# proceso (p. ej. "0-3"); SHARD_WORKERS = procesos a lanzar repartiendo los shards
+SHARD_COUNT = os.environ.get('SHARD_COUNT', '')
+SHARD_IDS = os.environ.get('SHARD_IDS', '')
+SHARD_WORKERS = int(os.environ.get('SHARD_WORKERS', '1'))
 
 # Tokens y claves de API
 DISCORD_TOKEN = os.environ.get('DISCORD_TOKEN')
 FACEIT_API_KEY = os.environ.get('FACEIT_API_KEY')
-FACEIT_API_URL = "https://open.faceit.com/data/v4"
+FACEIT_API_URL = os.environ.get('FACEIT_API_URL', "https://open.faceit.com/data/v4")
+
+# Cliente HTTP de FACEIT (pool de conexiones compartido)
+FACEIT_HTTP_TIMEOUT = float(os.environ.get('FACEIT_HTTP_TIMEOUT', '10'))  # segundos por petición
+FACEIT_CONNECT_TIMEOUT = float(os.environ.get('FACEIT_CONNECT_TIMEOUT', '5'))
+FACEIT_MAX_CONNECTIONS = int(os.environ.get('FACEIT_MAX_CONNECTIONS', '50'))
+FACEIT_MAX_CONNECTIONS_PER_HOST = int(os.environ.get('FACEIT_MAX_CONNECTIONS_PER_HOST', '20'))
+FACEIT_KEEPALIVE_TIMEOUT = float(os.environ.get('FACEIT_KEEPALIVE_TIMEOUT', '30'))
+
+# Límite global de peticiones a FACEIT (token bucket) y reintentos
+FACEIT_RATE_LIMIT = float(os.environ.get('FACEIT_RATE_LIMIT', '10'))  # peticiones por segundo
+FACEIT_RATE_BURST = int(os.environ.get('FACEIT_RATE_BURST', '30'))
+FACEIT_MAX_RETRIES = int(os.environ.get('FACEIT_MAX_RETRIES', '3'))
+FACEIT_BACKOFF_BASE = float(os.environ.get('FACEIT_BACKOFF_BASE', '0.5'))  # segundos
+FACEIT_BACKOFF_MAX = float(os.environ.get('FACEIT_BACKOFF_MAX', '30'))
+
+# Descarga en paralelo de estadísticas de partidas (/recientes)
+FACEIT_MATCH_CONCURRENCY = int(os.environ.get('FACEIT_MATCH_CONCURRENCY', '8'))
+FACEIT_MATCH_DEADLINE = float(os.environ.get('FACEIT_MATCH_DEADLINE', '8'))  # segundos para todo el lote
+# Respuesta progresiva de /recientes: segundos mínimos entre ediciones del mensaje (0 = un solo mensaje al final)
+PROGRESS_EDIT_INTERVAL = float(os.environ.get('PROGRESS_EDIT_INTERVAL', '1.0'))
+
+# Caché de respuestas de FACEIT: TTL en segundos por endpoint (0 = sin caducidad)
+FACEIT_CACHE_MAX_ENTRIES = int(os.environ.get('FACEIT_CACHE_MAX_ENTRIES', '2000'))  # por endpoint
+FACEIT_CACHE_TTL_PLAYER = float(os.environ.get('FACEIT_CACHE_TTL_PLAYER', '60'))
+FACEIT_CACHE_TTL_STATS = float(os.environ.get('FACEIT_CACHE_TTL_STATS', '300'))
+FACEIT_CACHE_TTL_HISTORY = float(os.environ.get('FACEIT_CACHE_TTL_HISTORY', '60'))
+FACEIT_CACHE_TTL_MATCH = float(os.environ.get('FACEIT_CACHE_TTL_MATCH', '0'))  # partidas terminadas no cambian
+
+# Almacenamiento local persistente
+DATA_DIR = os.environ.get('DATA_DIR', 'data')
+MATCH_STORE_PATH = os.environ.get('MATCH_STORE_PATH', os.path.join(DATA_DIR, 'matches.sqlite3'))
+MATCH_STORE_MAX_MATCHES = int(os.environ.get('MATCH_STORE_MAX_MATCHES', '50000'))
+GUILD_STORE_PATH = os.environ.get('GUILD_STORE_PATH', os.path.join(DATA_DIR, 'guilds.sqlite3'))
+# Caché de FACEIT compartida entre procesos (se activa sola con SHARD_WORKERS > 1)
+FACEIT_SHARED_CACHE = os.environ.get('FACEIT_SHARED_CACHE', '0').lower() in ('1', 'true', 'yes', 'on')
+SHARED_CACHE_PATH = os.environ.get('SHARED_CACHE_PATH', os.path.join(DATA_DIR, 'cache.sqlite3'))
+TRACKER_STORE_PATH = os.environ.get('TRACKER_STORE_PATH', os.path.join(DATA_DIR, 'tracker.sqlite3'))
+
+# Seguimiento de ELO en segundo plano: cada cuánto se consulta a cada jugador (segundos), peticiones
+# máximas por intervalo (con más jugadores el ciclo se alarga), tamaño de lote y límite por servidor
+TRACKER_POLL_INTERVAL = float(os.environ.get('TRACKER_POLL_INTERVAL', '600'))
+TRACKER_REQUEST_BUDGET = int(os.environ.get('TRACKER_REQUEST_BUDGET', '300'))
+TRACKER_BATCH_SIZE = int(os.environ.get('TRACKER_BATCH_SIZE', '10'))
+TRACKER_MAX_PLAYERS_PER_GUILD = int(os.environ.get('TRACKER_MAX_PLAYERS_PER_GUILD', '50'))
 
-# Diccionario para almacenar canales objetivo por servidor
-target_channels = {}
+# Ventanas de partidas disponibles en /recientes y estados incrementales en memoria
+RECENT_WINDOWS = (20, 50, 100)
+HISTORY_SYNC_MAX_PLAYERS = int(os.environ.get('HISTORY_SYNC_MAX_PLAYERS', '5000'))
@@ -1,65 +1,148 @@
 """
 Maneja los eventos relacionados con mensajes del bot.
 """
-from config import IP_PATTERN, target_channels
+import logging
+from config import SCAN_CACHE_MAX_ENTRIES, SCAN_CACHE_TTL
+from utils.cache import TTLCache
+from utils.channel_router import channel_router
+from utils.ip_detector import detect
+from utils.metrics import registry, messages_scanned, messages_flagged, track_cache
+from utils.moderation_queue import moderation_queue
+
+logger = logging.getLogger(__name__)
+
+# Huella del contenido y veredicto de los mensajes revisados recientemente:
+# message_id -> (hash del contenido, Detection o None). Las ediciones que no
+# cambian el texto (embeds, previsualizaciones de enlaces) no se vuelven a escanear.
+_verdicts = TTLCache(maxsize=SCAN_CACHE_MAX_ENTRIES, ttl=SCAN_CACHE_TTL)
+track_cache('scan_verdicts', _verdicts)
+
+scans_skipped = registry.counter(
+    'botardo_scans_skipped_total', "Ediciones sin cambios de contenido que no se vuelven a escanear", ('event',)
+)
+
+
+class _Author:
+    __slots__ = ('id',)
+
+    def __init__(self, user_id):
+        self.id = user_id
+
+    @property
+    def mention(self):
+        return f"<@{self.id}>"
+
+
+class _UncachedMessage:
+    """Mensaje editado que no está en la caché de discord.py, construido a partir del evento crudo.
+
+    Tiene lo que necesita la cola de moderación (id, canal, autor y delete)
+    sin pedir el mensaje completo a la API.
+    """
+
+    __slots__ = ('id', 'channel', 'guild', 'author', 'content')
+
+    def __init__(self, message_id, channel, author_id, content):
+        self.id = message_id
+        self.channel = channel
+        self.guild = getattr(channel, 'guild', None)
+        self.author = _Author(author_id)
+        self.content = content
+
+    async def delete(self):
+        await self.channel.get_partial_message(self.id).delete()
+
+
+def _log_detection(message, detection, edited):
+    # Nunca se registra el contenido ni la IP; el muestreo evita inundar los logs en ráfagas
+    logger.info(
+        "Mensaje con IP detectado",
+        extra={
+            'sample': 'ip_detected',
+            'guild_id': message.guild.id if message.guild else None,
+            'channel_id': message.channel.id,
+            'author_id': message.author.id,
+            'message_id': message.id,
+            'kind': detection.kind,
+            'length': len(message.content),
+            'edited': edited,
+        },
+    )
+
+def _scan(message, event):
+    """Escanea el mensaje salvo que su contenido no haya cambiado desde la última revisión.
+
+    Devuelve la detección nueva o None si no hay IP o si el contenido ya se revisó.
+    """
+    fingerprint = hash(message.content)
+    cached = _verdicts.get(message.id)
+    if cached is not None and cached[0] == fingerprint:
+        scans_skipped.inc(event=event)
+        return None
+    messages_scanned.inc(event=event)
+    detection = detect(message.content)
+    _verdicts.set(message.id, (fingerprint, detection))
+    if detection:
+        messages_flagged.inc(event=event, kind=detection.kind)
+    return detection
 
 async def on_message(bot, message):
     """Maneja el evento que se ejecuta cuando se recibe un mensaje."""
+    # Solo revisar mensajes en canales vigilados (una única búsqueda en el índice)
+    policy = channel_router.get(message.channel.id)
+    if policy is None:
+        return
+
     # Ignorar mensajes del propio bot para evitar bucles
     if message.author == bot.user:
         return
-    
-    # Solo revisar mensajes en el canal objetivo para este servidor
-    guild_id = message.guild.id
-    if guild_id not in target_channels or message.channel.id != target_channels[guild_id]:
-        return
-    
+
     # Comprobar si el mensaje contiene una IP
-    match = IP_PATTERN.search(message.content)
-    if match:
-        found_ip = match.group(1)
-        print(f'Mensaje sensible detectado en canal #{message.channel.name} - Usuario: {message.author}, Contenido: {message.content}')
-        try:
-            await message.delete()
-            print(f'Mensaje con IP eliminado correctamente: {found_ip}')
-            await message.channel.send(
-                f"{message.author.mention} tu mensaje ha sido eliminado porque contenía una dirección IP.",
-                delete_after=10
-            )
-        except Exception as e:
-            print(f"ERROR al eliminar mensaje: {e}")
-            try:
-                await message.channel.send(
-                    f"Necesito el permiso 'Gestionar Mensajes' para eliminar mensajes que contengan direcciones IP."
-                )
-            except:
-                pass
+    detection = _scan(message, 'create')
+    if detection:
+        _log_detection(message, detection, edited=False)
+        # El borrado y el aviso se agrupan por canal para soportar ráfagas
+        moderation_queue.submit(message, notify=policy.notify)
 
 async def on_message_edit(bot, before, after):
     """Maneja el evento que se ejecuta cuando se edita un mensaje."""
-    if after.author == bot.user:
+    policy = channel_router.get(after.channel.id)
+    if policy is None or not policy.check_edits:
         return
-    guild_id = after.guild.id
-    if guild_id not in target_channels or after.channel.id != target_channels[guild_id]:
+    if after.author == bot.user:
         return
     if before.content == after.content:
         return
-    match = IP_PATTERN.search(after.content)
-    if match:
-        found_ip = match.group(1)
-        print(f'MENSAJE EDITADO con IP detectado en canal #{after.channel.name} - Usuario: {after.author}, Contenido: {after.content}')
-        try:
-            await after.delete()
-            print(f'Mensaje editado con IP eliminado correctamente: {found_ip}')
-            await after.channel.send(
-                f"{after.author.mention} tu mensaje editado ha sido eliminado porque contenía una dirección IP.",
-                delete_after=10
-            )
-        except Exception as e:
-            print(f"ERROR al eliminar mensaje editado: {e}")
-            try:
-                await after.channel.send(
-                    f"Necesito el permiso 'Gestionar Mensajes' para eliminar mensajes editados que contengan direcciones IP."
-                )
-            except:
-                pass
+    detection = _scan(after, 'edit')
+    if detection:
+        _log_detection(after, detection, edited=True)
+        moderation_queue.submit(after, edited=True, notify=policy.notify)
+
+async def on_raw_message_edit(bot, payload):
+    """Revisa las ediciones de mensajes que no están en la caché de discord.py.
+
+    Para los mensajes en caché ya se dispara on_message_edit. Para el resto se
+    usa el contenido del evento crudo, sin pedir el mensaje a la API.
+    """
+    if payload.cached_message is not None:
+        return
+    policy = channel_router.get(payload.channel_id)
+    if policy is None or not policy.check_edits:
+        return
+    data = payload.data
+    # Las actualizaciones de embeds no traen contenido
+    content = data.get('content')
+    author = data.get('author')
+    if content is None or author is None:
+        return
+    author_id = int(author['id'])
+    if bot.user is not None and author_id == bot.user.id:
+        return
+    channel = bot.get_channel(payload.channel_id)
+    if channel is None:
+        return
+    message = _UncachedMessage(payload.message_id, channel, author_id, content)
+    detection = _scan(message, 'raw_edit')
+    if detection:
+        _log_detection(message, detection, edited=True)
+        moderation_queue.submit(message, edited=True, notify=policy.notify)
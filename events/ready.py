@@ -1,70 +1,71 @@
 """
 Maneja el evento on_ready del bot cuando se conecta.
 """
+import logging
 import discord
-from config import DEFAULT_CHANNEL_NAME, target_channels
+from config import DEFAULT_CHANNEL_NAME
+from utils.channel_router import channel_router
+from utils.command_sync import sync_commands
+from utils.guild_store import load_channel_routes, watch_channel, unwatch_channel, is_manually_configured
+from utils.helpers import get_bot_member
+
+logger = logging.getLogger(__name__)
 
 async def on_ready(bot, tree):
     """Maneja el evento que se ejecuta cuando el bot está listo y conectado."""
-    print(f'Bot conectado como {bot.user.name}')
-    print(f'ID del Bot: {bot.user.id}')
-    print('------')
+    logger.info("Bot conectado como %s", bot.user.name, extra={'bot_id': bot.user.id, 'guilds': len(bot.guilds)})
     
-    # ESTRATEGIA DE SINCRONIZACIÓN MEJORADA
-    # 1. Primero sincronizamos por servidores (más rápido y con menos límites de tasa)
-    print("\nSincronizando comandos por servidor (para actualizaciones rápidas)...")
-    for guild in bot.guilds:
-        try:
-            # NO borrar comandos existentes - esto estaba causando el problema
-            # Sincronizar los comandos actuales
-            guild_commands = await tree.sync(guild=guild)
-            print(f"✓ Comandos sincronizados para {guild.name} (ID: {guild.id}). Cantidad: {len(guild_commands)}")
-            if guild_commands:
-                print(f"  Comandos: {', '.join([cmd.name for cmd in guild_commands])}")
-        except Exception as e:
-            print(f"✗ Error sincronizando comandos para {guild.name}: {e}")
+    # La configuración de canales se carga en setup_hook; esto no hace nada si ya está cargada
+    await load_channel_routes()
     
-    # 2. Luego sincronizamos globalmente para servidores futuros
+    # Sincronizar solo los comandos que han cambiado (una vez por proceso, no en cada reconexión)
     try:
-        print("\nRealizando sincronización global de comandos...")
-        # NO borrar comandos globales - esto estaba causando el problema
-        # Sincronizar con comandos actualizados
-        synced = await tree.sync()
-        print(f"¡Comandos slash sincronizados globalmente! Cantidad: {len(synced)}")
-        if synced:
-            print(f"Comandos registrados: {', '.join([cmd.name for cmd in synced])}")
-    except Exception as e:
-        print(f"Error en sincronización global: {e}")
+        await sync_commands(bot, tree)
+    except Exception:
+        logger.exception("Error en sincronización de comandos")
     
     # Información sobre permisos del bot
     for guild in bot.guilds:
-        print(f'Conectado al servidor: {guild.name} (id: {guild.id})')
+        logger.info("Conectado al servidor %s", guild.name, extra={'guild_id': guild.id})
         
-        # Intentar encontrar el canal predeterminado si no hay ninguno configurado para este servidor
-        if guild.id not in target_channels:
+        # Validar los canales guardados; si alguno sigue existiendo no hace falta buscar nada más
+        valid_channels = 0
+        if not guild.unavailable:
+            for policy in channel_router.channels_for_guild(guild.id):
+                channel = guild.get_channel(policy.channel_id)
+                if channel:
+                    valid_channels += 1
+                    logger.info("Usando canal objetivo configurado #%s", channel.name, extra={'guild_id': guild.id, 'channel_id': channel.id})
+                else:
+                    logger.warning("Un canal objetivo configurado ya no existe", extra={'guild_id': guild.id, 'channel_id': policy.channel_id})
+                    # Eliminar canal inválido
+                    await unwatch_channel(policy.channel_id, manual=False)
+        
+        # Buscar el canal predeterminado solo si no hay ninguno válido y nadie lo ha configurado a mano
+        if not guild.unavailable and not valid_channels and not is_manually_configured(guild.id):
             default_channel = discord.utils.get(guild.channels, name=DEFAULT_CHANNEL_NAME)
             if default_channel:
-                target_channels[guild.id] = default_channel.id
-                print(f'Canal objetivo predeterminado configurado "{DEFAULT_CHANNEL_NAME}" en {guild.name}')
-            else:
-                print(f'ADVERTENCIA: Canal predeterminado "{DEFAULT_CHANNEL_NAME}" no encontrado en {guild.name}')
-        else:
-            channel = guild.get_channel(target_channels[guild.id])
-            if channel:
-                print(f'Usando canal objetivo previamente configurado "{channel.name}" en {guild.name}')
+                await watch_channel(guild.id, default_channel.id, manual=False)
+                logger.info("Canal objetivo predeterminado #%s configurado", DEFAULT_CHANNEL_NAME, extra={'guild_id': guild.id, 'channel_id': default_channel.id})
             else:
-                print(f'ADVERTENCIA: El canal objetivo configurado previamente ya no existe en {guild.name}')
-                # Eliminar canal inválido
-                target_channels.pop(guild.id, None)
-        
-        bot_member = guild.get_member(bot.user.id)
-        permissions = bot_member.guild_permissions
-        print(f'El bot tiene permiso "Gestionar Mensajes": {permissions.manage_messages}')
+                logger.warning("Canal predeterminado #%s no encontrado", DEFAULT_CHANNEL_NAME, extra={'guild_id': guild.id})
         
-        # Verificar scope applications.commands
+        # Permisos del bot solo donde hay canales vigilados; el miembro se pide a la API
+        # únicamente si no está en caché (modo ligero)
+        if guild.unavailable or not channel_router.has_guild(guild.id):
+            continue
         try:
-            bot_user = await guild.fetch_member(bot.user.id)
-            if bot_user:
-                print(f'Permisos integración de aplicaciones en {guild.name}: {bot_user.guild_permissions.use_application_commands}')
-        except Exception as e:
-            print(f'Error al verificar permisos en {guild.name}: {str(e)}')
+            bot_member = await get_bot_member(bot, guild)
+        except discord.HTTPException as e:
+            logger.warning("No se pudo obtener el miembro del bot: %s", e, extra={'guild_id': guild.id})
+            bot_member = None
+        if bot_member:
+            permissions = bot_member.guild_permissions
+            logger.info(
+                "Permisos del bot",
+                extra={
+                    'guild_id': guild.id,
+                    'manage_messages': permissions.manage_messages,
+                    'use_application_commands': permissions.use_application_commands,
+                },
+            )
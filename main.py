@@ -2,28 +2,89 @@
 Botardo - Bot de Discord para monitorear y eliminar mensajes connect+IP.
 Punto de entrada principal que inicializa el bot y carga todos los módulos.
 """
+import logging
+import sys
 import discord
-import traceback
 from discord.ext import commands
 
 # Imports de módulos locales
-from config import DISCORD_TOKEN
+from config import DISCORD_TOKEN, LEAN_MODE, MESSAGE_CACHE_SIZE, SHARD_WORKERS
 from commands import general, admin, faceit
 from events import ready, messages
+from utils.faceit_client import close_client
+from utils.match_store import close_match_store
+from utils.guild_store import load_channel_routes, close_guild_store
+from utils.elo_tracker import elo_tracker, close_tracker_store
+from utils.logging_setup import setup_logging
+from utils.command_tree import InstrumentedTree, record_command
+from utils.watchdog import watchdog
+from utils.moderation_queue import moderation_queue
+from utils.metrics import registry
+from utils.sharding import is_sharded, shard_options, shard_latencies, run_workers
+from utils.web_server import start_web_server, stop_web_server
 
-# Configurar intents para el bot
-intents = discord.Intents.default()
-intents.message_content = True  # Requerido para leer el contenido de los mensajes
+logger = logging.getLogger(__name__)
+
+def client_options():
+    """Intents y cachés del cliente. En modo ligero solo se reciben los eventos que usa el bot."""
+    if not LEAN_MODE:
+        intents = discord.Intents.default()
+        intents.message_content = True  # Requerido para leer el contenido de los mensajes
+        return {'intents': intents}
+
+    intents = discord.Intents.none()
+    intents.guilds = True          # Canales, roles y el miembro del propio bot
+    intents.guild_messages = True  # Mensajes y ediciones en servidores
+    intents.message_content = True
+    intents.voice_states = True    # /elos sin nicknames: miembros del canal de voz
+    # Solo se guardan en caché los miembros que están en canales de voz
+    member_cache_flags = discord.MemberCacheFlags.none()
+    member_cache_flags.voice = True
+    # La caché de mensajes de discord.py es una sola cola para todos los canales,
+    # así que no puede reservar sitio para los vigilados: las ediciones se moderan
+    # con on_raw_message_edit y la caché solo evita reconstruir los más recientes
+    return {
+        'intents': intents,
+        'member_cache_flags': member_cache_flags,
+        'chunk_guilds_at_startup': False,
+        'max_messages': MESSAGE_CACHE_SIZE or None,
+    }
+
+# Con SHARD_COUNT el bot reparte los servidores en varias conexiones al gateway
+_BotBase = commands.AutoShardedBot if is_sharded() else commands.Bot
+
+class Botardo(_BotBase):
+    """Bot principal. Prepara y libera los recursos compartidos."""
+
+    async def setup_hook(self):
+        # Cargar los canales vigilados antes de conectar al gateway
+        loaded = await load_channel_routes()
+        logger.info("Configuración cargada: %d canales vigilados", loaded)
+        # Métricas y servidor HTTP de salud/estado en este mismo bucle
+        watchdog.start()
+        await start_web_server(self)
+        # Seguimiento de ELO en segundo plano (empieza a consultar cuando el bot está listo)
+        elo_tracker.start(self)
+
+    async def close(self):
+        watchdog.stop()
+        await elo_tracker.stop()
+        # Terminar los borrados en curso antes de desconectar
+        await moderation_queue.drain()
+        await stop_web_server()
+        # Cerrar el pool de conexiones HTTP de FACEIT
+        await close_client()
+        await close_match_store()
+        await close_guild_store()
+        await close_tracker_store()
+        await super().close()
 
 # Inicializar el bot con un árbol de comandos para comandos slash
-bot = commands.Bot(command_prefix="!", intents=intents)
+bot = Botardo(command_prefix="!", tree_cls=InstrumentedTree, **client_options(), **shard_options())
 tree = bot.tree  # Árbol de comandos para slash commands
 
-# Verificar los módulos de comandos
-print("Módulos de comandos disponibles:")
-print(f"- general: {general}")
-print(f"- admin: {admin}")
-print(f"- faceit: {faceit}")
+registry.gauge_func('botardo_shard_latency_seconds', "Latencia del heartbeat de cada shard", ('shard',),
+                    lambda: [((shard_id,), latency) for shard_id, latency in shard_latencies(bot)])
 
 # Configurar el evento on_ready
 @bot.event
@@ -43,44 +104,40 @@ async def on_message_edit(before, after):
     """Evento que se ejecuta cuando se edita un mensaje."""
     await messages.on_message_edit(bot, before, after)
 
+# Configurar el evento on_raw_message_edit (ediciones de mensajes fuera de la caché)
+@bot.event
+async def on_raw_message_edit(payload):
+    """Evento que se ejecuta con cualquier edición, esté o no el mensaje en caché."""
+    await messages.on_raw_message_edit(bot, payload)
+
+# Registrar la latencia de los comandos slash completados
+@bot.event
+async def on_app_command_completion(interaction, command):
+    """Evento que se ejecuta cuando un comando slash termina sin errores."""
+    record_command(interaction, 'ok')
+
 # Cargar todos los módulos de comandos
 def setup_command_modules():
     """Inicializa y configura todos los módulos de comandos."""
-    try:
-        print("Cargando módulo general...")
-        general.setup(bot, tree)
-        print("✓ Módulo general cargado")
-    except Exception as e:
-        print(f"✗ Error al cargar módulo general: {e}")
-        traceback.print_exc()
-    
-    try:
-        print("Cargando módulo admin...")
-        admin.setup(bot, tree)
-        print("✓ Módulo admin cargado")
-    except Exception as e:
-        print(f"✗ Error al cargar módulo admin: {e}")
-        traceback.print_exc()
-    
-    try:
-        print("Cargando módulo faceit...")
-        faceit.setup(bot, tree)
-        print("✓ Módulo faceit cargado")
-    except Exception as e:
-        print(f"✗ Error al cargar módulo faceit: {e}")
-        traceback.print_exc()
+    for name, module in (("general", general), ("admin", admin), ("faceit", faceit)):
+        try:
+            module.setup(bot, tree)
+            logger.info("Módulo %s cargado", name)
+        except Exception:
+            logger.exception("Error al cargar módulo %s", name)
     
     # Listar comandos registrados en el árbol de comandos después de la carga
-    print("\nComandos registrados actualmente en el árbol:")
-    for cmd in tree.get_commands():
-        print(f"- /{cmd.name}")
+    logger.info("Comandos registrados en el árbol", extra={'commands': [cmd.name for cmd in tree.get_commands()]})
 
 if __name__ == "__main__":
-    print("Iniciando bot...")
-    print("Cargando módulos de comandos...")
+    # Logs estructurados con escritura en segundo plano (también para discord.py)
+    setup_logging()
+    if SHARD_WORKERS > 1:
+        # Proceso supervisor: lanza un proceso por rango de shards
+        sys.exit(run_workers(__file__))
+    logger.info("Iniciando bot")
     setup_command_modules()
-    print("Módulos de comandos procesados.")
-    print("Conectando con Discord...")
+    logger.info("Conectando con Discord")
     
-    # Ejecutar el bot
-    bot.run(DISCORD_TOKEN)
+    # Ejecutar el bot; log_handler=None conserva la configuración de setup_logging
+    bot.run(DISCORD_TOKEN, log_handler=None)
@@ -0,0 +1 @@
+"""Herramientas de desarrollo: servidores stub, comprobaciones y benchmarks."""
@@ -0,0 +1,246 @@
+"""
+Benchmark de latencia de los comandos slash de FACEIT.
+
+Ejecuta los manejadores reales de /elo, /elos, /stats y /recientes contra el stub
+local de FACEIT, con una interacción de Discord simulada que registra cuándo
+se llama a defer, a followup.send y a cada edición del mensaje (respuesta
+progresiva de /recientes). Cada comando se lanza N veces con la
+concurrencia indicada y se informa de p50/p95/p99, rendimiento (comandos/s)
+hasta la primera respuesta visible, ediciones por comando y peticiones hechas
+al stub por endpoint.
+
+Uso:
+    python -m tools.bench_commands --requests 200 --concurrency 20 --latency 0.05
+    python -m tools.bench_commands --error-rate 0.05 --rate-limit-rate 0.1 --save base.json
+    python -m tools.bench_commands --baseline base.json
+"""
+import os
+import tempfile
+
+# Antes de importar config: clave ficticia y almacén de partidas temporal
+os.environ.setdefault('FACEIT_API_KEY', 'stub')
+os.environ.setdefault('MATCH_STORE_PATH', os.path.join(tempfile.mkdtemp(prefix='botardo-bench-'), 'matches.sqlite3'))
+
+import argparse
+import asyncio
+import json
+import time
+from collections import Counter
+from types import SimpleNamespace
+import discord
+from discord import app_commands
+from config import FACEIT_RATE_LIMIT, FACEIT_RATE_BURST
+from commands import faceit
+from tools.faceit_stub import StubConfig, start_stub
+from utils import faceit_client
+from utils.match_store import close_match_store
+from utils.rate_limiter import RequestScheduler
+
+COMMANDS = ('elo', 'elos', 'stats', 'recientes')
+
+
+class FakeResponse:
+    """Imita interaction.response: registra el momento del defer o del primer mensaje."""
+
+    def __init__(self, interaction):
+        self._interaction = interaction
+        self._done = False
+
+    def is_done(self):
+        return self._done
+
+    async def defer(self, *, thinking=False, ephemeral=False):
+        self._done = True
+        self._interaction.mark('defer')
+
+    async def send_message(self, content=None, *, embed=None, ephemeral=False, **kwargs):
+        self._done = True
+        self._interaction.mark('send', content, embed)
+
+
+class FakeMessage:
+    """Mensaje enviado por followup.send(wait=True) que registra sus ediciones."""
+
+    def __init__(self, interaction):
+        self._interaction = interaction
+        self.id = len(interaction.events)
+
+    async def edit(self, *, content=None, embed=None, **kwargs):
+        self._interaction.mark('edit', content, embed)
+        return self
+
+
+class FakeFollowup:
+    """Imita interaction.followup (un webhook) registrando cada envío."""
+
+    def __init__(self, interaction):
+        self._interaction = interaction
+
+    async def send(self, content=None, *, embed=None, ephemeral=False, wait=False, **kwargs):
+        self._interaction.mark('followup', content, embed)
+        return FakeMessage(self._interaction)
+
+
+class FakeInteraction:
+    """Interacción simulada con marcas de tiempo relativas a su creación."""
+
+    def __init__(self, command_name):
+        self.command = SimpleNamespace(name=command_name, qualified_name=command_name)
+        self.extras = {}
+        self.user = SimpleNamespace(id=1, name="bench", mention="<@1>")
+        self.guild = None
+        self.channel = None
+        self.response = FakeResponse(self)
+        self.followup = FakeFollowup(self)
+        self.events = []  # (tipo, segundos desde la creación, contenido, embed)
+        self._start = time.perf_counter()
+
+    def mark(self, kind, content=None, embed=None):
+        self.events.append((kind, time.perf_counter() - self._start, content, embed))
+
+    def first(self, kind):
+        return next((elapsed for event, elapsed, _, _ in self.events if event == kind), None)
+
+    def count(self, kind):
+        return sum(1 for event, _, _, _ in self.events if event == kind)
+
+    @property
+    def failed(self):
+        """Respuesta de error: mensaje de texto que empieza por ❌ o ⚠️."""
+        return any(content and content.startswith(("❌", "⚠️")) for _, _, content, _ in self.events)
+
+
+def percentile(values, fraction):
+    """Percentil por el método del rango más cercano sobre una lista ordenada."""
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, max(0, int(round(fraction * len(values) + 0.5)) - 1))
+    return values[index]
+
+def _build_tree():
+    client = discord.Client(intents=discord.Intents.none())
+    tree = app_commands.CommandTree(client)
+    faceit.setup(client, tree)
+    return tree
+
+def _arguments(command, index, players, window):
+    nickname = f"bench{index % players}"
+    if command == 'elos':
+        # Un lobby de 10 jugadores que se solapa con los de otras invocaciones
+        return {'nicknames': " ".join(f"bench{(index + offset) % players}" for offset in range(10))}
+    if command == 'recientes':
+        return {'nickname': nickname, 'partidas': window}
+    return {'nickname': nickname}
+
+
+async def run_command(tree, command, requests, concurrency, players, window):
+    """Lanza `requests` invocaciones del comando y devuelve las interacciones y el tiempo total."""
+    callback = tree.get_command(command).callback
+    semaphore = asyncio.Semaphore(concurrency)
+    interactions = []
+
+    async def invoke(index):
+        async with semaphore:
+            interaction = FakeInteraction(command)
+            interactions.append(interaction)
+            await callback(interaction, **_arguments(command, index, players, window))
+            interaction.mark('done')
+
+    start = time.perf_counter()
+    await asyncio.gather(*[invoke(index) for index in range(requests)])
+    return interactions, time.perf_counter() - start
+
+def summarize(interactions, wall, upstream):
+    total = sorted(interaction.first('done') for interaction in interactions)
+    first_reply = sorted(
+        interaction.first('followup') or interaction.first('send') or interaction.first('done')
+        for interaction in interactions
+    )
+    defer = sorted(interaction.first('defer') or 0.0 for interaction in interactions)
+    return {
+        'requests': len(interactions),
+        'errors': sum(1 for interaction in interactions if interaction.failed),
+        'throughput': len(interactions) / wall if wall else 0.0,
+        'defer_p95_ms': percentile(defer, 0.95) * 1000,
+        'reply_p50_ms': percentile(first_reply, 0.50) * 1000,
+        'edits': sum(interaction.count('edit') for interaction in interactions) / len(interactions),
+        'p50_ms': percentile(total, 0.50) * 1000,
+        'p95_ms': percentile(total, 0.95) * 1000,
+        'p99_ms': percentile(total, 0.99) * 1000,
+        'upstream': dict(upstream),
+    }
+
+def print_report(results, baseline=None):
+    print(f"{'comando':<10} {'n':>5} {'err':>4} {'cmd/s':>8} {'defer95':>8} {'1ª resp':>8} {'p50':>8} {'p95':>8} "
+          f"{'p99':>8} {'edic.':>6}  peticiones")
+    for command, result in results.items():
+        upstream = ", ".join(f"{endpoint}={count}" for endpoint, count in sorted(result['upstream'].items()))
+        print(f"{command:<10} {result['requests']:>5} {result['errors']:>4} {result['throughput']:>8.1f} "
+              f"{result['defer_p95_ms']:>8.1f} {result['reply_p50_ms']:>8.1f} {result['p50_ms']:>8.1f} "
+              f"{result['p95_ms']:>8.1f} {result['p99_ms']:>8.1f} {result.get('edits', 0.0):>6.1f}  {upstream}")
+        previous = (baseline or {}).get(command)
+        if previous:
+            deltas = "  ".join(
+                f"{key[:-3]} {result[key] - previous[key]:+.1f} ms"
+                for key in ('reply_p50_ms', 'p50_ms', 'p95_ms', 'p99_ms') if key in previous
+            )
+            print(f"{'':<10} vs base: {deltas}  cmd/s {result['throughput'] - previous['throughput']:+.1f}")
+
+
+async def run_benchmark(args):
+    config = StubConfig(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                        rate_limit_rate=args.rate_limit_rate, retry_after=args.retry_after, seed=1)
+    runner, base_url, app = await start_stub(config)
+    scheduler = RequestScheduler(rate=args.rate, burst=args.burst)
+    faceit_client._client = faceit_client.FaceitClient(api_key="stub", base_url=base_url, scheduler=scheduler)
+    tree = _build_tree()
+    results = {}
+    try:
+        for command in args.commands:
+            before = Counter(app['requests'])
+            interactions, wall = await run_command(tree, command, args.requests, args.concurrency,
+                                                   args.players, args.window)
+            upstream = Counter(app['requests'])
+            upstream.subtract(before)
+            results[command] = summarize(interactions, wall, +upstream)
+    finally:
+        await faceit_client.close_client()
+        await close_match_store()
+        await runner.cleanup()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de latencia de los comandos de FACEIT")
+    parser.add_argument('--commands', type=lambda value: value.split(','), default=list(COMMANDS),
+                        help="Comandos separados por comas (elo,elos,stats,recientes)")
+    parser.add_argument('--requests', type=int, default=100, help="Invocaciones por comando")
+    parser.add_argument('--concurrency', type=int, default=10, help="Invocaciones simultáneas")
+    parser.add_argument('--players', type=int, default=20,
+                        help="Jugadores distintos (igual a --requests para medir sin caché)")
+    parser.add_argument('--window', type=int, default=20, help="Partidas de /recientes")
+    parser.add_argument('--latency', type=float, default=0.05, help="Latencia base del stub (s)")
+    parser.add_argument('--jitter', type=float, default=0.02, help="Latencia aleatoria adicional del stub (s)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fracción de respuestas 503")
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help="Fracción de respuestas 429")
+    parser.add_argument('--retry-after', type=float, default=1.0, help="Retry-After de los 429 (s)")
+    parser.add_argument('--rate', type=float, default=FACEIT_RATE_LIMIT, help="Peticiones/s del planificador")
+    parser.add_argument('--burst', type=int, default=FACEIT_RATE_BURST, help="Ráfaga del planificador")
+    parser.add_argument('--save', help="Guardar los resultados en JSON (línea base)")
+    parser.add_argument('--baseline', help="Comparar con resultados guardados con --save")
+    args = parser.parse_args()
+    unknown = set(args.commands) - set(COMMANDS)
+    if unknown:
+        parser.error(f"Comandos desconocidos: {', '.join(sorted(unknown))}")
+
+    results = asyncio.run(run_benchmark(args))
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as baseline_file:
+            baseline = json.load(baseline_file)
+    print_report(results, baseline)
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as output:
+            json.dump(results, output, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Micro-benchmark del detector de IPs sobre un corpus de líneas de chat.
+
+Mide mensajes por segundo del detector (utils.ip_detector) frente al patrón
+original de una sola expresión regular, para el corpus completo, solo los
+mensajes limpios y pegados largos. También informa de los aciertos del
+detector contra las etiquetas del corpus.
+
+Uso:
+    python -m tools.bench_ip_detector [--corpus tools/corpus/chat_lines.tsv] [--seconds 1]
+"""
+import argparse
+import os
+import re
+import time
+from utils.ip_detector import detect
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(__file__), 'corpus', 'chat_lines.tsv')
+
+# Patrón anterior (config.IP_PATTERN) como referencia
+LEGACY_PATTERN = re.compile(r'((?:\d{1,3}\.){3}\d{1,3})')
+
+
+def load_corpus(path=DEFAULT_CORPUS):
+    """Lee el corpus etiquetado: lista de (etiqueta bool, mensaje)."""
+    lines = []
+    with open(path, encoding='utf-8') as corpus:
+        for line in corpus:
+            line = line.rstrip('\n')
+            if not line or line.startswith('#'):
+                continue
+            label, _, message = line.partition('\t')
+            lines.append((label == '1', message))
+    return lines
+
+def _throughput(fn, messages, seconds):
+    """Mensajes por segundo procesando `messages` en bucle durante ~`seconds`."""
+    processed = 0
+    start = time.perf_counter()
+    deadline = start + seconds
+    while True:
+        for message in messages:
+            fn(message)
+        processed += len(messages)
+        now = time.perf_counter()
+        if now >= deadline:
+            return processed / (now - start)
+
+def accuracy(lines):
+    """Devuelve (falsos positivos, falsos negativos, fallos) del detector."""
+    false_positives = []
+    false_negatives = []
+    for label, message in lines:
+        detected = detect(message) is not None
+        if detected and not label:
+            false_positives.append(message)
+        elif label and not detected:
+            false_negatives.append(message)
+    return false_positives, false_negatives
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark del detector de IPs")
+    parser.add_argument('--corpus', default=DEFAULT_CORPUS)
+    parser.add_argument('--seconds', type=float, default=1.0, help="Duración de cada medición")
+    args = parser.parse_args()
+
+    lines = load_corpus(args.corpus)
+    messages = [message for _, message in lines]
+    clean = [message for label, message in lines if not label]
+    long_pastes = [" ".join(messages) * 20, "1.1." * 5000, "a:" * 5000]
+
+    suites = [("corpus completo", messages), ("solo mensajes limpios", clean), ("pegados largos", long_pastes)]
+    print(f"Corpus: {len(lines)} líneas ({len(lines) - len(clean)} con IP)")
+    print(f"{'Conjunto':<24}{'detector (msg/s)':>20}{'regex anterior (msg/s)':>26}")
+    for name, suite in suites:
+        current = _throughput(detect, suite, args.seconds)
+        legacy = _throughput(LEGACY_PATTERN.search, suite, args.seconds)
+        print(f"{name:<24}{current:>20,.0f}{legacy:>26,.0f}")
+
+    false_positives, false_negatives = accuracy(lines)
+    print(f"\nFalsos positivos: {len(false_positives)}  Falsos negativos: {len(false_negatives)}")
+    for message in false_positives:
+        print(f"  FP: {message}")
+    for message in false_negatives:
+        print(f"  FN: {message}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""
+Benchmark de la moderación de mensajes (replay de tráfico).
+
+Pasa un flujo sintético (o grabado) de mensajes y ediciones por los manejadores
+reales events.messages.on_message y on_message_edit, con canales y borrados
+simulados. Mide mensajes por segundo, latencia por mensaje del manejador,
+falsos positivos/negativos de la detección de IPs y memoria, para varios
+tamaños de tráfico.
+
+Uso:
+    python -m tools.bench_moderation --messages 10000,100000,1000000
+    python -m tools.bench_moderation --ip-rate 0.05 --edit-rate 0.2 --channels 200
+    python -m tools.bench_moderation --replay grabacion.jsonl
+
+Formato de --replay: una línea JSON por evento con "type" ("create" o
+"edit"), "channel", "content", "label" (1 si contiene IP) y, en ediciones,
+"before".
+"""
+import argparse
+import asyncio
+import json
+import random
+import resource
+import time
+import tracemalloc
+from array import array
+from types import SimpleNamespace
+from events import messages
+from tools.bench_ip_detector import DEFAULT_CORPUS, load_corpus
+from utils.channel_router import channel_router
+from utils.moderation_queue import ModerationQueue
+
+GUILD_ID = 1
+RESERVOIR_SIZE = 100000  # Latencias guardadas para los percentiles (muestreo de reservorio)
+
+
+class Tally:
+    """Contadores del resultado: mensajes eliminados según su etiqueta."""
+
+    def __init__(self):
+        self.deleted_positive = 0
+        self.deleted_negative = 0
+        self.bulk_calls = 0
+        self.single_calls = 0
+        self.warnings = 0
+
+    def deleted(self, message):
+        if message.label:
+            self.deleted_positive += 1
+        else:
+            self.deleted_negative += 1
+
+
+class FakeChannel:
+    """Canal con los métodos que usa la cola de moderación."""
+
+    def __init__(self, channel_id, tally):
+        self.id = channel_id
+        self.name = f"canal-{channel_id}"
+        self.tally = tally
+
+    async def delete_messages(self, messages_to_delete, *, reason=None):
+        self.tally.bulk_calls += 1
+        for message in messages_to_delete:
+            self.tally.deleted(message)
+
+    async def send(self, content=None, **kwargs):
+        self.tally.warnings += 1
+
+
+class FakeMessage:
+    __slots__ = ('id', 'content', 'channel', 'author', 'guild', 'label')
+
+    def __init__(self, message_id, content, channel, author, label):
+        self.id = message_id
+        self.content = content
+        self.channel = channel
+        self.author = author
+        self.guild = _GUILD
+        self.label = label
+
+    async def delete(self):
+        self.channel.tally.single_calls += 1
+        self.channel.tally.deleted(self)
+
+
+_GUILD = SimpleNamespace(id=GUILD_ID)
+
+
+def synthetic_events(count, lines, ip_rate, edit_rate, channels, unwatched_rate, seed):
+    """Genera (tipo, canal, contenido, etiqueta, contenido anterior) al vuelo."""
+    rng = random.Random(seed)
+    positives = [message for label, message in lines if label]
+    negatives = [message for label, message in lines if not label]
+    for _ in range(count):
+        label = rng.random() < ip_rate
+        content = rng.choice(positives if label else negatives)
+        if rng.random() < unwatched_rate:
+            channel = channels + rng.randrange(channels)  # canal no vigilado
+        else:
+            channel = rng.randrange(channels)
+        if rng.random() < edit_rate:
+            yield 'edit', channel, content, label, rng.choice(negatives)
+        else:
+            yield 'create', channel, content, label, None
+
+def replay_events(path):
+    with open(path, encoding='utf-8') as replay:
+        for line in replay:
+            if line.strip():
+                event = json.loads(line)
+                yield (event['type'], int(event['channel']), event['content'], bool(event.get('label')),
+                       event.get('before'))
+
+
+async def run_replay(events, channels, window, yield_every):
+    """Procesa los eventos y devuelve las métricas de la ejecución."""
+    tally = Tally()
+    for channel_id in range(channels):
+        channel_router.add(GUILD_ID, channel_id)
+    # Cola nueva en cada ejecución: los lotes guardan referencias a los canales
+    moderation_queue = messages.moderation_queue = ModerationQueue(window)
+    # Los ids de mensaje empiezan en 0 en cada ejecución: sin vaciar los
+    # veredictos, la segunda daría por revisados mensajes que no lo están
+    messages._verdicts.clear()
+    fake_channels = {}
+    bot = SimpleNamespace(user=SimpleNamespace(id=0))
+    author = SimpleNamespace(id=42, mention="<@42>")
+    reservoir = array('d')
+    rng = random.Random(0)
+    positives_watched = negatives_watched = processed = 0
+
+    start = time.perf_counter()
+    for index, (kind, channel_id, content, label, before_content) in enumerate(events):
+        channel = fake_channels.get(channel_id)
+        if channel is None:
+            channel = fake_channels[channel_id] = FakeChannel(channel_id, tally)
+        message = FakeMessage(index, content, channel, author, label)
+        if channel_id < channels:
+            if label:
+                positives_watched += 1
+            else:
+                negatives_watched += 1
+
+        handler_start = time.perf_counter()
+        if kind == 'edit':
+            before = FakeMessage(index, before_content, channel, author, False)
+            await messages.on_message_edit(bot, before, message)
+        else:
+            await messages.on_message(bot, message)
+        elapsed = time.perf_counter() - handler_start
+
+        processed += 1
+        if len(reservoir) < RESERVOIR_SIZE:
+            reservoir.append(elapsed)
+        else:
+            slot = rng.randrange(processed)
+            if slot < RESERVOIR_SIZE:
+                reservoir[slot] = elapsed
+        if processed % yield_every == 0:
+            await asyncio.sleep(0)  # Dejar que la cola de moderación procese lotes
+    ingest = time.perf_counter() - start
+    await moderation_queue.drain()
+    total = time.perf_counter() - start
+
+    for channel_id in range(channels):
+        channel_router.remove(channel_id)
+    latencies = sorted(reservoir)
+    return {
+        'messages': processed,
+        'ingest_s': ingest,
+        'total_s': total,
+        'msgs_per_s': processed / ingest if ingest else 0.0,
+        'p50_us': _percentile(latencies, 0.50) * 1e6,
+        'p99_us': _percentile(latencies, 0.99) * 1e6,
+        'max_us': (latencies[-1] if latencies else 0.0) * 1e6,
+        'false_positives': tally.deleted_negative,
+        'false_negatives': positives_watched - tally.deleted_positive,
+        'positives': positives_watched,
+        'negatives': negatives_watched,
+        'bulk_calls': tally.bulk_calls,
+        'single_calls': tally.single_calls,
+        'warnings': tally.warnings,
+    }
+
+def _percentile(values, fraction):
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+def _max_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la moderación de mensajes")
+    parser.add_argument('--messages', type=lambda value: [int(size) for size in value.split(',')],
+                        default=[10000, 100000], help="Tamaños del flujo separados por comas")
+    parser.add_argument('--corpus', default=DEFAULT_CORPUS, help="Corpus etiquetado para el flujo sintético")
+    parser.add_argument('--replay', help="Flujo grabado en JSONL (sustituye al sintético)")
+    parser.add_argument('--ip-rate', type=float, default=0.01, help="Fracción de mensajes con IP")
+    parser.add_argument('--edit-rate', type=float, default=0.1, help="Fracción de eventos que son ediciones")
+    parser.add_argument('--channels', type=int, default=50, help="Canales vigilados")
+    parser.add_argument('--unwatched-rate', type=float, default=0.3, help="Fracción de tráfico en canales no vigilados")
+    parser.add_argument('--window', type=float, default=0.05, help="Ventana de agrupación de la cola (s)")
+    parser.add_argument('--yield-every', type=int, default=100, help="Eventos entre cesiones al bucle")
+    parser.add_argument('--tracemalloc', action='store_true', help="Medir el pico de memoria de Python (más lento)")
+    args = parser.parse_args()
+
+    lines = load_corpus(args.corpus)
+    runs = [None] if args.replay else args.messages
+    print(f"{'mensajes':>10} {'msg/s':>10} {'p50 µs':>8} {'p99 µs':>8} {'max µs':>9} {'FP':>5} {'FN':>5} "
+          f"{'borrados':>9} {'masivos':>8} {'avisos':>7} {'RSS MB':>8} {'pico MB':>8}")
+    for size in runs:
+        if args.replay:
+            events = replay_events(args.replay)
+        else:
+            events = synthetic_events(size, lines, args.ip_rate, args.edit_rate, args.channels,
+                                      args.unwatched_rate, seed=size)
+        if args.tracemalloc:
+            tracemalloc.start()
+        result = asyncio.run(run_replay(events, args.channels, args.window, args.yield_every))
+        peak = ""
+        if args.tracemalloc:
+            peak = f"{tracemalloc.get_traced_memory()[1] / 2**20:.1f}"
+            tracemalloc.stop()
+        deleted = result['positives'] - result['false_negatives'] + result['false_positives']
+        print(f"{result['messages']:>10,} {result['msgs_per_s']:>10,.0f} {result['p50_us']:>8.1f} "
+              f"{result['p99_us']:>8.1f} {result['max_us']:>9.1f} {result['false_positives']:>5} "
+              f"{result['false_negatives']:>5} {deleted:>9,} {result['bulk_calls']:>8} {result['warnings']:>7} "
+              f"{_max_rss_mb():>8.1f} {peak:>8}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Comprobación de aislamiento de latencia del cliente FACEIT.
+
+Arranca el stub local, lanza una consulta muy lenta y, en paralelo, muchas
+consultas rápidas. Verifica que las rápidas terminan con su propia latencia
+y que el bucle de eventos no se queda bloqueado mientras tanto.
+
+Uso:
+    python -m tools.check_isolation
+"""
+import argparse
+import asyncio
+import sys
+import time
+from tools.faceit_stub import StubConfig, start_stub
+from utils.faceit_client import FaceitClient
+from utils.rate_limiter import RequestScheduler
+
+
+async def _measure_loop_lag(stop, samples, interval=0.01):
+    """Mide cuánto se retrasa el bucle respecto a un sleep de `interval`."""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(interval)
+        samples.append(loop.time() - start - interval)
+
+async def _timed(coro):
+    start = time.perf_counter()
+    response = await coro
+    return time.perf_counter() - start, response.status
+
+async def run_check(fast_requests, latency, slow_latency):
+    config = StubConfig(latency=latency, slow_players={"lento": slow_latency})
+    runner, base_url, _ = await start_stub(config)
+    # Sin límite efectivo de peticiones: aquí solo se mide el aislamiento de latencia
+    scheduler = RequestScheduler(rate=10000, burst=10000)
+    client = FaceitClient(api_key="stub", base_url=base_url, scheduler=scheduler)
+    lag_samples = []
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(_measure_loop_lag(stop, lag_samples))
+    try:
+        slow_task = asyncio.create_task(_timed(client.get_player("lento")))
+        await asyncio.sleep(0.05)  # La consulta lenta ya está en vuelo
+        fast = await asyncio.gather(*[
+            _timed(client.get_player(f"jugador{i}")) for i in range(fast_requests)
+        ])
+        slow_elapsed, _ = await slow_task
+    finally:
+        stop.set()
+        await lag_task
+        await client.close()
+        await runner.cleanup()
+
+    fast_times = sorted(elapsed for elapsed, _ in fast)
+    max_lag = max(lag_samples) if lag_samples else 0.0
+    print(f"Consulta lenta: {slow_elapsed:.2f}s")
+    print(f"Consultas rápidas: {len(fast_times)}, mediana {fast_times[len(fast_times) // 2] * 1000:.1f} ms, "
+          f"máximo {fast_times[-1] * 1000:.1f} ms")
+    print(f"Retraso máximo del bucle de eventos: {max_lag * 1000:.1f} ms")
+    return fast_times[-1] < slow_latency / 2 and max_lag < 0.1
+
+def main():
+    parser = argparse.ArgumentParser(description="Comprueba el aislamiento de latencia del cliente FACEIT")
+    parser.add_argument('--fast', type=int, default=30, help="Número de consultas rápidas")
+    parser.add_argument('--latency', type=float, default=0.05, help="Latencia de las consultas rápidas")
+    parser.add_argument('--slow-latency', type=float, default=3.0, help="Latencia de la consulta lenta")
+    args = parser.parse_args()
+    ok = asyncio.run(run_check(args.fast, args.latency, args.slow_latency))
+    print("✓ Aislamiento correcto" if ok else "✗ Las consultas rápidas se vieron afectadas")
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
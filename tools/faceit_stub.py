@@ -0,0 +1,265 @@
+"""
+Servidor stub local de la API de FACEIT.
+Imita los endpoints que usa el bot (/players, /players/{id},
+/players/{id}/stats/cs2, /players/{id}/history y /matches/{id}/stats) con
+datos deterministas y latencia configurable, para probar el bot sin tocar el servicio real.
+También puede inyectar errores 5xx y respuestas 429 con Retry-After en una
+fracción de las peticiones.
+
+Uso:
+    python -m tools.faceit_stub --port 8081 --latency 0.05 --slow lento:5
+    python -m tools.faceit_stub --error-rate 0.05 --rate-limit-rate 0.1 --retry-after 1
+    python -m tools.faceit_stub --elo-period 60   # el ELO cambia cada minuto
+
+y arrancar el bot con FACEIT_API_URL=http://127.0.0.1:8081/data/v4
+"""
+import argparse
+import asyncio
+import hashlib
+import random
+import time
+from collections import Counter
+from aiohttp import web
+
+BASE_PATH = "/data/v4"
+MAPS = ["de_mirage", "de_inferno", "de_nuke", "de_ancient", "de_anubis", "de_vertigo", "de_dust2"]
+HISTORY_SIZE = 200  # Partidas que tiene cada jugador del stub
+
+
+class StubConfig:
+    """Parámetros de comportamiento del stub."""
+
+    def __init__(self, latency=0.0, jitter=0.0, slow_players=None, history_size=HISTORY_SIZE,
+                 error_rate=0.0, rate_limit_rate=0.0, retry_after=1.0, seed=None, elo_period=0.0):
+        self.latency = latency
+        self.jitter = jitter
+        # nickname (en minúsculas) -> latencia en segundos
+        self.slow_players = {k.lower(): v for k, v in (slow_players or {}).items()}
+        self.history_size = history_size
+        # Fracción de peticiones que responden 503 y 429 (con Retry-After en segundos)
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        # Cada cuántos segundos varía el ELO de los jugadores (0 = fijo)
+        self.elo_period = elo_period
+        self.started_at = int(time.time())
+
+
+def _seed(*parts):
+    """Semilla determinista a partir de cadenas."""
+    digest = hashlib.sha1(":".join(parts).encode()).hexdigest()
+    return int(digest[:12], 16)
+
+def player_id_for(nickname):
+    return f"stub-{nickname.lower()}"
+
+def nickname_for(player_id):
+    return player_id[len("stub-"):] if player_id.startswith("stub-") else player_id
+
+def match_id_for(player_id, index):
+    return f"1-{player_id}-{index}"
+
+def _player_from_match(match_id):
+    """Extrae el player_id propietario de un match_id generado por el stub."""
+    _, rest = match_id.split("-", 1)
+    player_id, _ = rest.rsplit("-", 1)
+    return player_id
+
+
+async def _simulate_latency(request, nickname=None):
+    config = request.app['config']
+    delay = config.latency
+    if nickname is not None and nickname.lower() in config.slow_players:
+        delay = config.slow_players[nickname.lower()]
+    if config.jitter:
+        delay += random.uniform(0, config.jitter)
+    if delay > 0:
+        await asyncio.sleep(delay)
+
+def _count(request, endpoint):
+    request.app['requests'][endpoint] += 1
+
+
+@web.middleware
+async def inject_failures(request, handler):
+    """Sustituye una fracción de las respuestas por 429 o 503 según la configuración."""
+    config = request.app['config']
+    roll = config.rng.random()
+    if roll < config.rate_limit_rate:
+        request.app['requests']['status_429'] += 1
+        return web.json_response({"errors": [{"message": "too many requests"}]}, status=429,
+                                 headers={"Retry-After": f"{config.retry_after:g}"})
+    if roll < config.rate_limit_rate + config.error_rate:
+        request.app['requests']['status_503'] += 1
+        await _simulate_latency(request)
+        return web.json_response({"errors": [{"message": "service unavailable"}]}, status=503)
+    return await handler(request)
+
+
+def _player_body(config, nickname):
+    rng = random.Random(_seed(nickname.lower()))
+    elo = rng.randint(500, 3200)
+    if config.elo_period:
+        # Variación determinista por periodo para probar el seguimiento de ELO
+        period = int(time.time() // config.elo_period)
+        elo = max(100, elo + random.Random(_seed(nickname.lower(), str(period))).randint(-50, 50))
+    level = min(10, max(1, (elo - 500) // 200 + 1))
+    return {
+        "player_id": player_id_for(nickname),
+        "nickname": nickname,
+        "avatar": "",
+        "games": {"cs2": {"faceit_elo": elo, "skill_level": level}},
+    }
+
+async def players(request):
+    _count(request, 'players')
+    nickname = request.query.get('nickname', '')
+    await _simulate_latency(request, nickname)
+    if not nickname or nickname.lower().startswith('noexiste'):
+        return web.json_response({"errors": [{"message": "not found"}]}, status=404)
+    return web.json_response(_player_body(request.app['config'], nickname))
+
+async def player(request):
+    _count(request, 'player')
+    nickname = nickname_for(request.match_info['player_id'])
+    await _simulate_latency(request, nickname)
+    if nickname.lower().startswith('noexiste'):
+        return web.json_response({"errors": [{"message": "not found"}]}, status=404)
+    return web.json_response(_player_body(request.app['config'], nickname))
+
+async def player_stats(request):
+    _count(request, 'player_stats')
+    player_id = request.match_info['player_id']
+    await _simulate_latency(request, nickname_for(player_id))
+    rng = random.Random(_seed(player_id, 'lifetime'))
+    matches = rng.randint(100, 3000)
+    wins = int(matches * rng.uniform(0.4, 0.6))
+    return web.json_response({
+        "player_id": player_id,
+        "lifetime": {
+            "Matches": str(matches),
+            "Wins": str(wins),
+            "Win Rate %": str(round(wins * 100 / matches)),
+            "Average K/D Ratio": f"{rng.uniform(0.7, 1.5):.2f}",
+            "Average Headshots %": str(rng.randint(30, 65)),
+            "Average Kills": f"{rng.uniform(12, 24):.1f}",
+        },
+    })
+
+async def player_history(request):
+    _count(request, 'history')
+    config = request.app['config']
+    player_id = request.match_info['player_id']
+    await _simulate_latency(request, nickname_for(player_id))
+    offset = int(request.query.get('offset', 0))
+    limit = min(int(request.query.get('limit', 20)), 100)
+    since = request.query.get('from')
+    items = []
+    for index in range(offset, min(offset + limit, config.history_size)):
+        finished_at = config.started_at - index * 2400
+        if since is not None and finished_at - 2100 < int(since):
+            break
+        items.append({
+            "match_id": match_id_for(player_id, index),
+            "game_id": "cs2",
+            "status": "FINISHED",
+            "started_at": finished_at - 2100,
+            "finished_at": finished_at,
+        })
+    return web.json_response({"items": items, "start": offset, "end": offset + len(items)})
+
+async def match_stats(request):
+    _count(request, 'match_stats')
+    match_id = request.match_info['match_id']
+    try:
+        owner = _player_from_match(match_id)
+    except ValueError:
+        return web.json_response({"errors": [{"message": "not found"}]}, status=404)
+    await _simulate_latency(request, nickname_for(owner))
+    rng = random.Random(_seed(match_id))
+    winner = rng.randint(0, 1)
+    teams = []
+    for team_index in range(2):
+        team_players = []
+        for slot in range(5):
+            player_id = owner if (team_index == 0 and slot == 0) else f"stub-relleno{_seed(match_id, str(team_index), str(slot)) % 10000}"
+            kills = rng.randint(5, 35)
+            team_players.append({
+                "player_id": player_id,
+                "nickname": nickname_for(player_id),
+                "player_stats": {
+                    "Kills": str(kills),
+                    "Deaths": str(rng.randint(8, 28)),
+                    "Headshots": str(rng.randint(0, kills)),
+                    "Result": "1" if team_index == winner else "0",
+                },
+            })
+        teams.append({
+            "team_id": f"team{team_index}",
+            "team_stats": {"Team Win": "1" if team_index == winner else "0"},
+            "players": team_players,
+        })
+    return web.json_response({
+        "rounds": [{
+            "match_id": match_id,
+            "round_stats": {"Map": rng.choice(MAPS), "Winner": f"team{winner}"},
+            "teams": teams,
+        }]
+    })
+
+
+def create_app(config=None):
+    """Crea la aplicación aiohttp del stub."""
+    app = web.Application(middlewares=[inject_failures])
+    app['config'] = config or StubConfig()
+    app['requests'] = Counter()
+    app.router.add_get(f"{BASE_PATH}/players", players)
+    app.router.add_get(f"{BASE_PATH}/players/{{player_id}}", player)
+    app.router.add_get(f"{BASE_PATH}/players/{{player_id}}/stats/cs2", player_stats)
+    app.router.add_get(f"{BASE_PATH}/players/{{player_id}}/history", player_history)
+    app.router.add_get(f"{BASE_PATH}/matches/{{match_id}}/stats", match_stats)
+    return app
+
+async def start_stub(config=None, host="127.0.0.1", port=0):
+    """Arranca el stub dentro del bucle actual.
+
+    Devuelve (runner, base_url, app); llamar a runner.cleanup() para pararlo.
+    """
+    app = create_app(config)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://{host}:{bound_port}{BASE_PATH}", app
+
+
+def _parse_slow(values):
+    slow = {}
+    for value in values or []:
+        nickname, _, delay = value.partition(':')
+        slow[nickname] = float(delay or 5)
+    return slow
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor stub de la API de FACEIT")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--latency', type=float, default=0.0, help="Latencia base en segundos")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Latencia aleatoria adicional máxima")
+    parser.add_argument('--slow', action='append', metavar='NICK:SEGUNDOS',
+                        help="Jugador con latencia propia (repetible)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fracción de respuestas 503")
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help="Fracción de respuestas 429")
+    parser.add_argument('--retry-after', type=float, default=1.0, help="Retry-After de los 429 (segundos)")
+    parser.add_argument('--elo-period', type=float, default=0.0, help="Segundos entre cambios de ELO (0 = fijo)")
+    args = parser.parse_args()
+    config = StubConfig(latency=args.latency, jitter=args.jitter, slow_players=_parse_slow(args.slow),
+                        error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate,
+                        retry_after=args.retry_after, elo_period=args.elo_period)
+    print(f"Stub de FACEIT escuchando en http://{args.host}:{args.port}{BASE_PATH}")
+    web.run_app(create_app(config), host=args.host, port=args.port, print=None)
+
+if __name__ == "__main__":
+    main()
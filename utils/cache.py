@@ -0,0 +1,114 @@
+"""
+Caché en memoria con caducidad (TTL) y expulsión LRU.
+Incluye deduplicación "single-flight": si varias corrutinas piden la misma
+clave a la vez, solo se lanza una carga y todas reciben su resultado.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Caché LRU acotada con TTL por entrada y contadores de aciertos/fallos.
+
+    ttl=None significa que las entradas no caducan (solo salen por LRU).
+    """
+
+    def __init__(self, maxsize=1024, ttl=None, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data = OrderedDict()  # clave -> (expira_en, valor)
+        self._inflight = {}  # clave -> tarea de carga en curso
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.coalesced = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return self._lookup(key) is not _MISSING
+
+    def _lookup(self, key):
+        """Busca una clave sin tocar los contadores; elimina la entrada si caducó."""
+        entry = self._data.get(key)
+        if entry is None:
+            return _MISSING
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= self._clock():
+            del self._data[key]
+            return _MISSING
+        return value
+
+    def get(self, key, default=None):
+        """Devuelve el valor de la clave (o default) y la marca como reciente."""
+        value = self._lookup(key)
+        if value is _MISSING:
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value, ttl=_MISSING):
+        """Guarda un valor. Si no se indica ttl se usa el de la caché."""
+        ttl = self.ttl if ttl is _MISSING else ttl
+        expires_at = self._clock() + ttl if ttl is not None else None
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key, default=None):
+        entry = self._data.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def clear(self):
+        self._data.clear()
+
+    async def get_or_load(self, key, loader, ttl=_MISSING, should_cache=None):
+        """Devuelve el valor en caché o lo carga con `loader()` (una corrutina).
+
+        Las peticiones concurrentes de la misma clave comparten una única carga.
+        `should_cache(valor)` decide si el resultado se guarda (por defecto, siempre).
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            task = asyncio.ensure_future(loader())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish_load(key, done, ttl, should_cache))
+        # shield: si quien lanzó la carga se cancela, el resto sigue esperando
+        return await asyncio.shield(task)
+
+    def _finish_load(self, key, task, ttl, should_cache):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if task.cancelled() or task.exception() is not None:
+            return
+        value = task.result()
+        if should_cache is None or should_cache(value):
+            self.set(key, value, ttl)
+
+    def stats(self):
+        """Devuelve los contadores de la caché."""
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'coalesced': self.coalesced,
+        }
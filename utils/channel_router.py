@@ -0,0 +1,66 @@
+"""
+Índice de canales vigilados para la moderación de IPs.
+Cada canal vigilado tiene su propia política y el índice está indexado por
+channel_id, de modo que el camino caliente de on_message decide "ignorar"
+con una única búsqueda en un diccionario, sin mirar servidor ni autor.
+Un servidor puede tener varios canales vigilados.
+"""
+
+
+class ChannelPolicy:
+    """Política de moderación de un canal vigilado."""
+
+    __slots__ = ('guild_id', 'channel_id', 'check_edits', 'notify')
+
+    def __init__(self, guild_id, channel_id, check_edits=True, notify=True):
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.check_edits = check_edits  # Revisar también los mensajes editados
+        self.notify = notify  # Avisar al usuario cuando se elimina su mensaje
+
+
+class ChannelRouter:
+    """Índice channel_id -> ChannelPolicy con vista por servidor."""
+
+    def __init__(self):
+        self._policies = {}  # channel_id -> ChannelPolicy
+        self._by_guild = {}  # guild_id -> set de channel_id
+
+    def get(self, channel_id):
+        """Política del canal o None si no está vigilado (una sola búsqueda)."""
+        return self._policies.get(channel_id)
+
+    def __contains__(self, channel_id):
+        return channel_id in self._policies
+
+    def __len__(self):
+        return len(self._policies)
+
+    def add(self, guild_id, channel_id, check_edits=True, notify=True):
+        """Vigila un canal (o actualiza su política) y devuelve la política."""
+        policy = ChannelPolicy(guild_id, channel_id, check_edits, notify)
+        self._policies[channel_id] = policy
+        self._by_guild.setdefault(guild_id, set()).add(channel_id)
+        return policy
+
+    def remove(self, channel_id):
+        """Deja de vigilar un canal. Devuelve la política eliminada o None."""
+        policy = self._policies.pop(channel_id, None)
+        if policy is not None:
+            channels = self._by_guild.get(policy.guild_id)
+            if channels is not None:
+                channels.discard(channel_id)
+                if not channels:
+                    del self._by_guild[policy.guild_id]
+        return policy
+
+    def channels_for_guild(self, guild_id):
+        """Políticas de los canales vigilados en un servidor."""
+        return [self._policies[channel_id] for channel_id in self._by_guild.get(guild_id, ())]
+
+    def has_guild(self, guild_id):
+        return guild_id in self._by_guild
+
+
+# Índice compartido por eventos y comandos
+channel_router = ChannelRouter()
@@ -0,0 +1,101 @@
+"""
+Sincronización de comandos slash con Discord basada en cambios.
+Calcula un hash del árbol de comandos local para cada ámbito (global y cada
+servidor) y guarda el último hash sincronizado. Solo se sincronizan los
+ámbitos cuyo árbol ha cambiado, en paralelo con un límite de concurrencia, y
+solo una vez por proceso (no en cada reconexión al gateway).
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import discord
+from config import COMMAND_SYNC_CONCURRENCY
+from utils.guild_store import get_guild_store
+from utils.sharding import owns_global_commands
+
+# Ámbito de los comandos globales en la tabla de hashes
+GLOBAL_SCOPE = 0
+
+logger = logging.getLogger(__name__)
+
+_synced = False
+_completed = False
+
+
+def tree_hash(tree, guild=None):
+    """Hash estable de los comandos del árbol para un servidor (o globales si guild es None)."""
+    payload = sorted((command.to_dict() for command in tree.get_commands(guild=guild)),
+                     key=lambda command: (command.get('type', 1), command['name']))
+    encoded = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+async def _sync_scope(tree, guild, semaphore):
+    """Sincroniza un ámbito. Devuelve (scope_id, comandos sincronizados o excepción)."""
+    scope_id = guild.id if guild is not None else GLOBAL_SCOPE
+    async with semaphore:
+        try:
+            # discord.py espera y reintenta por su cuenta cuando Discord devuelve 429
+            return scope_id, await tree.sync(guild=guild)
+        except discord.HTTPException as e:
+            return scope_id, e
+
+async def sync_commands(bot, tree, force=False):
+    """Sincroniza los ámbitos cuyo árbol ha cambiado desde la última vez.
+
+    Solo hace trabajo hasta que una llamada sincroniza todos los ámbitos (salvo
+    force=True): si alguno falla, la siguiente conexión lo vuelve a intentar, y
+    como su hash no se guardó solo se repiten los que fallaron.
+    Devuelve un diccionario scope_id -> lista de comandos o excepción.
+    """
+    global _synced, _completed
+    if _synced and not force:
+        return {}
+    _synced = True
+    try:
+        results = await _sync_changed(bot, tree, force)
+    except BaseException:
+        # Un fallo fuera de tree.sync (SQLite, falta de application_id...) no
+        # debe bloquear el reintento en la siguiente conexión
+        _synced = False
+        raise
+    if any(isinstance(result, Exception) for result in results.values()):
+        _synced = False
+    _completed = True
+    return results
+
+async def _sync_changed(bot, tree, force):
+    store = get_guild_store()
+    stored = await store.get_sync_hashes()
+    # Con varios procesos, los comandos globales solo los sincroniza el del shard 0
+    scopes = ([None] if owns_global_commands(bot) else []) + list(bot.guilds)
+    pending = []
+    hashes = {}
+    for guild in scopes:
+        scope_id = guild.id if guild is not None else GLOBAL_SCOPE
+        hashes[scope_id] = tree_hash(tree, guild)
+        if force or stored.get(scope_id) != hashes[scope_id]:
+            pending.append(guild)
+
+    logger.info("Sincronización de comandos: %d de %d ámbitos con cambios", len(pending), len(scopes))
+    semaphore = asyncio.Semaphore(COMMAND_SYNC_CONCURRENCY)
+    results = dict(await asyncio.gather(*[_sync_scope(tree, guild, semaphore) for guild in pending]))
+
+    synced_hashes = {}
+    for scope_id, result in results.items():
+        name = "global" if scope_id == GLOBAL_SCOPE else str(scope_id)
+        if isinstance(result, Exception):
+            logger.error("Error sincronizando comandos (%s): %s", name, result)
+        else:
+            synced_hashes[scope_id] = hashes[scope_id]
+            logger.info("Comandos sincronizados (%s): %d", name, len(result))
+    await store.set_sync_hashes(synced_hashes)
+    return results
+
+def commands_synced():
+    """Indica si la sincronización de arranque ya ha terminado."""
+    return _completed
+
+async def record_manual_sync(tree, guild):
+    """Guarda el hash tras una sincronización manual (/sincronizar) de un servidor."""
+    await get_guild_store().set_sync_hashes({guild.id: tree_hash(tree, guild)})
@@ -0,0 +1,30 @@
+"""
+Árbol de comandos slash instrumentado.
+Marca el inicio de cada interacción antes de ejecutar el comando y registra
+su duración en botardo_command_latency_seconds al terminar, con
+status="ok" o status="error".
+"""
+import time
+from discord import app_commands
+from utils.metrics import command_latency
+
+
+def record_command(interaction, status):
+    """Registra la duración de un comando slash (si se marcó su inicio)."""
+    started = interaction.extras.get('started')
+    if started is None or interaction.command is None:
+        return
+    command_latency.observe(time.perf_counter() - started,
+                            command=interaction.command.qualified_name, status=status)
+
+
+class InstrumentedTree(app_commands.CommandTree):
+    """CommandTree que mide la latencia de cada comando slash."""
+
+    async def interaction_check(self, interaction):
+        interaction.extras['started'] = time.perf_counter()
+        return True
+
+    async def on_error(self, interaction, error):
+        record_command(interaction, 'error')
+        await super().on_error(interaction, error)
@@ -0,0 +1,405 @@
+"""
+Seguimiento del ELO de jugadores de FACEIT en segundo plano.
+Cada servidor registra los jugadores que quiere seguir (con /seguimiento) y
+el canal donde avisar. Una única tarea consulta a los jugadores distintos de
+todos los servidores en lotes repartidos a lo largo de TRACKER_POLL_INTERVAL,
+con prioridad de segundo plano y un presupuesto fijo de TRACKER_REQUEST_BUDGET
+peticiones por intervalo: si hay más jugadores que presupuesto, el ciclo se
+alarga en lugar de pedir más. Un jugador seguido en varios servidores cuesta
+una sola petición por ciclo. La serie de ELO y nivel solo guarda un punto
+cuando el valor cambia, y solo entonces se publica un aviso. Los valores
+alimentan las clasificaciones de utils.leaderboard.
+"""
+import asyncio
+import logging
+import time
+import discord
+from config import (
+    TRACKER_STORE_PATH,
+    TRACKER_POLL_INTERVAL,
+    TRACKER_REQUEST_BUDGET,
+    TRACKER_BATCH_SIZE,
+    TRACKER_MAX_PLAYERS_PER_GUILD,
+)
+from utils.faceit_client import get_client
+from utils.helpers import format_timestamp
+from utils.leaderboard import leaderboard, RANKING_WINDOW
+from utils.match_columns import get_player_columns
+from utils.match_store import get_match_store
+from utils.metrics import registry
+from utils.rate_limiter import PRIORITY_BACKGROUND
+from utils.storage import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+tracker_polls = registry.counter(
+    'botardo_tracker_polls_total', "Consultas del seguimiento de ELO por resultado", ('result',)
+)
+
+
+class TrackerStore(SQLiteStore):
+    """Jugadores seguidos por servidor y serie de cambios de ELO por jugador."""
+
+    SCHEMA = (
+        """CREATE TABLE IF NOT EXISTS tracked_players (
+            guild_id INTEGER NOT NULL,
+            player_id TEXT NOT NULL,
+            nickname TEXT NOT NULL,
+            channel_id INTEGER NOT NULL,
+            added_at INTEGER NOT NULL,
+            PRIMARY KEY (guild_id, player_id)
+        )""",
+        "CREATE INDEX IF NOT EXISTS tracked_players_player ON tracked_players (player_id)",
+        """CREATE TABLE IF NOT EXISTS elo_history (
+            player_id TEXT NOT NULL,
+            recorded_at INTEGER NOT NULL,
+            elo INTEGER NOT NULL,
+            level INTEGER NOT NULL,
+            PRIMARY KEY (player_id, recorded_at)
+        ) WITHOUT ROWID""",
+    )
+
+    def __init__(self, path=TRACKER_STORE_PATH):
+        super().__init__(path)
+
+    @staticmethod
+    def _load(conn):
+        tracked = [tuple(row) for row in conn.execute(
+            "SELECT guild_id, player_id, nickname, channel_id FROM tracked_players"
+        )]
+        # Último punto de cada jugador (SQLite devuelve la fila del MAX)
+        latest = {row['player_id']: (row['elo'], row['level'], row['recorded_at']) for row in conn.execute(
+            "SELECT player_id, elo, level, MAX(recorded_at) AS recorded_at FROM elo_history GROUP BY player_id"
+        )}
+        return tracked, latest
+
+    async def load(self):
+        """Devuelve (lista de (guild_id, player_id, nickname, channel_id), {player_id: (elo, nivel, fecha)})."""
+        return await self.run(self._load)
+
+    @staticmethod
+    def _add_player(conn, guild_id, player_id, nickname, channel_id, added_at):
+        with conn:
+            conn.execute(
+                """INSERT OR REPLACE INTO tracked_players (guild_id, player_id, nickname, channel_id, added_at)
+                   VALUES (?, ?, ?, ?, ?)""",
+                (guild_id, player_id, nickname, channel_id, added_at),
+            )
+
+    async def add_player(self, guild_id, player_id, nickname, channel_id):
+        await self.run(self._add_player, guild_id, player_id, nickname, channel_id, int(time.time()))
+
+    @staticmethod
+    def _remove_player(conn, guild_id, player_id):
+        with conn:
+            conn.execute("DELETE FROM tracked_players WHERE guild_id = ? AND player_id = ?", (guild_id, player_id))
+            # La serie solo se conserva mientras algún servidor siga al jugador
+            conn.execute(
+                "DELETE FROM elo_history WHERE player_id = ? AND player_id NOT IN (SELECT player_id FROM tracked_players)",
+                (player_id,),
+            )
+
+    async def remove_player(self, guild_id, player_id):
+        await self.run(self._remove_player, guild_id, player_id)
+
+    @staticmethod
+    def _rename(conn, player_id, nickname):
+        with conn:
+            conn.execute("UPDATE tracked_players SET nickname = ? WHERE player_id = ?", (nickname, player_id))
+
+    async def rename(self, player_id, nickname):
+        await self.run(self._rename, player_id, nickname)
+
+    @staticmethod
+    def _record(conn, points):
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO elo_history (player_id, recorded_at, elo, level) VALUES (?, ?, ?, ?)",
+                points,
+            )
+
+    async def record(self, points):
+        """Guarda varios puntos (player_id, fecha, elo, nivel) en una sola transacción."""
+        if points:
+            await self.run(self._record, points)
+
+    @staticmethod
+    def _history(conn, player_id, since, limit):
+        return [tuple(row) for row in conn.execute(
+            """SELECT recorded_at, elo, level FROM elo_history
+               WHERE player_id = ? AND recorded_at >= ? ORDER BY recorded_at DESC LIMIT ?""",
+            (player_id, since, limit),
+        )][::-1]
+
+    async def history(self, player_id, since=0, limit=1000):
+        """Serie de cambios (fecha, elo, nivel) de un jugador, de la más antigua a la más reciente."""
+        return await self.run(self._history, player_id, since, limit)
+
+
+class TrackedPlayer:
+    """Estado en memoria de un jugador seguido: último valor y canal de aviso por servidor."""
+
+    __slots__ = ('player_id', 'nickname', 'elo', 'level', 'updated_at', 'guilds')
+
+    def __init__(self, player_id, nickname):
+        self.player_id = player_id
+        self.nickname = nickname
+        self.elo = None
+        self.level = None
+        self.updated_at = None
+        self.guilds = {}  # guild_id -> channel_id
+
+
+def _change_line(player, old_elo, old_level):
+    delta = player.elo - old_elo
+    arrow = "📈" if delta > 0 else "📉" if delta < 0 else "⭐"
+    line = f"{arrow} **{player.nickname}**: {old_elo} → {player.elo} ELO ({delta:+d})"
+    if old_level != player.level:
+        line += f" · nivel {old_level} → {player.level}"
+    return line
+
+
+class EloTracker:
+    """Registro de jugadores seguidos y sondeo periódico de su ELO."""
+
+    def __init__(self, interval=TRACKER_POLL_INTERVAL, budget=TRACKER_REQUEST_BUDGET,
+                 batch_size=TRACKER_BATCH_SIZE, max_per_guild=TRACKER_MAX_PLAYERS_PER_GUILD):
+        self.interval = interval
+        self.budget = budget
+        self.batch_size = batch_size
+        self.max_per_guild = max_per_guild
+        self._players = {}  # player_id -> TrackedPlayer
+        self._loaded = False
+        self._loading = None  # tarea de la carga en curso, compartida por las llamadas concurrentes
+        self._bot = None
+        self._task = None
+        self.cycles = 0
+        self.last_cycle = None  # duración del último ciclo completo (s)
+        self.changes = 0
+
+    def __len__(self):
+        return len(self._players)
+
+    async def load(self):
+        """Carga los jugadores seguidos y su último valor (solo la primera vez).
+
+        Las llamadas concurrentes esperan a la misma carga; si falla, la siguiente la reintenta.
+        """
+        if self._loaded:
+            return len(self._players)
+        if self._loading is None:
+            self._loading = asyncio.ensure_future(self._load())
+            self._loading.add_done_callback(self._finish_load)
+        # shield: si quien lanzó la carga se cancela, el resto sigue esperando
+        return await asyncio.shield(self._loading)
+
+    def _finish_load(self, task):
+        self._loading = None
+        if not task.cancelled() and task.exception() is None:
+            self._loaded = True
+
+    async def _load(self):
+        tracked, latest = await get_tracker_store().load()
+        for guild_id, player_id, nickname, channel_id in tracked:
+            player = self._players.get(player_id)
+            if player is None:
+                player = self._players[player_id] = TrackedPlayer(player_id, nickname)
+                if player_id in latest:
+                    player.elo, player.level, player.updated_at = latest[player_id]
+            player.guilds[guild_id] = channel_id
+        for player in list(self._players.values()):
+            await self._rank(player)
+        return len(self._players)
+
+    async def _rank(self, player):
+        """Añade al jugador a las clasificaciones de sus servidores con su ELO y sus partidas guardadas."""
+        for guild_id in player.guilds:
+            leaderboard.track(guild_id, player.player_id, player.nickname)
+        if player.elo is not None:
+            leaderboard.update(player.player_id, elo=player.elo)
+        columns = await get_player_columns(get_match_store(), player.player_id)
+        leaderboard.update_window(player.player_id, columns.select(last=RANKING_WINDOW).totals())
+
+    def get(self, player_id):
+        return self._players.get(player_id)
+
+    def players_for_guild(self, guild_id):
+        """Jugadores seguidos en un servidor, de mayor a menor ELO (los sin datos al final)."""
+        players = [player for player in self._players.values() if guild_id in player.guilds]
+        return sorted(players, key=lambda player: (player.elo is None, -(player.elo or 0), player.nickname.lower()))
+
+    def find(self, guild_id, nickname):
+        """Jugador seguido en el servidor por nickname (sin distinguir mayúsculas)."""
+        nickname = nickname.lower()
+        for player in self._players.values():
+            if guild_id in player.guilds and player.nickname.lower() == nickname:
+                return player
+        return None
+
+    async def add(self, guild_id, channel_id, player_id, nickname, elo=None, level=None):
+        """Sigue a un jugador en un servidor y avisa en `channel_id`.
+
+        Devuelve el TrackedPlayer. Lanza ValueError si el servidor ya sigue a
+        TRACKER_MAX_PLAYERS_PER_GUILD jugadores.
+        """
+        await self.load()
+        player = self._players.get(player_id)
+        if player is None or guild_id not in player.guilds:
+            if len(self.players_for_guild(guild_id)) >= self.max_per_guild:
+                raise ValueError(f"Este servidor ya sigue a {self.max_per_guild} jugadores")
+        if player is None:
+            player = self._players[player_id] = TrackedPlayer(player_id, nickname)
+        player.guilds[guild_id] = channel_id
+        store = get_tracker_store()
+        await store.add_player(guild_id, player_id, nickname, channel_id)
+        if elo is not None and player.elo is None:
+            # Primer punto de la serie con el valor que ya tenemos de la consulta
+            player.elo, player.level, player.updated_at = elo, level, int(time.time())
+            await store.record([(player_id, player.updated_at, elo, level)])
+        await self._rank(player)
+        return player
+
+    async def remove(self, guild_id, nickname):
+        """Deja de seguir a un jugador en el servidor. Devuelve el TrackedPlayer o None."""
+        await self.load()
+        player = self.find(guild_id, nickname)
+        if player is None:
+            return None
+        del player.guilds[guild_id]
+        leaderboard.untrack(guild_id, player.player_id)
+        if not player.guilds:
+            del self._players[player.player_id]
+        await get_tracker_store().remove_player(guild_id, player.player_id)
+        return player
+
+    def cycle_duration(self, count):
+        """Duración del ciclo para `count` jugadores sin superar el presupuesto por intervalo."""
+        return self.interval * max(1.0, count / self.budget)
+
+    def _due_players(self):
+        """Jugadores seguidos en algún servidor de este proceso (con shards, cada proceso los suyos)."""
+        return [player for player in self._players.values()
+                if any(self._bot.get_guild(guild_id) is not None for guild_id in player.guilds)]
+
+    async def poll_batch(self, batch):
+        """Consulta un lote de jugadores, guarda los cambios y publica los avisos."""
+        client = get_client()
+        responses = await asyncio.gather(
+            *[client.get_player_by_id(player.player_id, priority=PRIORITY_BACKGROUND) for player in batch],
+            return_exceptions=True,
+        )
+        now = int(time.time())
+        points = []
+        notices = {}  # channel_id -> líneas de aviso
+        for player, response in zip(batch, responses):
+            if isinstance(response, BaseException) or not response.ok:
+                tracker_polls.inc(result='error')
+                continue
+            data = response.json()
+            cs2 = data.get('games', {}).get('cs2', {})
+            if 'faceit_elo' not in cs2 or player.player_id not in self._players:
+                tracker_polls.inc(result='error')
+                continue
+            nickname = data.get('nickname') or player.nickname
+            if nickname != player.nickname:
+                player.nickname = nickname
+                await get_tracker_store().rename(player.player_id, nickname)
+                leaderboard.update(player.player_id, nickname)
+            elo, level = cs2['faceit_elo'], cs2.get('skill_level', 0)
+            if elo == player.elo and level == player.level:
+                tracker_polls.inc(result='unchanged')
+                continue
+            tracker_polls.inc(result='changed')
+            old_elo, old_level = player.elo, player.level
+            player.elo, player.level, player.updated_at = elo, level, now
+            leaderboard.update(player.player_id, elo=elo)
+            points.append((player.player_id, now, elo, level))
+            if old_elo is None:
+                continue  # Primer valor conocido: se guarda sin avisar
+            self.changes += 1
+            line = _change_line(player, old_elo, old_level)
+            for channel_id in player.guilds.values():
+                notices.setdefault(channel_id, []).append(line)
+        await get_tracker_store().record(points)
+        for channel_id, lines in notices.items():
+            await self._notify(channel_id, lines)
+
+    async def _notify(self, channel_id, lines):
+        channel = self._bot.get_channel(channel_id) if self._bot is not None else None
+        if channel is None:
+            return
+        embed = discord.Embed(title="Cambios de ELO en FACEIT", description="\n".join(lines), color=0xFF5500)
+        embed.set_footer(text=f"Información actualizada el {format_timestamp()}")
+        try:
+            await channel.send(embed=embed)
+        except discord.HTTPException as e:
+            logger.warning("No se pudo publicar el aviso de ELO: %s", e, extra={'channel_id': channel_id})
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        await self.load()
+        await self._bot.wait_until_ready()
+        while True:
+            start = loop.time()
+            players = self._due_players()
+            duration = self.cycle_duration(len(players))
+            batches = [players[index:index + self.batch_size] for index in range(0, len(players), self.batch_size)]
+            # Los lotes se reparten a lo largo del ciclo para suavizar la carga
+            spacing = duration / max(1, len(batches))
+            for index, batch in enumerate(batches):
+                try:
+                    await self.poll_batch(batch)
+                except Exception:
+                    logger.exception("Error en el seguimiento de ELO")
+                await asyncio.sleep(max(0.0, start + (index + 1) * spacing - loop.time()))
+            if not batches:
+                await asyncio.sleep(duration)
+            self.cycles += 1
+            self.last_cycle = loop.time() - start
+
+    def start(self, bot):
+        """Arranca el sondeo en el bucle actual (idempotente)."""
+        if self._task is None:
+            self._bot = bot
+            self._task = asyncio.create_task(self._run(), name="elo-tracker")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self):
+        players = len(self._players)
+        return {
+            'players': players,
+            'cycle_s': round(self.cycle_duration(players), 1),
+            'last_cycle_s': round(self.last_cycle, 1) if self.last_cycle is not None else None,
+            'cycles': self.cycles,
+            'changes': self.changes,
+        }
+
+
+# Instancias compartidas
+_store = None
+
+def get_tracker_store():
+    """Devuelve el almacén del seguimiento compartido, creándolo si no existe."""
+    global _store
+    if _store is None:
+        _store = TrackerStore()
+    return _store
+
+async def close_tracker_store():
+    global _store
+    if _store is not None:
+        await _store.close()
+        _store = None
+
+elo_tracker = EloTracker()
+
+registry.gauge_func('botardo_tracked_players', "Jugadores de FACEIT seguidos", (),
+                    lambda: [((), len(elo_tracker))])
@@ -0,0 +1,273 @@
+"""
+Cliente asíncrono para la API de datos de FACEIT.
+Mantiene una única sesión aiohttp con un pool de conexiones persistentes
+(keep-alive, límite por host y timeouts) compartida por todos los comandos,
+de forma que una consulta lenta nunca bloquea el bucle de eventos del bot.
+Las respuestas correctas se guardan en cachés con TTL por endpoint y todas
+las peticiones pasan por el planificador global de utils.rate_limiter.
+"""
+import asyncio
+import logging
+import time
+import aiohttp
+from config import (
+    FACEIT_API_KEY,
+    FACEIT_API_URL,
+    FACEIT_HTTP_TIMEOUT,
+    FACEIT_CONNECT_TIMEOUT,
+    FACEIT_MAX_CONNECTIONS,
+    FACEIT_MAX_CONNECTIONS_PER_HOST,
+    FACEIT_KEEPALIVE_TIMEOUT,
+    FACEIT_MATCH_CONCURRENCY,
+    FACEIT_MATCH_DEADLINE,
+    FACEIT_CACHE_MAX_ENTRIES,
+    FACEIT_CACHE_TTL_PLAYER,
+    FACEIT_CACHE_TTL_STATS,
+    FACEIT_CACHE_TTL_HISTORY,
+    FACEIT_CACHE_TTL_MATCH,
+    FACEIT_SHARED_CACHE,
+)
+from utils.cache import TTLCache
+from utils.metrics import faceit_request_latency, track_cache
+from utils.rate_limiter import get_scheduler, PRIORITY_INTERACTIVE, PRIORITY_BULK
+from utils.shared_cache import SharedCache
+
+logger = logging.getLogger(__name__)
+
+
+def _ttl(seconds):
+    """Convierte el TTL de configuración (0 = sin caducidad) al formato de TTLCache."""
+    return seconds if seconds > 0 else None
+
+def _is_ok(response):
+    return response.ok
+
+def _endpoint(path):
+    """Plantilla del endpoint para las métricas: /players/{id}/stats/cs2."""
+    parts = path.strip('/').split('/')
+    for index in range(1, len(parts)):
+        if parts[index - 1] in ('players', 'matches'):
+            parts[index] = '{id}'
+    return '/' + '/'.join(parts)
+
+def _parse_retry_after(value):
+    """Segundos indicados en la cabecera Retry-After (None si no es un número)."""
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class FaceitResponse:
+    """Resultado de una petición a FACEIT: código HTTP, cuerpo JSON (o None) y Retry-After."""
+
+    __slots__ = ('status', 'data', 'retry_after')
+
+    def __init__(self, status, data=None, retry_after=None):
+        self.status = status
+        self.data = data
+        self.retry_after = retry_after
+
+    @property
+    def ok(self):
+        return self.status == 200
+
+    def json(self):
+        """Devuelve el cuerpo JSON (diccionario vacío si no hay cuerpo)."""
+        return self.data if self.data is not None else {}
+
+
+class FaceitClient:
+    """Cliente HTTP de FACEIT con sesión y pool de conexiones reutilizables."""
+
+    # Cachés que se comparten entre procesos (las partidas ya se guardan en utils.match_store)
+    SHARED_CACHES = ('player', 'stats', 'history')
+
+    def __init__(self, api_key=None, base_url=None, scheduler=None, shared_cache=None):
+        self.api_key = api_key if api_key is not None else FACEIT_API_KEY
+        self.base_url = (base_url or FACEIT_API_URL).rstrip('/')
+        self.scheduler = scheduler or get_scheduler()
+        self.shared_cache = shared_cache
+        self._session = None
+        self.caches = {
+            'player': TTLCache(FACEIT_CACHE_MAX_ENTRIES, _ttl(FACEIT_CACHE_TTL_PLAYER)),
+            'stats': TTLCache(FACEIT_CACHE_MAX_ENTRIES, _ttl(FACEIT_CACHE_TTL_STATS)),
+            'history': TTLCache(FACEIT_CACHE_MAX_ENTRIES, _ttl(FACEIT_CACHE_TTL_HISTORY)),
+            'match': TTLCache(FACEIT_CACHE_MAX_ENTRIES, _ttl(FACEIT_CACHE_TTL_MATCH)),
+        }
+
+    def _create_session(self):
+        """Crea la sesión aiohttp. Debe llamarse con el bucle de eventos en marcha."""
+        connector = aiohttp.TCPConnector(
+            limit=FACEIT_MAX_CONNECTIONS,
+            limit_per_host=FACEIT_MAX_CONNECTIONS_PER_HOST,
+            keepalive_timeout=FACEIT_KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=300,
+        )
+        timeout = aiohttp.ClientTimeout(
+            total=FACEIT_HTTP_TIMEOUT,
+            sock_connect=FACEIT_CONNECT_TIMEOUT,
+        )
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Accept": "application/json",
+        }
+        return aiohttp.ClientSession(connector=connector, timeout=timeout, headers=headers)
+
+    @property
+    def session(self):
+        if self._session is None or self._session.closed:
+            self._session = self._create_session()
+        return self._session
+
+    async def close(self):
+        """Cierra la sesión y libera las conexiones del pool."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        if self.shared_cache is not None:
+            await self.shared_cache.close()
+
+    async def _request(self, path, params=None):
+        url = f"{self.base_url}{path}"
+        start = time.perf_counter()
+        status = 'error'
+        try:
+            async with self.session.get(url, params=params) as response:
+                status = response.status
+                data = None
+                retry_after = None
+                if response.status == 200:
+                    data = await response.json(content_type=None)
+                elif response.status == 429:
+                    retry_after = _parse_retry_after(response.headers.get('Retry-After'))
+                return FaceitResponse(response.status, data, retry_after)
+        finally:
+            faceit_request_latency.observe(time.perf_counter() - start, endpoint=_endpoint(path), status=status)
+
+    async def get(self, path, params=None, priority=PRIORITY_INTERACTIVE):
+        """Realiza un GET contra la API y devuelve un FaceitResponse.
+
+        La petición espera turno en el planificador según su prioridad y los
+        429/5xx se reintentan. Los errores de red y los timeouts se propagan
+        como excepciones (aiohttp.ClientError / asyncio.TimeoutError).
+        """
+        return await self.scheduler.run(lambda: self._request(path, params), priority)
+
+    async def cached_get(self, cache_name, key, path, params=None, priority=PRIORITY_INTERACTIVE):
+        """GET a través de la caché indicada.
+
+        Solo se guardan las respuestas 200; las peticiones idénticas simultáneas
+        comparten una única llamada a la API.
+        """
+        cache = self.caches[cache_name]
+        if self.shared_cache is not None and cache_name in self.SHARED_CACHES:
+            loader = lambda: self._shared_get(cache_name, key, path, params, priority, cache.ttl)
+        else:
+            loader = lambda: self.get(path, params, priority)
+        return await cache.get_or_load(key, loader, should_cache=_is_ok)
+
+    async def _shared_get(self, cache_name, key, path, params, priority, ttl):
+        """Consulta la caché compartida entre procesos antes de pedir a la API."""
+        data = await self.shared_cache.get(cache_name, key)
+        if data is not None:
+            return FaceitResponse(200, data)
+        response = await self.get(path, params, priority)
+        if response.ok:
+            await self.shared_cache.set(cache_name, key, response.data, ttl)
+        return response
+
+    async def get_player(self, nickname, priority=PRIORITY_INTERACTIVE):
+        """Busca un jugador por nickname (la API lo trata sin distinguir mayúsculas)."""
+        return await self.cached_get(
+            'player', nickname.lower(), "/players", params={"nickname": nickname, "game": "cs2"},
+            priority=priority,
+        )
+
+    async def get_player_by_id(self, player_id, priority=PRIORITY_INTERACTIVE):
+        """Obtiene el perfil de un jugador por su player_id (no cambia aunque cambie el nickname)."""
+        return await self.cached_get('player', player_id, f"/players/{player_id}", priority=priority)
+
+    async def get_player_stats(self, player_id, priority=PRIORITY_INTERACTIVE):
+        """Obtiene las estadísticas globales de CS2 de un jugador."""
+        return await self.cached_get('stats', player_id, f"/players/{player_id}/stats/cs2", priority=priority)
+
+    async def get_player_history(self, player_id, offset=0, limit=20, since=None, priority=PRIORITY_INTERACTIVE):
+        """Obtiene el historial de partidas de CS2 de un jugador.
+
+        `since` (timestamp Unix) limita el resultado a las partidas desde ese momento.
+        """
+        params = {"game": "cs2", "offset": offset, "limit": limit}
+        if since is not None:
+            params["from"] = int(since)
+        return await self.cached_get(
+            'history', (player_id, offset, limit, since),
+            f"/players/{player_id}/history",
+            params=params,
+            priority=priority,
+        )
+
+    async def get_match_stats(self, match_id, priority=PRIORITY_BULK):
+        """Obtiene las estadísticas de una partida (por defecto con prioridad de descarga masiva)."""
+        return await self.cached_get('match', match_id, f"/matches/{match_id}/stats", priority=priority)
+
+    def cache_stats(self):
+        """Devuelve los contadores de cada caché por endpoint."""
+        return {name: cache.stats() for name, cache in self.caches.items()}
+
+    async def get_match_stats_many(self, match_ids, concurrency=None, deadline=None, priority=PRIORITY_BULK,
+                                   on_result=None):
+        """Obtiene las estadísticas de varias partidas en paralelo.
+
+        Como mucho `concurrency` peticiones están en vuelo a la vez y todo el lote
+        tiene un plazo de `deadline` segundos. Devuelve un diccionario
+        match_id -> FaceitResponse solo con las partidas que respondieron a tiempo
+        y sin error de red. `on_result(match_id, respuesta)` se llama según va
+        llegando cada una, para mostrar resultados parciales.
+        """
+        concurrency = concurrency or FACEIT_MATCH_CONCURRENCY
+        deadline = deadline if deadline is not None else FACEIT_MATCH_DEADLINE
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(match_id):
+            async with semaphore:
+                response = await self.get_match_stats(match_id, priority)
+            if on_result is not None:
+                on_result(match_id, response)
+            return match_id, response
+
+        tasks = [asyncio.ensure_future(fetch(match_id)) for match_id in dict.fromkeys(match_ids)]
+        if not tasks:
+            return {}
+        done, pending = await asyncio.wait(tasks, timeout=deadline)
+        for task in pending:
+            task.cancel()
+
+        results = {}
+        for task in done:
+            if task.exception() is not None:
+                logger.error("Error obteniendo estadísticas de partida: %s", task.exception())
+                continue
+            match_id, response = task.result()
+            results[match_id] = response
+        return results
+
+
+# Instancia compartida por todos los comandos
+_client = None
+
+def get_client():
+    """Devuelve el cliente FACEIT compartido, creándolo si no existe."""
+    global _client
+    if _client is None:
+        _client = FaceitClient(shared_cache=SharedCache() if FACEIT_SHARED_CACHE else None)
+        for name, cache in _client.caches.items():
+            track_cache(f"faceit_{name}", cache)
+    return _client
+
+async def close_client():
+    """Cierra el cliente compartido (se llama al apagar el bot)."""
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
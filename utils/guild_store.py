@@ -0,0 +1,151 @@
+"""
+Configuración persistente de los servidores.
+Guarda en SQLite los canales vigilados (y su política), si un servidor ha
+sido configurado a mano con /canal y el hash de los últimos comandos slash
+sincronizados. Los canales se cargan una vez en el índice en memoria
+(utils.channel_router) al arrancar y cada cambio se escribe al momento.
+"""
+import time
+from config import GUILD_STORE_PATH
+from utils.channel_router import channel_router
+from utils.storage import SQLiteStore
+
+
+class GuildStore(SQLiteStore):
+    """Canales vigilados y ajustes por servidor."""
+
+    SCHEMA = (
+        """CREATE TABLE IF NOT EXISTS watched_channels (
+            channel_id INTEGER PRIMARY KEY,
+            guild_id INTEGER NOT NULL,
+            check_edits INTEGER NOT NULL DEFAULT 1,
+            notify INTEGER NOT NULL DEFAULT 1
+        )""",
+        "CREATE INDEX IF NOT EXISTS watched_channels_guild ON watched_channels (guild_id)",
+        """CREATE TABLE IF NOT EXISTS guild_settings (
+            guild_id INTEGER PRIMARY KEY,
+            manual INTEGER NOT NULL DEFAULT 0
+        )""",
+        """CREATE TABLE IF NOT EXISTS command_sync (
+            scope_id INTEGER PRIMARY KEY,
+            hash TEXT NOT NULL,
+            synced_at INTEGER NOT NULL
+        )""",
+    )
+
+    def __init__(self, path=GUILD_STORE_PATH):
+        super().__init__(path)
+
+    @staticmethod
+    def _load(conn):
+        channels = [tuple(row) for row in conn.execute(
+            "SELECT guild_id, channel_id, check_edits, notify FROM watched_channels"
+        )]
+        manual = {row['guild_id'] for row in conn.execute("SELECT guild_id FROM guild_settings WHERE manual = 1")}
+        return channels, manual
+
+    async def load(self):
+        """Devuelve (lista de (guild_id, channel_id, check_edits, notify), servidores configurados a mano)."""
+        return await self.run(self._load)
+
+    @staticmethod
+    def _save_channel(conn, guild_id, channel_id, check_edits, notify, manual):
+        with conn:
+            conn.execute(
+                """INSERT OR REPLACE INTO watched_channels (channel_id, guild_id, check_edits, notify)
+                   VALUES (?, ?, ?, ?)""",
+                (channel_id, guild_id, int(check_edits), int(notify)),
+            )
+            if manual:
+                conn.execute("INSERT OR REPLACE INTO guild_settings (guild_id, manual) VALUES (?, 1)", (guild_id,))
+
+    async def save_channel(self, policy, manual):
+        await self.run(self._save_channel, policy.guild_id, policy.channel_id,
+                       policy.check_edits, policy.notify, manual)
+
+    @staticmethod
+    def _delete_channel(conn, guild_id, channel_id, manual):
+        with conn:
+            conn.execute("DELETE FROM watched_channels WHERE channel_id = ?", (channel_id,))
+            if manual:
+                conn.execute("INSERT OR REPLACE INTO guild_settings (guild_id, manual) VALUES (?, 1)", (guild_id,))
+
+    async def delete_channel(self, guild_id, channel_id, manual):
+        await self.run(self._delete_channel, guild_id, channel_id, manual)
+
+    @staticmethod
+    def _get_sync_hashes(conn):
+        return {row['scope_id']: row['hash'] for row in conn.execute("SELECT scope_id, hash FROM command_sync")}
+
+    async def get_sync_hashes(self):
+        """Último hash de comandos sincronizado por ámbito (0 = global)."""
+        return await self.run(self._get_sync_hashes)
+
+    @staticmethod
+    def _set_sync_hashes(conn, hashes, synced_at):
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO command_sync (scope_id, hash, synced_at) VALUES (?, ?, ?)",
+                [(scope_id, value, synced_at) for scope_id, value in hashes.items()],
+            )
+
+    async def set_sync_hashes(self, hashes):
+        if hashes:
+            await self.run(self._set_sync_hashes, hashes, int(time.time()))
+
+
+# Instancia compartida y estado de carga
+_store = None
+_loaded = False
+_manual_guilds = set()
+
+def get_guild_store():
+    """Devuelve el almacén de configuración compartido, creándolo si no existe."""
+    global _store
+    if _store is None:
+        _store = GuildStore()
+    return _store
+
+async def close_guild_store():
+    global _store
+    if _store is not None:
+        await _store.close()
+        _store = None
+
+async def load_channel_routes():
+    """Carga los canales guardados en el índice en memoria (solo la primera vez)."""
+    global _loaded
+    if _loaded:
+        return 0
+    channels, manual = await get_guild_store().load()
+    for guild_id, channel_id, check_edits, notify in channels:
+        channel_router.add(guild_id, channel_id, check_edits=bool(check_edits), notify=bool(notify))
+    _manual_guilds.update(manual)
+    _loaded = True
+    return len(channels)
+
+def channel_routes_loaded():
+    """Indica si los canales guardados ya están cargados en el índice."""
+    return _loaded
+
+def is_manually_configured(guild_id):
+    """Indica si un administrador ha configurado los canales del servidor con /canal."""
+    return guild_id in _manual_guilds
+
+async def watch_channel(guild_id, channel_id, check_edits=True, notify=True, manual=True):
+    """Vigila un canal y lo guarda. manual=False para la configuración automática."""
+    policy = channel_router.add(guild_id, channel_id, check_edits=check_edits, notify=notify)
+    if manual:
+        _manual_guilds.add(guild_id)
+    await get_guild_store().save_channel(policy, manual)
+    return policy
+
+async def unwatch_channel(channel_id, manual=True):
+    """Deja de vigilar un canal y lo borra del almacén. Devuelve la política o None."""
+    policy = channel_router.remove(channel_id)
+    if policy is None:
+        return None
+    if manual:
+        _manual_guilds.add(policy.guild_id)
+    await get_guild_store().delete_channel(policy.guild_id, channel_id, manual)
+    return policy
@@ -3,19 +3,36 @@ Funciones auxiliares y utilidades para el bot.
 """
 import discord
 from datetime import datetime
-from config import target_channels
+from utils.cache import TTLCache
+from utils.channel_router import channel_router
+
+# Miembro del bot por servidor cuando no está en la caché de discord.py (modo ligero)
+_bot_members = TTLCache(maxsize=1000, ttl=300)
 
 def format_timestamp():
     """Devuelve la fecha y hora actual formateada."""
     return datetime.now().strftime('%d/%m/%Y %H:%M:%S')
 
+async def get_bot_member(bot, guild):
+    """Devuelve el miembro del bot en el servidor, pidiéndolo a la API solo si no está en caché."""
+    member = guild.me
+    if member is not None:
+        return member
+    return await _bot_members.get_or_load(guild.id, lambda: guild.fetch_member(bot.user.id))
+
 def get_target_channel_info(guild_id, guild):
-    """Obtiene información sobre el canal objetivo configurado para un servidor."""
-    if guild_id in target_channels:
-        channel = guild.get_channel(target_channels[guild_id])
-        if channel:
-            return f"el canal #{channel.name}", channel
-        else:
-            return "un canal configurado (que puede que ya no exista)", None
-    else:
-        return "ningún canal configurado aún (usa /canal para configurar uno)", None
+    """Obtiene información sobre los canales vigilados configurados para un servidor.
+
+    Devuelve una descripción legible y la lista de canales que siguen existiendo.
+    """
+    policies = channel_router.channels_for_guild(guild_id)
+    if not policies:
+        return "ningún canal configurado aún (usa /canal para configurar uno)", []
+    
+    channels = [guild.get_channel(policy.channel_id) for policy in policies]
+    channels = [channel for channel in channels if channel]
+    if not channels:
+        return "un canal configurado (que puede que ya no exista)", []
+    if len(channels) == 1:
+        return f"el canal #{channels[0].name}", channels
+    return "los canales " + ", ".join(f"#{channel.name}" for channel in channels), channels
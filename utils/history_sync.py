@@ -0,0 +1,241 @@
+"""
+Sincronización incremental del historial de partidas por jugador.
+Cada jugador tiene un estado en memoria con la marca de la partida más
+reciente ya vista y agregados acumulados (victorias, derrotas, kills,
+muertes y headshots) para varias ventanas deslizantes. Cada consulta solo
+descarga las partidas nuevas y actualiza los agregados en O(partidas nuevas).
+"""
+import asyncio
+from collections import deque
+from config import RECENT_WINDOWS, HISTORY_SYNC_MAX_PLAYERS
+from utils.cache import TTLCache
+from utils.leaderboard import leaderboard, RANKING_WINDOW
+from utils.match_columns import record_matches
+from utils.match_store import player_match_rows
+from utils.metrics import track_cache
+
+# Máximo de partidas que devuelve la API de historial por petición
+HISTORY_PAGE_LIMIT = 100
+
+
+class MatchSummary:
+    """Resumen de una partida para un jugador (suma de todos sus mapas)."""
+
+    __slots__ = ('match_id', 'started_at', 'finished_at', 'resolved', 'maps', 'wins', 'losses', 'kills', 'deaths', 'headshots')
+
+    def __init__(self, match_id, started_at=None, finished_at=None):
+        self.match_id = match_id
+        self.started_at = started_at
+        self.finished_at = finished_at
+        self.resolved = False  # Ya se conocen sus estadísticas (aunque el jugador no aparezca)
+        self.maps = 0
+        self.wins = 0
+        self.losses = 0
+        self.kills = 0
+        self.deaths = 0
+        self.headshots = 0
+
+    def fill(self, rows):
+        """Rellena el resumen con las filas del jugador en esta partida."""
+        self.resolved = True
+        for row in rows:
+            self.maps += 1
+            self.kills += row['kills']
+            self.deaths += row['deaths']
+            self.headshots += row['headshots']
+            if row['win']:
+                self.wins += 1
+            else:
+                self.losses += 1
+
+
+class WindowStats:
+    """Agregados acumulados de una ventana de partidas."""
+
+    __slots__ = ('matches', 'analyzed', 'wins', 'losses', 'kills', 'deaths', 'headshots')
+
+    def __init__(self):
+        self.matches = 0
+        self.analyzed = 0
+        self.wins = 0
+        self.losses = 0
+        self.kills = 0
+        self.deaths = 0
+        self.headshots = 0
+
+    def add(self, summary, sign=1, count_match=True):
+        """Suma (sign=1) o resta (sign=-1) un resumen de partida."""
+        if count_match:
+            self.matches += sign
+        if summary.maps:
+            self.analyzed += sign
+        self.wins += sign * summary.wins
+        self.losses += sign * summary.losses
+        self.kills += sign * summary.kills
+        self.deaths += sign * summary.deaths
+        self.headshots += sign * summary.headshots
+
+
+class PlayerHistory:
+    """Estado incremental del historial de un jugador."""
+
+    def __init__(self, player_id, windows=RECENT_WINDOWS):
+        self.player_id = player_id
+        self.watermark = None  # started_at de la partida más reciente vista
+        self.matches = deque()  # MatchSummary, la más reciente primero
+        self.index = {}  # match_id -> MatchSummary
+        self.windows = {size: WindowStats() for size in sorted(windows)}
+        self.max_window = max(windows)
+        self.exhausted = False  # Ya no hay partidas más antiguas en la API
+        self.lock = asyncio.Lock()
+
+    def push(self, summary):
+        """Añade una partida nueva (más reciente que todas las anteriores)."""
+        self.matches.appendleft(summary)
+        self.index[summary.match_id] = summary
+        for size, stats in self.windows.items():
+            stats.add(summary)
+            if len(self.matches) > size:
+                # La partida que estaba en la posición `size` sale de esta ventana
+                stats.add(self.matches[size], -1)
+        if len(self.matches) > self.max_window:
+            oldest = self.matches.pop()
+            del self.index[oldest.match_id]
+        if summary.started_at is not None and (self.watermark is None or summary.started_at > self.watermark):
+            self.watermark = summary.started_at
+
+    def append_older(self, summary):
+        """Añade una partida más antigua que todas las conocidas (relleno hacia atrás)."""
+        if len(self.matches) >= self.max_window:
+            return
+        position = len(self.matches)
+        self.matches.append(summary)
+        self.index[summary.match_id] = summary
+        for size, stats in self.windows.items():
+            if position < size:
+                stats.add(summary)
+        if summary.started_at is not None and (self.watermark is None or summary.started_at > self.watermark):
+            self.watermark = summary.started_at
+
+    def resolve(self, match_id, rows):
+        """Completa una partida pendiente con sus estadísticas."""
+        summary = self.index.get(match_id)
+        if summary is None or summary.resolved:
+            return
+        position = self.matches.index(summary)
+        affected = [stats for size, stats in self.windows.items() if position < size]
+        summary.fill(rows)
+        for stats in affected:
+            stats.add(summary, count_match=False)
+
+    def pending_ids(self, size=None):
+        """Partidas de las últimas `size` cuyas estadísticas aún no se conocen."""
+        size = size or self.max_window
+        return [summary.match_id for position, summary in enumerate(self.matches)
+                if position < size and not summary.resolved]
+
+    def window(self, size):
+        """Agregados de las últimas `size` partidas (debe ser una ventana configurada)."""
+        return self.windows[size]
+
+
+# Estados por jugador, acotados por LRU
+_histories = TTLCache(maxsize=HISTORY_SYNC_MAX_PLAYERS)
+track_cache('player_history', _histories)
+
+def get_player_history(player_id):
+    """Devuelve el estado incremental de un jugador, creándolo si no existe."""
+    history = _histories.get(player_id)
+    if history is None:
+        history = PlayerHistory(player_id)
+        _histories.set(player_id, history)
+    return history
+
+
+def _summary_from_item(item):
+    return MatchSummary(
+        item['match_id'],
+        started_at=item.get('started_at') or item.get('finished_at'),
+        finished_at=item.get('finished_at'),
+    )
+
+async def _resolve_pending(client, store, history, size, on_progress=None):
+    """Obtiene las estadísticas de las partidas pendientes: primero del almacén y luego de la API.
+
+    Cada partida se incorpora a los agregados en cuanto llega; `on_progress(hechas, total)`
+    se llama tras las del almacén y después de cada respuesta de la API.
+    """
+    pending = history.pending_ids(size)
+    if not pending:
+        return
+    stored = await store.get_rows(pending, history.player_id)
+    for match_id, rows in stored.items():
+        history.resolve(match_id, rows)
+    done = len(stored)
+    if on_progress is not None:
+        on_progress(done, len(pending))
+
+    missing = [match_id for match_id in pending if match_id not in stored]
+    new_matches = []
+
+    def resolved(match_id, response):
+        nonlocal done
+        done += 1
+        if response.ok:
+            match_stats = response.json()
+            history.resolve(match_id, player_match_rows(match_stats, history.player_id))
+            new_matches.append((match_id, history.index[match_id].finished_at, match_stats))
+        if on_progress is not None:
+            on_progress(done, len(pending))
+
+    await client.get_match_stats_many(missing, on_result=resolved)
+    await store.save_matches(new_matches)
+    # Las columnas en memoria de los jugadores de estas partidas las reciben sin volver a leer el almacén
+    record_matches(new_matches)
+
+async def sync_player_history(client, store, player_id, size, on_progress=None):
+    """Actualiza el estado de un jugador para poder responder con las últimas `size` partidas.
+
+    Descarga solo las partidas nuevas desde la última sincronización y, si
+    faltan partidas para llenar la ventana, las más antiguas que no se conocen.
+    Devuelve (respuesta del historial, PlayerHistory); siempre se hace al menos
+    una petición del historial. Si falla, el estado conserva lo ya conocido. `on_progress(hechas, total)`
+    informa de las estadísticas de partidas descargadas según van llegando.
+    """
+    history = get_player_history(player_id)
+    async with history.lock:
+        response = None
+        if history.watermark is not None:
+            # Solo partidas empezadas desde la última vista; las repetidas se descartan
+            response = await client.get_player_history(
+                player_id, offset=0, limit=HISTORY_PAGE_LIMIT, since=history.watermark
+            )
+            if response.ok:
+                new_items = [item for item in response.json().get('items', [])
+                             if item.get('match_id') and item['match_id'] not in history.index]
+                # La API devuelve primero la más reciente; se insertan de la más antigua a la más nueva
+                for item in reversed(new_items):
+                    history.push(_summary_from_item(item))
+
+        known = len(history.matches)
+        if response is None:
+            # Sin marca (un jugador sin partidas todavía) no hay petición incremental:
+            # se vuelve a pedir la primera página aunque la anterior viniera vacía
+            offset, limit = 0, size
+        elif known < size and not history.exhausted and response.ok:
+            offset, limit = known, size - known
+        else:
+            limit = 0
+        if limit:
+            response = await client.get_player_history(player_id, offset=offset, limit=limit)
+            if response.ok:
+                items = response.json().get('items', [])
+                for item in items:
+                    if item.get('match_id') and item['match_id'] not in history.index:
+                        history.append_older(_summary_from_item(item))
+                history.exhausted = len(items) < limit
+
+        await _resolve_pending(client, store, history, size, on_progress)
+        # K/D y % de victorias recientes para las clasificaciones (si el jugador está seguido)
+        leaderboard.update_window(player_id, history.window(RANKING_WINDOW))
+    return response, history
@@ -0,0 +1,207 @@
+"""
+Detector de direcciones IP y comandos "connect" en mensajes de chat.
+
+Los mensajes sin los puntos o dos puntos que necesita cualquier dirección (la
+gran mayoría del chat) se descartan con dos recuentos en C. El resto pasa por
+una única expresión regular precompilada que combina todos los casos, de modo
+que el texto se recorre una sola vez; cada candidato se valida después:
+- IPv4 con octetos 0-255, también ofuscadas ("1 . 2 . 3 . 4", "1[.]2[.]3[.]4")
+  y con puerto opcional (ip:puerto o ip.puerto); un puerto inválido no
+  descarta la dirección, y solo se rechazan las versiones de 5 números
+  ("1.2.3.4.5")
+- IPv6 (validada con ipaddress), con o sin corchetes
+- Comandos "connect <host>[:puerto]" y host:puerto sueltos
+Los dígitos y separadores de ancho completo se convierten a ASCII antes, pero
+solo en los mensajes que los contienen.
+"""
+import ipaddress
+import re
+from collections import namedtuple
+
+Detection = namedtuple('Detection', ('kind', 'value'))
+
+# Caracteres de ancho completo y separadores alternativos -> ASCII
+_NORMALIZE = {code: str(code - 0xFF10) for code in range(0xFF10, 0xFF1A)}
+_NORMALIZE.update({
+    0xFF0E: '.',  # ．
+    0x3002: '.',  # 。
+    0xFF61: '.',  # ｡
+    0xFF1A: ':',  # ：
+    0xFF3B: '[',  # ［
+    0xFF3D: ']',  # ］
+})
+# Tramos de esos caracteres: solo se traducen ellos, no el mensaje entero
+# (los acentos y emojis no obligan a copiar ni traducir nada)
+_WIDE = re.compile('[．０-：。｡［］]+')
+
+_DOT = r'\s*(?:\.|\[\.\]|\(\.\)|\{\.\})\s*'
+_HOSTNAME = re.compile(r'(?:[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?\.)+[A-Za-z]{2,63}')
+# La primera rama es la IPv4 (también ofuscada); sus guardas solo excluyen
+# un quinto número de 1-3 cifras antes o después ("1.2.3.4.5"), de modo que
+# "...1.2.3.4" o "1.2.3.4.27015" (puerto tras punto) sí cuentan. La segunda
+# solo se prueba al principio de un token y captura el destino de un connect,
+# los tokens con ":" (IPv6, host:puerto) y los host seguidos de " : puerto",
+# que se validan después: en casi todas las posiciones ambas fallan en uno o
+# dos pasos.
+_IPV4 = (
+    rf'(?P<a>\d(?<!\d\d)(?<!\d\.\d)\d{{0,2}}){_DOT}(?P<b>\d{{1,3}}){_DOT}(?P<c>\d{{1,3}}){_DOT}(?P<d>\d{{1,3}})'
+    r'(?!\d)(?!\.\d{1,3}(?!\d))(?:\s*:\s*(?P<port>\d{1,5})(?!\d)|\.(?P<dotport>\d{4,5})(?!\d))?'
+)
+_ADDRESS = re.compile(
+    _IPV4 + r'|(?<![\w.-])\[?(?:'
+    r'(?P<connect>(?i:connect))\s*[;:]?\s*(?P<target>[0-9A-Za-z-]*\.[0-9A-Za-z.-]*(?<=[A-Za-z]))'
+    r'|(?P<token>[0-9A-Za-z.%-]*:[0-9A-Za-z.:%-]*)'
+    r'|(?P<host>[0-9A-Za-z-]*\.[0-9A-Za-z.-]*)(?=\s*:\s*\d)'
+    r')\]?(?:\s*:\s*(?P<tokenport>\d{1,5})(?!\d))?'
+)
+# Para buscar una IPv4 dentro de un token descartado ("ip:10.0.0.1", "connect 1.2.3.4")
+_IPV4_ONLY = re.compile(_IPV4)
+
+
+def _valid_port(port):
+    return port is None or 0 < int(port) <= 65535
+
+def _ipv4(match):
+    octets = match.group('a', 'b', 'c', 'd')
+    for octet in octets:
+        # Con tres cifras la comparación de cadenas equivale a la numérica
+        if len(octet) == 3 and octet > '255':
+            return None
+    address = ".".join(octets)
+    if address[0] == '0' or '.0' in address:
+        address = ".".join(str(int(octet)) for octet in octets)
+    port = match['port'] or match['dotport']
+    # Con un puerto inválido la IP sigue siendo una IP
+    if port and _valid_port(port):
+        return Detection('ipv4', f"{address}:{int(port)}")
+    return Detection('ipv4', address)
+
+def _ipv6(candidate):
+    candidate = candidate.partition('%')[0]
+    # Descarta sin excepciones las horas y similares ("12:30:45"); "::" sola
+    # es válida pero no es una dirección que alguien comparta
+    if ('::' not in candidate and candidate.count(':') < 6) or not candidate.strip(':'):
+        return None
+    try:
+        return Detection('ipv6', str(ipaddress.IPv6Address(candidate)))
+    except ValueError:
+        return None
+
+def _host_port(host, port, kind):
+    """Detection de host[:puerto] ("sv:host.gg" -> "host.gg") o None."""
+    if port is None and ':' in host:
+        host, _, port = host.rpartition(':')
+        if not port.isdigit() or len(port) > 5:
+            return None
+    host = host.rpartition(':')[2]
+    if '.' not in host or not _HOSTNAME.fullmatch(host) or not _valid_port(port):
+        return None
+    return Detection(kind, host + (f":{int(port)}" if port else ""))
+
+def _detection(match):
+    """Detection del candidato o None si no es una dirección válida."""
+    if match['a'] is not None:
+        return _ipv4(match)
+    port = match['tokenport']
+    if match['target'] is not None:
+        return _host_port(match['target'], port, 'connect')
+    token = match['token']
+    if token is None:
+        return _host_port(match['host'], port, 'host_port')
+    if token.count(':') >= 2:
+        detection = _ipv6(token)
+        if detection is not None:
+            return detection
+    if '.' not in token:
+        return None
+    return _host_port(token, port, 'host_port')
+
+def _may_contain_address(text):
+    """Pre-filtro con dos recuentos en C: una IPv4 necesita tres puntos, una IPv6
+    dos ":" y un host, un punto y un ":" o un connect delante."""
+    dots = text.count('.')
+    if dots >= 3:
+        return True
+    colons = text.count(':')
+    if colons >= 2 or (colons and dots):
+        return True
+    return bool(dots) and ('onnect' in text or 'ONNECT' in text)
+
+def _scan(text, first=False, endpos=None):
+    """[(inicio, fin, Detection)] de las direcciones de text[:endpos], en orden (solo la primera con first=True)."""
+    endpos = len(text) if endpos is None else endpos
+    found = []
+    match = _ADDRESS.search(text, 0, endpos)
+    while match is not None:
+        detection = _detection(match)
+        if detection is not None:
+            found.append((match.start(), match.end(), detection))
+            if first:
+                break
+            match = _ADDRESS.search(text, match.end(), endpos)
+        elif match['a'] is not None:
+            match = _ADDRESS.search(text, match.start() + 1, endpos)
+        else:
+            # El candidato no es una dirección pero puede contener una IPv4
+            # ("ip:10.0.0.1"); se busca dentro y se sigue tras él, así el
+            # recorrido es lineal incluso con pegados largos
+            end = match.end()
+            inner = _IPV4_ONLY.search(text, match.start(), end)
+            while inner is not None:
+                detection = _ipv4(inner)
+                if detection is not None:
+                    found.append((inner.start(), inner.end(), detection))
+                    if first:
+                        return found
+                    inner = _IPV4_ONLY.search(text, inner.end(), end)
+                else:
+                    inner = _IPV4_ONLY.search(text, inner.start() + 1, end)
+            match = _ADDRESS.search(text, end, endpos)
+    return found
+
+def normalize(text):
+    """Convierte dígitos y separadores de ancho completo a ASCII."""
+    if text.isascii():
+        return text
+    return _WIDE.sub(_normalize_span, text)
+
+def _normalize_span(match):
+    return match.group().translate(_NORMALIZE)
+
+def detect(text):
+    """Devuelve la primera dirección detectada como Detection(kind, value) o None."""
+    if not text:
+        return None
+    wide = None if text.isascii() else _WIDE.search(text)
+    if wide is not None:
+        # Lo anterior al primer carácter de ancho completo no cambia al normalizar:
+        # si ya hay una dirección ahí no hace falta copiar y traducir el resto
+        found = _scan(text, first=True, endpos=wide.start())
+        if found and found[0][1] < wide.start():
+            return found[0][2]
+        text = normalize(text)
+    if not _may_contain_address(text):
+        return None
+    found = _scan(text, first=True)
+    return found[0][2] if found else None
+
+REDACTED = "[IP oculta]"
+
+def redact(text):
+    """Sustituye las direcciones IPv4/IPv6 del texto por un marcador (para logs)."""
+    if not text:
+        return text
+    text = normalize(text)
+    if not _may_contain_address(text):
+        return text
+    pieces = []
+    last = 0
+    for start, end, detection in _scan(text):
+        if detection.kind in ('ipv4', 'ipv6'):
+            pieces.append(text[last:start])
+            pieces.append(REDACTED)
+            last = end
+    if not pieces:
+        return text
+    pieces.append(text[last:])
+    return "".join(pieces)
@@ -0,0 +1,148 @@
+"""
+Clasificaciones por servidor de los jugadores seguidos con /seguimiento.
+Para cada servidor y métrica (ELO, K/D y % de victorias recientes) se mantiene
+un índice ordenado que se actualiza de forma incremental cuando cambia un
+valor: el ELO lo aporta el seguimiento en segundo plano y el K/D y el
+% de victorias, las partidas ya sincronizadas (últimas RECENT_WINDOWS[0]).
+/ranking sirve cada página con una búsqueda binaria y un slice, en
+O(log n + k), sin ninguna petición a FACEIT.
+"""
+from bisect import bisect_left, insort
+from config import RECENT_WINDOWS
+
+# Métrica -> nombre visible
+METRICS = {
+    'elo': "ELO",
+    'kd': "K/D",
+    'winrate': "% victorias",
+}
+# Partidas recientes con las que se calculan el K/D y el % de victorias
+RANKING_WINDOW = RECENT_WINDOWS[0]
+
+
+class RankingIndex:
+    """Jugadores ordenados de mayor a menor valor de una métrica."""
+
+    def __init__(self):
+        self._keys = []  # (-valor, nickname en minúsculas, player_id), ordenada
+        self._by_player = {}  # player_id -> clave actual
+
+    def __len__(self):
+        return len(self._keys)
+
+    def update(self, player_id, nickname, value):
+        """Inserta o mueve al jugador; O(log n) para localizarlo."""
+        self.remove(player_id)
+        key = (-value, nickname.lower(), player_id)
+        insort(self._keys, key)
+        self._by_player[player_id] = key
+
+    def remove(self, player_id):
+        key = self._by_player.pop(player_id, None)
+        if key is not None:
+            del self._keys[bisect_left(self._keys, key)]
+
+    def rank(self, player_id):
+        """Posición del jugador (1 = primero) o None si no está en el índice."""
+        key = self._by_player.get(player_id)
+        return bisect_left(self._keys, key) + 1 if key is not None else None
+
+    def page(self, offset, limit):
+        """[(posición, player_id, valor)] de las posiciones offset+1 .. offset+limit."""
+        return [(offset + index + 1, player_id, -negative)
+                for index, (negative, _, player_id) in enumerate(self._keys[offset:offset + limit])]
+
+
+class _Entry:
+    __slots__ = ('nickname', 'guilds', 'values')
+
+    def __init__(self, nickname):
+        self.nickname = nickname
+        self.guilds = set()
+        self.values = {}  # métrica -> valor
+
+
+class Leaderboard:
+    """Índices por (servidor, métrica) de los jugadores seguidos."""
+
+    def __init__(self):
+        self._entries = {}  # player_id -> _Entry
+        self._indexes = {}  # (guild_id, métrica) -> RankingIndex
+
+    def index(self, guild_id, metric):
+        index = self._indexes.get((guild_id, metric))
+        if index is None:
+            index = self._indexes[(guild_id, metric)] = RankingIndex()
+        return index
+
+    def track(self, guild_id, player_id, nickname):
+        """Añade el jugador a las clasificaciones del servidor con los valores que ya se conocen."""
+        entry = self._entries.get(player_id)
+        if entry is None:
+            entry = self._entries[player_id] = _Entry(nickname)
+        entry.guilds.add(guild_id)
+        for metric, value in entry.values.items():
+            self.index(guild_id, metric).update(player_id, entry.nickname, value)
+
+    def untrack(self, guild_id, player_id):
+        entry = self._entries.get(player_id)
+        if entry is None:
+            return
+        entry.guilds.discard(guild_id)
+        for metric in METRICS:
+            index = self._indexes.get((guild_id, metric))
+            if index is not None:
+                index.remove(player_id)
+        if not entry.guilds:
+            del self._entries[player_id]
+
+    def update(self, player_id, nickname=None, **values):
+        """Actualiza métricas de un jugador seguido (los no seguidos se ignoran).
+
+        update(player_id, elo=2100) o update(player_id, kd=1.2, winrate=55.0);
+        un valor None lo quita de esa clasificación.
+        """
+        entry = self._entries.get(player_id)
+        if entry is None:
+            return
+        renamed = nickname is not None and nickname != entry.nickname
+        if renamed:
+            entry.nickname = nickname
+            values = {**entry.values, **values}
+        for metric, value in values.items():
+            if value is None:
+                entry.values.pop(metric, None)
+            elif not renamed and entry.values.get(metric) == value:
+                continue
+            else:
+                entry.values[metric] = value
+            for guild_id in entry.guilds:
+                if value is None:
+                    self.index(guild_id, metric).remove(player_id)
+                else:
+                    self.index(guild_id, metric).update(player_id, entry.nickname, value)
+
+    def update_window(self, player_id, window):
+        """Actualiza K/D y % de victorias a partir de unos agregados de partidas (WindowStats o Totals)."""
+        maps_played = window.wins + window.losses
+        if not maps_played:
+            return
+        kd = window.kills / window.deaths if window.deaths else float(window.kills)
+        self.update(player_id, kd=round(kd, 2), winrate=round(window.wins / maps_played * 100, 1))
+
+    def page(self, guild_id, metric, page, page_size=10):
+        """(filas [(posición, nickname, valor)], total) de una página (empezando en 1)."""
+        index = self._indexes.get((guild_id, metric))
+        if index is None:
+            return [], 0
+        rows = [(rank, self._entries[player_id].nickname, value)
+                for rank, player_id, value in index.page((page - 1) * page_size, page_size)]
+        return rows, len(index)
+
+    def rank(self, guild_id, metric, player_id):
+        index = self._indexes.get((guild_id, metric))
+        return index.rank(player_id) if index is not None else None
+
+
+# Instancia compartida
+leaderboard = Leaderboard()
@@ -0,0 +1,129 @@
+"""
+Configuración del sistema de logs del bot.
+Los módulos usan loggers propios (logging.getLogger(__name__)). Los registros
+se encolan desde el bucle de eventos y un hilo en segundo plano los formatea
+(JSON estructurado o texto) y los escribe, de modo que la E/S nunca bloquea
+al bot. Incluye muestreo para eventos de alto volumen y oculta las IPs.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import time
+from datetime import datetime, timezone
+from config import LOG_LEVEL, LOG_FORMAT, LOG_SAMPLE_PER_SECOND
+from utils.ip_detector import redact
+
+# Atributos estándar de LogRecord; el resto se considera un campo estructurado
+_RESERVED = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'sample'}
+
+_listener = None
+
+
+def _record_fields(record):
+    return {key: value for key, value in vars(record).items() if key not in _RESERVED}
+
+
+class JsonFormatter(logging.Formatter):
+    """Un objeto JSON por línea con los campos extra del registro."""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': redact(record.getMessage()),
+        }
+        for key, value in _record_fields(record).items():
+            entry[key] = redact(value) if isinstance(value, str) else value
+        if record.exc_text:
+            entry['exc'] = redact(record.exc_text)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Formato legible para desarrollo, con los campos extra al final."""
+
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)-7s %(name)s: %(message)s')
+
+    def format(self, record):
+        line = super().format(record)
+        fields = _record_fields(record)
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return redact(line)
+
+
+class SamplingFilter(logging.Filter):
+    """Limita los eventos marcados con extra={'sample': clave} a N por segundo y clave.
+
+    El siguiente registro que pasa lleva en 'suppressed' cuántos se descartaron.
+    """
+
+    def __init__(self, per_second=LOG_SAMPLE_PER_SECOND):
+        super().__init__()
+        self.per_second = per_second
+        self._windows = {}  # clave -> [segundo, emitidos, descartados]
+
+    def filter(self, record):
+        key = getattr(record, 'sample', None)
+        if key is None:
+            return True
+        second = int(time.monotonic())
+        window = self._windows.get(key)
+        if window is None or window[0] != second:
+            suppressed = window[2] if window else 0
+            window = self._windows[key] = [second, 0, 0]
+            if suppressed:
+                record.suppressed = suppressed
+        if window[1] >= self.per_second:
+            window[2] += 1
+            return False
+        window[1] += 1
+        return True
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler que deja el formateo al hilo del listener."""
+
+    def prepare(self, record):
+        # Solo se resuelven los argumentos del mensaje; el formateo (y la
+        # redacción de IPs) se hacen en el hilo de escritura
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def setup_logging(level=LOG_LEVEL, fmt=LOG_FORMAT):
+    """Configura el logging raíz con cola y escritura en segundo plano (idempotente)."""
+    global _listener
+    if _listener is not None:
+        return
+    log_queue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JsonFormatter() if fmt == 'json' else TextFormatter())
+
+    queue_handler = _QueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter())
+
+    root = logging.getLogger()
+    root.handlers[:] = [queue_handler]
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+def stop_logging():
+    """Vacía la cola y detiene el hilo de escritura."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,227 @@
+"""
+Almacén columnar en memoria de las estadísticas de partidas por jugador.
+Las filas de utils.match_store (una por jugador y mapa) se cargan en columnas
+compactas de array/bytearray ordenadas por fecha (16 bytes por mapa jugado en
+lugar de un diccionario por fila). Los agregados (K/D, % de headshots,
+% de victorias, desglose por mapa y tendencia) se calculan con operaciones de
+la biblioteca estándar implementadas en C (slicing, bytes.translate,
+itertools.compress y sum), sin bucles de Python por fila, de modo que
+/historial responde en milisegundos solo con datos locales.
+"""
+from array import array
+from bisect import bisect_left
+from itertools import compress
+from config import HISTORY_SYNC_MAX_PLAYERS
+from utils.cache import TTLCache
+from utils.match_store import parse_match_rows
+from utils.metrics import track_cache
+
+# Códigos de mapa compartidos por todos los jugadores (0 = desconocido, máximo 255)
+_map_codes = {'': 0}
+_map_names = ['']
+# Mapas del pool competitivo: se sugieren aunque no se haya cargado ninguna partida
+DEFAULT_MAPS = ('de_ancient', 'de_anubis', 'de_dust2', 'de_inferno', 'de_mirage', 'de_nuke', 'de_train', 'de_vertigo')
+_masks = {}  # código -> tabla de bytes.translate que deja 1 en ese mapa y 0 en el resto
+
+
+def map_code(name):
+    """Código de un mapa, asignándole uno nuevo si no se había visto."""
+    code = _map_codes.get(name)
+    if code is None:
+        if len(_map_names) >= 256:
+            return 0
+        code = _map_codes[name] = len(_map_names)
+        _map_names.append(name)
+    return code
+
+def find_map(text):
+    """Código del mapa que coincide con el texto ("mirage" -> de_mirage) o None."""
+    text = _short_map_name(text.strip().lower())
+    for code, name in enumerate(_map_names):
+        if code and _short_map_name(name.lower()) == text:
+            return code
+    return None
+
+def _short_map_name(name):
+    # Sin str.removeprefix, que no existe en Python 3.8
+    return name[3:] if name.startswith('de_') else name
+
+def map_name(code):
+    return _map_names[code] or "desconocido"
+
+def map_names():
+    """Mapas conocidos, en el orden de su código (sin el desconocido), seguidos de los
+    del pool competitivo que aún no han aparecido en ninguna partida."""
+    known = _map_names[1:]
+    return known + [name for name in DEFAULT_MAPS if name not in _map_codes]
+
+def _mask_table(code):
+    table = _masks.get(code)
+    if table is None:
+        table = _masks[code] = bytes(1 if value == code else 0 for value in range(256))
+    return table
+
+
+class Totals:
+    """Sumas de una selección de mapas jugados y los ratios derivados."""
+
+    __slots__ = ('matches', 'wins', 'kills', 'deaths', 'headshots')
+
+    def __init__(self, matches, wins, kills, deaths, headshots):
+        self.matches = matches
+        self.wins = wins
+        self.kills = kills
+        self.deaths = deaths
+        self.headshots = headshots
+
+    @property
+    def losses(self):
+        return self.matches - self.wins
+
+    @property
+    def kd(self):
+        return self.kills / self.deaths if self.deaths else float(self.kills)
+
+    @property
+    def hs_rate(self):
+        return self.headshots / self.kills * 100 if self.kills else 0.0
+
+    @property
+    def win_rate(self):
+        return self.wins / self.matches * 100 if self.matches else 0.0
+
+
+class PlayerColumns:
+    """Estadísticas de un jugador por mapa jugado, de la más antigua a la más reciente."""
+
+    __slots__ = ('kills', 'deaths', 'headshots', 'wins', 'maps', 'timestamps')
+
+    def __init__(self):
+        self.kills = array('H')
+        self.deaths = array('H')
+        self.headshots = array('H')
+        self.wins = bytearray()  # 1 = victoria
+        self.maps = bytearray()  # código de mapa
+        self.timestamps = array('q')
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def _rows(self):
+        return list(zip(self.timestamps, self.maps, self.kills, self.deaths, self.headshots, self.wins))
+
+    def extend(self, rows):
+        """Añade filas (fecha, mapa, kills, muertes, headshots, victoria) ordenadas por fecha.
+
+        Lo normal es que sean más recientes que las guardadas; si no, las columnas
+        se reconstruyen en orden (solo ocurre al completar partidas antiguas).
+        Las filas que ya están (misma fecha y mapa) se ignoran: una partida puede
+        llegar después de que las columnas se cargaran del almacén que ya la tenía.
+        """
+        if not rows:
+            return
+        coded = [(timestamp, name if isinstance(name, int) else map_code(name or ''), kills, deaths, headshots, int(win))
+                 for timestamp, name, kills, deaths, headshots, win in rows]
+        if self.timestamps and coded[0][0] <= self.timestamps[-1]:
+            start = bisect_left(self.timestamps, coded[0][0])
+            known = set(zip(self.timestamps[start:], self.maps[start:]))
+            coded = [row for row in coded if (row[0], row[1]) not in known]
+            if not coded:
+                return
+        if self.timestamps and coded[0][0] < self.timestamps[-1]:
+            coded = sorted(self._rows() + coded, key=lambda row: row[0])
+            for column in (self.kills, self.deaths, self.headshots, self.timestamps):
+                del column[:]
+            del self.wins[:]
+            del self.maps[:]
+        timestamps, maps, kills, deaths, headshots, wins = zip(*coded)
+        self.timestamps.extend(timestamps)
+        self.maps.extend(maps)
+        self.kills.extend(kills)
+        self.deaths.extend(deaths)
+        self.headshots.extend(headshots)
+        self.wins.extend(wins)
+
+    def _columns(self):
+        return (self.kills, self.deaths, self.headshots, self.wins, self.maps, self.timestamps)
+
+    @classmethod
+    def _from(cls, columns):
+        selection = cls()
+        selection.kills, selection.deaths, selection.headshots, selection.wins, selection.maps, selection.timestamps = columns
+        return selection
+
+    def slice(self, start=None, stop=None):
+        """Columnas de las posiciones [start:stop] (copia)."""
+        return self._from([column[start:stop] for column in self._columns()])
+
+    def select(self, last=None, code=None):
+        """Columnas de los últimos `last` mapas jugados (opcionalmente solo del mapa `code`)."""
+        selection = self
+        if code is not None:
+            mask = self.maps.translate(_mask_table(code))
+            selection = self._from([
+                array(column.typecode, compress(column, mask)) if isinstance(column, array)
+                else bytearray(compress(column, mask))
+                for column in self._columns()
+            ])
+        return selection.slice(-last) if last else selection.slice()
+
+    def totals(self, code=None):
+        """Sumas de la selección (opcionalmente solo del mapa `code`)."""
+        if code is None:
+            return Totals(len(self), self.wins.count(1), sum(self.kills), sum(self.deaths), sum(self.headshots))
+        mask = self.maps.translate(_mask_table(code))
+        return Totals(mask.count(1), sum(compress(self.wins, mask)), sum(compress(self.kills, mask)),
+                      sum(compress(self.deaths, mask)), sum(compress(self.headshots, mask)))
+
+    def by_map(self):
+        """[(nombre del mapa, Totals)] de la selección, del más jugado al menos."""
+        breakdown = [(map_name(code), self.totals(code)) for code in set(self.maps)]
+        return sorted(breakdown, key=lambda item: item[1].matches, reverse=True)
+
+    def trend(self):
+        """(Totals de la mitad más antigua, Totals de la más reciente) de la selección."""
+        half = len(self) // 2
+        return self.slice(0, half).totals(), self.slice(half).totals()
+
+    def period(self):
+        """(primera, última) fecha de la selección o None si está vacía."""
+        return (self.timestamps[0], self.timestamps[-1]) if self.timestamps else None
+
+
+# Columnas por jugador, acotadas por LRU
+_columns = TTLCache(maxsize=HISTORY_SYNC_MAX_PLAYERS)
+track_cache('match_columns', _columns)
+
+async def _load(store, player_id):
+    columns = PlayerColumns()
+    columns.extend(await store.get_player_rows(player_id))
+    return columns
+
+async def get_player_columns(store, player_id):
+    """Columnas de un jugador, cargadas del almacén de partidas la primera vez."""
+    return await _columns.get_or_load(player_id, lambda: _load(store, player_id))
+
+def record_matches(matches):
+    """Añade partidas recién descargadas a las columnas en memoria de sus jugadores.
+
+    `matches` es una lista de (match_id, finished_at, match_stats). Los jugadores
+    sin columnas en memoria las cargarán del almacén, que ya las tiene.
+    """
+    rows_by_player = {}
+    for _, finished_at, match_stats in matches:
+        for row in parse_match_rows(match_stats):
+            if row['player_id'] not in _columns:
+                continue
+            if finished_at is None:
+                # Sin fecha de fin el almacén usa la de guardado, que aquí no se conoce:
+                # no se puede saber si la fila ya está, así que se recargan del almacén
+                _columns.pop(row['player_id'])
+                rows_by_player.pop(row['player_id'], None)
+                continue
+            rows_by_player.setdefault(row['player_id'], []).append(
+                (finished_at, row['map'], row['kills'], row['deaths'], row['headshots'], row['win'])
+            )
+    for player_id, rows in rows_by_player.items():
+        _columns.get(player_id).extend(sorted(rows, key=lambda row: row[0]))
@@ -0,0 +1,195 @@
+"""
+Almacén persistente de estadísticas de partidas de FACEIT.
+Guarda en SQLite las filas ya procesadas de /matches/{id}/stats (una por
+jugador y mapa), de modo que tras un reinicio /recientes solo pide a la API
+las partidas que no se han visto nunca.
+"""
+import time
+from config import MATCH_STORE_PATH, MATCH_STORE_MAX_MATCHES
+from utils.storage import SQLiteStore
+
+
+def parse_match_rows(match_stats):
+    """Convierte la respuesta de /matches/{id}/stats en filas por jugador y mapa."""
+    rows = []
+    for map_index, round_info in enumerate(match_stats.get('rounds', [])):
+        map_name = round_info.get('round_stats', {}).get('Map', '')
+        for team in round_info.get('teams', []):
+            # La API indica la victoria en team_stats; se mantiene 'team_win' por compatibilidad
+            team_win = team.get('team_stats', {}).get('Team Win', team.get('team_win', '0'))
+            for player in team.get('players', []):
+                player_stats = player.get('player_stats', {})
+                rows.append({
+                    'player_id': player.get('player_id'),
+                    'map_index': map_index,
+                    'map': map_name,
+                    'kills': int(player_stats.get('Kills', '0')),
+                    'deaths': int(player_stats.get('Deaths', '0')),
+                    'headshots': int(player_stats.get('Headshots', '0')),
+                    'win': str(team_win) == '1',
+                })
+    return rows
+
+def player_match_rows(match_stats, player_id):
+    """Filas de un único jugador dentro de una partida."""
+    return [row for row in parse_match_rows(match_stats) if row['player_id'] == player_id]
+
+
+class MatchStore(SQLiteStore):
+    """Filas de partidas indexadas por match_id y player_id, con retención acotada."""
+
+    SCHEMA = (
+        """CREATE TABLE IF NOT EXISTS matches (
+            match_id TEXT PRIMARY KEY,
+            finished_at INTEGER,
+            stored_at INTEGER NOT NULL
+        )""",
+        """CREATE TABLE IF NOT EXISTS match_rows (
+            match_id TEXT NOT NULL,
+            player_id TEXT NOT NULL,
+            map_index INTEGER NOT NULL,
+            map TEXT,
+            kills INTEGER NOT NULL,
+            deaths INTEGER NOT NULL,
+            headshots INTEGER NOT NULL,
+            win INTEGER NOT NULL,
+            PRIMARY KEY (match_id, player_id, map_index)
+        ) WITHOUT ROWID""",
+        "CREATE INDEX IF NOT EXISTS match_rows_player ON match_rows (player_id, match_id)",
+        "CREATE INDEX IF NOT EXISTS matches_age ON matches (finished_at, stored_at)",
+    )
+
+    def __init__(self, path=MATCH_STORE_PATH, max_matches=MATCH_STORE_MAX_MATCHES):
+        super().__init__(path)
+        self.max_matches = max_matches
+        self._inserted_since_compaction = 0
+
+    @staticmethod
+    def _get_rows(conn, match_ids, player_id):
+        result = {}
+        # Lotes pequeños para no superar el límite de parámetros de SQLite
+        for start in range(0, len(match_ids), 500):
+            chunk = match_ids[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            for row in conn.execute(f"SELECT match_id FROM matches WHERE match_id IN ({placeholders})", chunk):
+                result[row['match_id']] = []
+            for row in conn.execute(
+                f"""SELECT match_id, map_index, map, kills, deaths, headshots, win FROM match_rows
+                    WHERE player_id = ? AND match_id IN ({placeholders}) ORDER BY map_index""",
+                [player_id, *chunk],
+            ):
+                result[row['match_id']].append({
+                    'player_id': player_id,
+                    'map_index': row['map_index'],
+                    'map': row['map'],
+                    'kills': row['kills'],
+                    'deaths': row['deaths'],
+                    'headshots': row['headshots'],
+                    'win': bool(row['win']),
+                })
+        return result
+
+    async def get_rows(self, match_ids, player_id):
+        """Devuelve {match_id: [filas del jugador]} para las partidas ya almacenadas.
+
+        Las partidas que no aparecen en el resultado hay que pedirlas a la API;
+        una lista vacía indica que la partida está guardada pero el jugador no jugó en ella.
+        """
+        if not match_ids:
+            return {}
+        return await self.run(self._get_rows, list(match_ids), player_id)
+
+    @staticmethod
+    def _get_player_rows(conn, player_id):
+        return [tuple(row) for row in conn.execute(
+            """SELECT COALESCE(m.finished_at, m.stored_at), r.map, r.kills, r.deaths, r.headshots, r.win
+               FROM match_rows r JOIN matches m ON m.match_id = r.match_id
+               WHERE r.player_id = ?
+               ORDER BY COALESCE(m.finished_at, m.stored_at), r.match_id, r.map_index""",
+            (player_id,),
+        )]
+
+    async def get_player_rows(self, player_id):
+        """Todas las filas guardadas de un jugador como tuplas (fecha, mapa, kills, muertes, headshots, victoria),
+        de la más antigua a la más reciente."""
+        return await self.run(self._get_player_rows, player_id)
+
+    @staticmethod
+    def _save_matches(conn, matches, stored_at):
+        with conn:
+            for match_id, finished_at, rows in matches:
+                conn.execute(
+                    "INSERT OR REPLACE INTO matches (match_id, finished_at, stored_at) VALUES (?, ?, ?)",
+                    (match_id, finished_at, stored_at),
+                )
+                conn.executemany(
+                    """INSERT OR REPLACE INTO match_rows
+                       (match_id, player_id, map_index, map, kills, deaths, headshots, win)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                    [(match_id, row['player_id'], row['map_index'], row['map'], row['kills'],
+                      row['deaths'], row['headshots'], int(row['win']))
+                     for row in rows if row['player_id']],
+                )
+
+    async def save_matches(self, matches):
+        """Guarda varias partidas en una sola transacción.
+
+        `matches` es una lista de tuplas (match_id, finished_at, match_stats).
+        """
+        if not matches:
+            return
+        parsed = [(match_id, finished_at, parse_match_rows(match_stats))
+                  for match_id, finished_at, match_stats in matches]
+        await self.run(self._save_matches, parsed, int(time.time()))
+        self._inserted_since_compaction += len(parsed)
+        # Compactar cuando se ha insertado un 10% de la capacidad desde la última vez
+        if self._inserted_since_compaction >= max(1, self.max_matches // 10):
+            await self.compact()
+
+    @staticmethod
+    def _compact(conn, max_matches, vacuum):
+        with conn:
+            removed = conn.execute(
+                """DELETE FROM matches WHERE match_id IN (
+                       SELECT match_id FROM matches
+                       ORDER BY COALESCE(finished_at, stored_at) DESC
+                       LIMIT -1 OFFSET ?
+                   )""",
+                (max_matches,),
+            ).rowcount
+            conn.execute("DELETE FROM match_rows WHERE match_id NOT IN (SELECT match_id FROM matches)")
+        if vacuum and removed:
+            conn.execute("VACUUM")
+        return removed
+
+    async def compact(self, vacuum=True):
+        """Elimina las partidas más antiguas por encima del límite y recupera espacio.
+
+        Devuelve el número de partidas eliminadas.
+        """
+        self._inserted_since_compaction = 0
+        return await self.run(self._compact, self.max_matches, vacuum)
+
+    @staticmethod
+    def _count(conn):
+        return conn.execute("SELECT COUNT(*) FROM matches").fetchone()[0]
+
+    async def count(self):
+        return await self.run(self._count)
+
+
+# Instancia compartida
+_store = None
+
+def get_match_store():
+    """Devuelve el almacén de partidas compartido, creándolo si no existe."""
+    global _store
+    if _store is None:
+        _store = MatchStore()
+    return _store
+
+async def close_match_store():
+    global _store
+    if _store is not None:
+        await _store.close()
+        _store = None
@@ -0,0 +1,233 @@
+"""
+Métricas del bot en formato de texto de Prometheus.
+Contadores, gauges e histogramas con etiquetas, registrados en un registro
+global y expuestos en la ruta /metrics del servidor HTTP (utils.web_server).
+Todas las actualizaciones ocurren en el bucle de eventos, así que no hay
+bloqueos: incrementar un contador es una operación sobre un diccionario.
+Los valores que ya existen en otros módulos (cachés, planificador, cola de
+moderación) se leen en el momento de la consulta mediante colectores.
+"""
+import bisect
+import math
+
+# Buckets de latencia por defecto (segundos)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and math.isnan(value):
+        return "NaN"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{_escape(value)}"' for name, value in extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels):
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} espera las etiquetas {self.labelnames}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def samples(self):
+        return []
+
+    def render(self):
+        return self.header() + self.samples()
+
+
+class Counter(_Metric):
+    """Valor acumulado que solo crece (p. ej. mensajes revisados)."""
+
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(self._values.items())
+        ]
+
+
+class Gauge(_Metric):
+    """Valor instantáneo que puede subir o bajar (p. ej. retraso del bucle)."""
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+
+    def set(self, value, **labels):
+        self._values[self._key(labels)] = value
+
+    def samples(self):
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(self._values.items())
+        ]
+
+
+class Histogram(_Metric):
+    """Distribución de observaciones en buckets acumulados, con suma y cuenta."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}  # etiquetas -> [conteos por bucket..., +Inf, suma]
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def samples(self):
+        lines = []
+        bounds = self.buckets + (math.inf,)
+        for key, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, series):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, (('le', _format_value(bound)),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class GaugeFunc(_Metric):
+    """Gauge calculado al exportar: la función devuelve pares (valores de etiquetas, valor)."""
+
+    def __init__(self, name, documentation, labelnames, fn, kind='gauge'):
+        super().__init__(name, documentation, labelnames)
+        self.fn = fn
+        self.kind = kind
+
+    def samples(self):
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in self.fn()
+        ]
+
+
+class Registry:
+    """Conjunto de métricas exportadas juntas."""
+
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Métrica duplicada: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge_func(self, name, documentation, labelnames, fn, kind='gauge'):
+        return self.register(GaugeFunc(name, documentation, labelnames, fn, kind))
+
+    def render(self):
+        """Texto de exposición de Prometheus (versión 0.0.4)."""
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# Moderación de mensajes
+messages_scanned = registry.counter(
+    'botardo_messages_scanned_total', "Mensajes revisados en canales vigilados", ('event',)
+)
+messages_flagged = registry.counter(
+    'botardo_messages_flagged_total', "Mensajes con IP detectada", ('event', 'kind')
+)
+message_deletes = registry.counter(
+    'botardo_message_deletes_total', "Mensajes marcados según el resultado del borrado", ('result',)
+)
+
+# Comandos slash (latencia de principio a fin del manejador)
+command_latency = registry.histogram(
+    'botardo_command_latency_seconds', "Duración de los comandos slash", ('command', 'status')
+)
+
+# API de FACEIT
+faceit_request_latency = registry.histogram(
+    'botardo_faceit_request_latency_seconds', "Duración de las peticiones a FACEIT", ('endpoint', 'status')
+)
+# Planificador de peticiones (los actualiza utils.rate_limiter)
+faceit_queue_wait = registry.histogram(
+    'botardo_faceit_queue_wait_seconds', "Espera por un token de FACEIT por prioridad", ('priority',),
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+faceit_throttled = registry.counter('botardo_faceit_throttled_total', "Respuestas 429 de FACEIT")
+
+# Bucle de eventos (los actualiza utils.watchdog)
+loop_lag = registry.gauge('botardo_event_loop_lag_seconds', "Último retraso medido del bucle de eventos")
+loop_lag_histogram = registry.histogram(
+    'botardo_event_loop_lag_distribution_seconds', "Distribución del retraso del bucle de eventos",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+)
+
+
+# Cachés en memoria: nombre -> TTLCache (cada módulo registra las suyas)
+_caches = {}
+
+def track_cache(name, cache):
+    """Exporta las estadísticas de una TTLCache con la etiqueta cache=name."""
+    _caches[name] = cache
+
+def _cache_samples(field):
+    return [((name,), cache.stats()[field]) for name, cache in sorted(_caches.items())]
+
+registry.gauge_func('botardo_cache_hits_total', "Aciertos de caché", ('cache',), lambda: _cache_samples('hits'), kind='counter')
+registry.gauge_func('botardo_cache_misses_total', "Fallos de caché", ('cache',), lambda: _cache_samples('misses'), kind='counter')
+registry.gauge_func('botardo_cache_hit_ratio', "Proporción de aciertos de caché", ('cache',), lambda: _cache_samples('hit_rate'))
+registry.gauge_func('botardo_cache_entries', "Entradas en caché", ('cache',), lambda: _cache_samples('size'))
+
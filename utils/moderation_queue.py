@@ -0,0 +1,173 @@
+"""
+Cola de acciones de moderación por canal.
+Los mensajes marcados se acumulan por canal durante una ventana corta y se
+eliminan con borrado masivo (hasta 100 por llamada), enviando un único aviso
+que menciona a todos los usuarios afectados. El primer mensaje tras un periodo
+tranquilo se procesa de inmediato; solo las ráfagas esperan a la ventana.
+"""
+import asyncio
+import logging
+import discord
+from config import MODERATION_BATCH_WINDOW
+from utils.metrics import registry, message_deletes
+
+logger = logging.getLogger(__name__)
+
+# Límite de mensajes por llamada de borrado masivo en Discord
+BULK_DELETE_LIMIT = 100
+# Menciones máximas en el aviso conjunto (los mensajes de Discord tienen 2000 caracteres)
+MAX_WARNING_MENTIONS = 25
+
+
+class _FlaggedMessage:
+    __slots__ = ('message', 'edited', 'notify')
+
+    def __init__(self, message, edited, notify):
+        self.message = message
+        self.edited = edited
+        self.notify = notify
+
+
+class _ChannelBatch:
+    __slots__ = ('channel', 'items', 'task', 'last_flush')
+
+    def __init__(self, channel):
+        self.channel = channel
+        self.items = []
+        self.task = None
+        self.last_flush = float('-inf')
+
+
+def _warning_text(items):
+    """Aviso para los mensajes eliminados; el texto de siempre si es un único mensaje."""
+    if len(items) == 1:
+        item = items[0]
+        kind = "tu mensaje editado" if item.edited else "tu mensaje"
+        return f"{item.message.author.mention} {kind} ha sido eliminado porque contenía una dirección IP."
+    authors = list(dict.fromkeys(item.message.author.mention for item in items))
+    mentions = " ".join(authors[:MAX_WARNING_MENTIONS])
+    if len(authors) > MAX_WARNING_MENTIONS:
+        mentions += f" y {len(authors) - MAX_WARNING_MENTIONS} más"
+    return f"{mentions}: se han eliminado {len(items)} mensajes porque contenían direcciones IP."
+
+
+class ModerationQueue:
+    """Agrupa borrados y avisos por canal."""
+
+    def __init__(self, window=MODERATION_BATCH_WINDOW):
+        self.window = window
+        self._batches = {}  # channel_id -> _ChannelBatch
+        # Métricas
+        self.deleted = 0
+        self.failed = 0
+        self.bulk_calls = 0
+        self.single_calls = 0
+        self.warnings_sent = 0
+
+    def submit(self, message, edited=False, notify=True):
+        """Encola un mensaje para eliminarlo en el próximo lote de su canal."""
+        batch = self._batches.get(message.channel.id)
+        if batch is None:
+            batch = self._batches[message.channel.id] = _ChannelBatch(message.channel)
+        batch.items.append(_FlaggedMessage(message, edited, notify))
+        if batch.task is None:
+            batch.task = asyncio.ensure_future(self._run(batch))
+
+    def pending(self):
+        """Mensajes esperando a ser eliminados."""
+        return sum(len(batch.items) for batch in self._batches.values())
+
+    async def drain(self):
+        """Espera a que se procesen todos los lotes pendientes."""
+        while True:
+            tasks = [batch.task for batch in self._batches.values() if batch.task is not None]
+            if not tasks:
+                return
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run(self, batch):
+        loop = asyncio.get_running_loop()
+        try:
+            while batch.items:
+                # Tras un lote reciente se espera a la ventana para acumular la ráfaga
+                wait = batch.last_flush + self.window - loop.time()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                else:
+                    await asyncio.sleep(0)  # Recoger los mensajes que llegan en el mismo ciclo
+                items, batch.items = batch.items, []
+                batch.last_flush = loop.time()
+                await self._flush(batch.channel, items)
+        finally:
+            batch.task = None
+
+    async def _delete_chunk(self, channel, items):
+        """Elimina hasta 100 mensajes. Devuelve (elementos eliminados, falta de permisos)."""
+        try:
+            if len(items) == 1:
+                self.single_calls += 1
+                await items[0].message.delete()
+            else:
+                self.bulk_calls += 1
+                await channel.delete_messages([item.message for item in items], reason="Mensajes con direcciones IP")
+            return items, False
+        except discord.Forbidden:
+            return [], True
+        except discord.HTTPException as e:
+            if len(items) == 1:
+                if not isinstance(e, discord.NotFound):  # NotFound: el autor ya lo borró
+                    logger.error("Error al eliminar mensaje: %s", e, extra={'channel_id': channel.id})
+                return [], False
+            # El borrado masivo falla entero si algún mensaje ya no existe o es antiguo: uno a uno
+            logger.warning("Borrado masivo fallido (%s); eliminando %d mensajes uno a uno", e, len(items), extra={'channel_id': channel.id})
+            results = await asyncio.gather(*[self._delete_chunk(channel, [item]) for item in items])
+            return [item for deleted, _ in results for item in deleted], any(forbidden for _, forbidden in results)
+
+    async def _flush(self, channel, items):
+        # Un mismo mensaje puede llegar dos veces (creación y edición)
+        unique = list({item.message.id: item for item in items}.values())
+        deleted_items = []
+        forbidden = False
+        for start in range(0, len(unique), BULK_DELETE_LIMIT):
+            deleted, chunk_forbidden = await self._delete_chunk(channel, unique[start:start + BULK_DELETE_LIMIT])
+            deleted_items.extend(deleted)
+            forbidden = forbidden or chunk_forbidden
+        self.deleted += len(deleted_items)
+        self.failed += len(unique) - len(deleted_items)
+        message_deletes.inc(len(deleted_items), result='deleted')
+        message_deletes.inc(len(unique) - len(deleted_items), result='forbidden' if forbidden else 'failed')
+        if deleted_items:
+            logger.info("%d mensajes con IP eliminados", len(deleted_items), extra={'channel_id': channel.id, 'failed': len(unique) - len(deleted_items)})
+
+        try:
+            if forbidden:
+                await channel.send(
+                    "Necesito el permiso 'Gestionar Mensajes' para eliminar mensajes que contengan direcciones IP."
+                )
+            notify_items = [item for item in deleted_items if item.notify]
+            if notify_items:
+                await channel.send(
+                    _warning_text(notify_items),
+                    delete_after=10,
+                    allowed_mentions=discord.AllowedMentions(users=True, roles=False, everyone=False),
+                )
+                self.warnings_sent += 1
+        except discord.HTTPException as e:
+            logger.error("Error al enviar aviso de moderación: %s", e, extra={'channel_id': channel.id})
+
+    def stats(self):
+        return {
+            'pending': self.pending(),
+            'deleted': self.deleted,
+            'failed': self.failed,
+            'bulk_calls': self.bulk_calls,
+            'single_calls': self.single_calls,
+            'warnings_sent': self.warnings_sent,
+        }
+
+
+# Cola compartida por los eventos de mensajes
+moderation_queue = ModerationQueue()
+
+registry.gauge_func('botardo_moderation_pending', "Mensajes marcados esperando a ser eliminados", (),
+                    lambda: [((), moderation_queue.pending())])
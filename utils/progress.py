@@ -0,0 +1,71 @@
+"""
+Respuestas progresivas para comandos largos.
+ThrottledEditor edita un mensaje ya enviado con el estado más reciente, como
+mucho una vez cada PROGRESS_EDIT_INTERVAL segundos: los estados intermedios
+que llegan entre dos ediciones se descartan y solo se publica el último, de
+modo que las ediciones no dependen de cuántos resultados lleguen y se
+respetan los límites de edición de mensajes de Discord.
+"""
+import asyncio
+import logging
+import time
+import discord
+from config import PROGRESS_EDIT_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+
+class ThrottledEditor:
+    """Agrupa las actualizaciones de un mensaje en ediciones espaciadas."""
+
+    def __init__(self, message, interval=PROGRESS_EDIT_INTERVAL):
+        self.message = message
+        self.interval = interval
+        self.edits = 0
+        self._pending = None  # argumentos de edit() del último estado sin publicar
+        self._task = None
+        self._sleeping = False
+        self._closed = False
+        self._last_edit = time.monotonic()  # el envío inicial cuenta como la última edición
+
+    def update(self, **fields):
+        """Programa una edición con estos campos (content, embed...) sin esperar."""
+        if self._closed:
+            return
+        self._pending = fields
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush())
+
+    async def _flush(self):
+        try:
+            self._sleeping = True
+            await asyncio.sleep(max(0.0, self._last_edit + self.interval - time.monotonic()))
+            self._sleeping = False
+            fields, self._pending = self._pending, None
+            if fields is not None:
+                try:
+                    await self._edit(fields)
+                except discord.HTTPException as e:
+                    # Un estado intermedio perdido no importa: el final lo sustituye
+                    logger.warning("No se pudo actualizar la respuesta progresiva: %s", e)
+        finally:
+            self._task = None
+
+    async def _edit(self, fields):
+        self._last_edit = time.monotonic()
+        await self.message.edit(**fields)
+        self.edits += 1
+
+    async def finish(self, **fields):
+        """Publica el estado final: descarta los intermedios pendientes y espera a la edición en curso."""
+        self._closed = True
+        self._pending = None
+        task = self._task
+        if task is not None:
+            if self._sleeping:
+                task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await self._edit(fields)
@@ -0,0 +1,181 @@
+"""
+Planificador global de peticiones a FACEIT.
+Todas las llamadas a la API pasan por un token bucket compartido. Cuando no
+hay tokens, las peticiones esperan en una cola con prioridad (las consultas
+interactivas como /elo van antes que la descarga masiva de partidas). Las
+respuestas 429/5xx se reintentan respetando Retry-After o con backoff
+exponencial con jitter, en lugar de devolver el error al usuario.
+"""
+import asyncio
+import heapq
+import itertools
+import random
+from config import (
+    FACEIT_RATE_LIMIT,
+    FACEIT_RATE_BURST,
+    FACEIT_MAX_RETRIES,
+    FACEIT_BACKOFF_BASE,
+    FACEIT_BACKOFF_MAX,
+)
+from utils.metrics import registry, faceit_queue_wait, faceit_throttled
+
+# Prioridades: menor valor = se atiende antes
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BULK = 1
+PRIORITY_BACKGROUND = 2
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: 'interactive',
+    PRIORITY_BULK: 'bulk',
+    PRIORITY_BACKGROUND: 'background',
+}
+
+# Códigos que merece la pena reintentar
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+
+
+class RequestScheduler:
+    """Token bucket con cola de prioridad, reintentos y métricas de espera."""
+
+    def __init__(self, rate=FACEIT_RATE_LIMIT, burst=FACEIT_RATE_BURST, max_retries=FACEIT_MAX_RETRIES,
+                 backoff_base=FACEIT_BACKOFF_BASE, backoff_max=FACEIT_BACKOFF_MAX):
+        self.rate = rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._tokens = float(burst)
+        self._updated = None
+        self._paused_until = 0.0
+        self._queue = []  # heap de (prioridad, secuencia, encolado_en, future)
+        self._sequence = itertools.count()
+        self._dispatcher = None
+        # Métricas
+        self.granted = {name: 0 for name in PRIORITY_NAMES.values()}
+        self.retries = 0
+
+    def _refill(self, now):
+        if self._updated is not None:
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _record_wait(self, priority, waited):
+        name = PRIORITY_NAMES.get(priority, str(priority))
+        self.granted[name] = self.granted.get(name, 0) + 1
+        faceit_queue_wait.observe(waited, priority=name)
+
+    async def acquire(self, priority=PRIORITY_INTERACTIVE):
+        """Espera hasta que haya un token para esta prioridad."""
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        self._refill(now)
+        # Camino rápido: sin cola, sin pausa y con tokens disponibles
+        if not self._queue and now >= self._paused_until and self._tokens >= 1:
+            self._tokens -= 1
+            self._record_wait(priority, 0.0)
+            return
+
+        future = loop.create_future()
+        heapq.heappush(self._queue, (priority, next(self._sequence), now, future))
+        if self._dispatcher is None:
+            self._dispatcher = asyncio.ensure_future(self._dispatch())
+        waited = await future
+        self._record_wait(priority, waited)
+
+    async def _dispatch(self):
+        """Reparte los tokens a la cola en orden de prioridad."""
+        loop = asyncio.get_running_loop()
+        try:
+            while self._queue:
+                now = loop.time()
+                self._refill(now)
+                delay = self._paused_until - now
+                if delay <= 0 and self._tokens < 1:
+                    delay = (1 - self._tokens) / self.rate
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                    continue
+                _, _, enqueued_at, future = heapq.heappop(self._queue)
+                if future.done():  # El solicitante se canceló mientras esperaba
+                    continue
+                self._tokens -= 1
+                future.set_result(now - enqueued_at)
+        finally:
+            self._dispatcher = None
+
+    def pause(self, seconds):
+        """Detiene el reparto de tokens durante `seconds` (cuota agotada)."""
+        loop = asyncio.get_running_loop()
+        self._paused_until = max(self._paused_until, loop.time() + seconds)
+
+    def backoff(self, attempt):
+        """Backoff exponencial con jitter completo."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    async def run(self, request, priority=PRIORITY_INTERACTIVE):
+        """Ejecuta `request()` (corrutina que devuelve un FaceitResponse) respetando el límite.
+
+        Reintenta los 429/5xx hasta max_retries veces y devuelve la última respuesta.
+        """
+        attempt = 0
+        while True:
+            await self.acquire(priority)
+            response = await request()
+            if response.status not in RETRY_STATUSES or attempt >= self.max_retries:
+                return response
+            if response.status == 429:
+                faceit_throttled.inc()
+                retry_after = getattr(response, 'retry_after', None)
+                # La cuota es global: se pausa todo el planificador, no solo esta petición
+                delay = retry_after + random.uniform(0, self.backoff_base) if retry_after else self.backoff(attempt)
+                self.pause(delay)
+            else:
+                await asyncio.sleep(self.backoff(attempt))
+            attempt += 1
+            self.retries += 1
+
+    def queue_depth(self):
+        """Peticiones esperando turno, por prioridad."""
+        depth = {name: 0 for name in PRIORITY_NAMES.values()}
+        for priority, _, _, future in self._queue:
+            if not future.done():
+                name = PRIORITY_NAMES.get(priority, str(priority))
+                depth[name] = depth.get(name, 0) + 1
+        return depth
+
+    def stats(self):
+        """Métricas del planificador: profundidad de cola, autorizadas y reintentos.
+
+        Las esperas y los 429 se exportan como métricas propias en utils.metrics.
+        """
+        return {
+            'queue_depth': self.queue_depth(),
+            'granted': dict(self.granted),
+            'retries': self.retries,
+            'tokens': round(self._tokens, 2),
+        }
+
+
+# Planificador compartido por todo el bot
+_scheduler = None
+
+def _scheduler_samples(field):
+    if _scheduler is None:
+        return []
+    value = _scheduler.stats()[field]
+    if isinstance(value, dict):
+        return [((name,), count) for name, count in sorted(value.items())]
+    return [((), value)]
+
+registry.gauge_func('botardo_faceit_queue_depth', "Peticiones a FACEIT esperando turno por prioridad", ('priority',),
+                    lambda: _scheduler_samples('queue_depth'))
+registry.gauge_func('botardo_faceit_granted_total', "Peticiones a FACEIT autorizadas por prioridad", ('priority',),
+                    lambda: _scheduler_samples('granted'), kind='counter')
+registry.gauge_func('botardo_faceit_retries_total', "Reintentos por 429/5xx", (),
+                    lambda: _scheduler_samples('retries'), kind='counter')
+
+def get_scheduler():
+    """Devuelve el planificador global, creándolo si no existe."""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = RequestScheduler()
+    return _scheduler
@@ -0,0 +1,142 @@
+"""
+Ejecución con shards del gateway de Discord.
+- Sin SHARD_COUNT: un único proceso sin shards (commands.Bot).
+- SHARD_COUNT=auto o un número: AutoShardedBot en un solo proceso; con un
+  número y SHARD_IDS (p. ej. "0-3") el proceso solo conecta esos shards.
+- SHARD_WORKERS=N (requiere SHARD_COUNT numérico): el proceso principal lanza
+  N procesos, cada uno con un rango contiguo de shards, su propio puerto HTTP
+  (HTTP_PORT + índice) y una parte proporcional del límite de peticiones a
+  FACEIT. La configuración de servidores y las cachés de FACEIT se comparten
+  mediante los almacenes SQLite de DATA_DIR.
+"""
+import logging
+import math
+import os
+import signal
+import subprocess
+import sys
+import time
+from config import (
+    SHARD_COUNT,
+    SHARD_IDS,
+    SHARD_WORKERS,
+    HTTP_PORT,
+    FACEIT_RATE_LIMIT,
+    FACEIT_RATE_BURST,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def parse_shard_count(value=SHARD_COUNT):
+    """None sin shards, 'auto' para el número recomendado por Discord, o un entero."""
+    value = (value or '').strip().lower()
+    if not value:
+        return None
+    if value == 'auto':
+        return 'auto'
+    count = int(value)
+    if count < 1:
+        raise ValueError("SHARD_COUNT debe ser mayor que 0")
+    return count
+
+def parse_shard_ids(value=SHARD_IDS):
+    """Convierte "0-3,6" en [0, 1, 2, 3, 6] (None si está vacío)."""
+    ids = []
+    for part in (value or '').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        start, _, end = part.partition('-')
+        ids.extend(range(int(start), int(end or start) + 1))
+    return sorted(set(ids)) or None
+
+def is_sharded():
+    return parse_shard_count() is not None
+
+def shard_options():
+    """Argumentos de AutoShardedBot según la configuración (vacío sin shards)."""
+    count = parse_shard_count()
+    shard_ids = parse_shard_ids()
+    if shard_ids is not None and not isinstance(count, int):
+        # Con 'auto' (o sin shards) el número lo decide Discord al conectar: un rango fijo no tiene sentido
+        raise ValueError(f"SHARD_IDS requiere un SHARD_COUNT numérico (SHARD_COUNT={SHARD_COUNT!r})")
+    if count is None or count == 'auto':
+        return {}
+    return {'shard_count': count, 'shard_ids': shard_ids}
+
+def shard_ranges(count, workers):
+    """Reparte los shards 0..count-1 en `workers` rangos contiguos."""
+    size = math.ceil(count / workers)
+    return [list(range(start, min(start + size, count))) for start in range(0, count, size)]
+
+def owns_global_commands(bot):
+    """Solo el proceso con el shard 0 sincroniza los comandos globales."""
+    shard_ids = getattr(bot, 'shard_ids', None)
+    return not shard_ids or 0 in shard_ids
+
+def shard_latencies(bot):
+    """Lista de (shard_id, latencia en segundos) de los shards de este proceso."""
+    latencies = getattr(bot, 'latencies', None)
+    if latencies is not None:
+        return latencies
+    return [(bot.shard_id or 0, bot.latency)]
+
+def shard_guild_counts(bot):
+    counts = {}
+    for guild in bot.guilds:
+        counts[guild.shard_id] = counts.get(guild.shard_id, 0) + 1
+    return counts
+
+
+def _worker_env(index, ids, count, workers):
+    env = dict(os.environ)
+    env.update({
+        'SHARD_COUNT': str(count),
+        'SHARD_IDS': f"{ids[0]}-{ids[-1]}",
+        'SHARD_WORKERS': '1',
+        'HTTP_PORT': str(HTTP_PORT + index) if HTTP_PORT else '0',
+        # El límite de FACEIT es por API key: se reparte entre los procesos
+        'FACEIT_RATE_LIMIT': str(FACEIT_RATE_LIMIT / workers),
+        'FACEIT_RATE_BURST': str(max(1, FACEIT_RATE_BURST // workers)),
+        'FACEIT_SHARED_CACHE': '1',
+    })
+    return env
+
+def run_workers(script, workers=SHARD_WORKERS):
+    """Lanza un proceso por rango de shards y espera; si uno termina, para el resto.
+
+    Devuelve el código de salida del primer proceso que termine.
+    """
+    count = parse_shard_count()
+    if not isinstance(count, int):
+        raise ValueError("SHARD_WORKERS requiere un SHARD_COUNT numérico")
+    ranges = shard_ranges(count, min(workers, count))
+    processes = []
+    for index, ids in enumerate(ranges):
+        env = _worker_env(index, ids, count, len(ranges))
+        processes.append(subprocess.Popen([sys.executable, script], env=env))
+        logger.info("Proceso %d lanzado con los shards %s", index, env['SHARD_IDS'], extra={'pid': processes[-1].pid})
+
+    def stop(signum=None, frame=None):
+        for process in processes:
+            if process.poll() is None:
+                process.terminate()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    try:
+        while True:
+            for index, process in enumerate(processes):
+                code = process.poll()
+                if code is not None:
+                    logger.warning("El proceso %d terminó con código %s; deteniendo el resto", index, code)
+                    return code
+            time.sleep(1)
+    finally:
+        stop()
+        for process in processes:
+            try:
+                process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                process.kill()
@@ -0,0 +1,61 @@
+"""
+Caché de respuestas de FACEIT compartida entre procesos.
+Cuando el bot se ejecuta en varios procesos (shards repartidos), cada uno
+tiene sus cachés en memoria; esta caché en SQLite (modo WAL) sirve de segundo
+nivel común para que un jugador consultado en un proceso no se vuelva a pedir
+a la API desde otro.
+"""
+import json
+import time
+from config import SHARED_CACHE_PATH
+from utils.storage import SQLiteStore
+
+# Escrituras entre limpiezas de entradas caducadas
+PURGE_EVERY = 500
+
+
+class SharedCache(SQLiteStore):
+    """Valores JSON con caducidad, agrupados por espacio de nombres."""
+
+    SCHEMA = (
+        """CREATE TABLE IF NOT EXISTS entries (
+            namespace TEXT NOT NULL,
+            key TEXT NOT NULL,
+            value TEXT NOT NULL,
+            expires_at REAL,
+            PRIMARY KEY (namespace, key)
+        )""",
+    )
+
+    def __init__(self, path=SHARED_CACHE_PATH):
+        super().__init__(path)
+        self._writes = 0
+
+    @staticmethod
+    def _get(conn, namespace, key, now):
+        row = conn.execute(
+            "SELECT value, expires_at FROM entries WHERE namespace = ? AND key = ?", (namespace, key)
+        ).fetchone()
+        if row is None or (row['expires_at'] is not None and row['expires_at'] <= now):
+            return None
+        return json.loads(row['value'])
+
+    @staticmethod
+    def _set(conn, namespace, key, value, expires_at, purge):
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                (namespace, key, value, expires_at),
+            )
+            if purge:
+                conn.execute("DELETE FROM entries WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),))
+
+    async def get(self, namespace, key):
+        """Valor guardado o None si no existe o ha caducado."""
+        return await self.run(self._get, namespace, json.dumps(key), time.time())
+
+    async def set(self, namespace, key, value, ttl=None):
+        self._writes += 1
+        expires_at = time.time() + ttl if ttl else None
+        await self.run(self._set, namespace, json.dumps(key), json.dumps(value), expires_at,
+                       self._writes % PURGE_EVERY == 0)
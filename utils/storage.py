@@ -0,0 +1,59 @@
+"""
+Base para los almacenes locales en SQLite.
+Todas las operaciones se ejecutan en un hilo dedicado para no bloquear el
+bucle de eventos; la conexión vive siempre en ese mismo hilo.
+"""
+import asyncio
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+
+class SQLiteStore:
+    """Almacén SQLite con una conexión y un hilo propios.
+
+    Las subclases definen SCHEMA (sentencias SQL de creación) y sus métodos
+    llaman a `run(funcion, *args)`, donde funcion recibe la conexión.
+    """
+
+    SCHEMA = ()
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=type(self).__name__)
+
+    def _connect(self):
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            for statement in self.SCHEMA:
+                conn.execute(statement)
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _call(self, fn, *args):
+        return fn(self._connect(), *args)
+
+    async def run(self, fn, *args):
+        """Ejecuta fn(conexión, *args) en el hilo del almacén."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._call, fn, *args)
+
+    def run_sync(self, fn, *args):
+        """Versión bloqueante de run(), para scripts y arranque."""
+        return self._executor.submit(self._call, fn, *args).result()
+
+    def _close(self, conn):
+        conn.close()
+        self._conn = None
+
+    async def close(self):
+        if self._conn is not None:
+            await self.run(self._close)
@@ -0,0 +1,159 @@
+"""
+Watchdog del bucle de eventos.
+Una tarea del bucle late cada WATCHDOG_INTERVAL segundos y mide cuánto se
+retrasa (lag). Un hilo vigilante comprueba los latidos: si el bucle lleva más
+de WATCHDOG_BLOCK_THRESHOLD segundos sin latir, algo lo está bloqueando (una
+llamada síncrona en un comando, un cálculo pesado...) y toma una muestra de la
+pila del hilo del bucle para identificar al culpable. Los incidentes se
+exportan como métricas y se consultan con /diagnostico.
+"""
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from config import WATCHDOG_INTERVAL, WATCHDOG_BLOCK_THRESHOLD, WATCHDOG_MAX_INCIDENTS
+from utils.metrics import registry, loop_lag, loop_lag_histogram
+
+logger = logging.getLogger(__name__)
+
+# Raíz del proyecto: los marcos de pila bajo ella identifican al culpable
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# ...salvo los de las dependencias, aunque el entorno virtual esté dentro del proyecto (venv/, .venv/)
+_LIBRARY_DIRS = frozenset({'site-packages', 'dist-packages'})
+_LIBRARY_PREFIXES = tuple({os.path.abspath(prefix) + os.sep for prefix in (sys.prefix, sys.exec_prefix, sys.base_prefix)})
+_MAX_STACK_LINES = 12
+
+loop_blocks = registry.counter(
+    'botardo_event_loop_blocks_total', "Bloqueos del bucle de eventos por encima del umbral", ('culprit',)
+)
+loop_block_duration = registry.histogram(
+    'botardo_event_loop_block_seconds', "Duración de los bloqueos del bucle de eventos",
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+
+
+def _is_project_code(filename):
+    if not filename.startswith(_PROJECT_ROOT + os.sep) or filename == os.path.abspath(__file__):
+        return False
+    if filename.startswith(_LIBRARY_PREFIXES):
+        return False
+    return _LIBRARY_DIRS.isdisjoint(filename.split(os.sep))
+
+def _culprit(frame):
+    """Primer marco del proyecto (desde el más interno) como 'ruta:línea función'."""
+    while frame is not None:
+        filename = os.path.abspath(frame.f_code.co_filename)
+        if _is_project_code(filename):
+            path = os.path.relpath(filename, _PROJECT_ROOT)
+            return f"{path}:{frame.f_lineno} {frame.f_code.co_name}"
+        frame = frame.f_back
+    return "desconocido"
+
+
+class Incident:
+    """Un bloqueo del bucle: inicio, duración, culpable y muestra de la pila."""
+
+    __slots__ = ('started_at', 'duration', 'culprit', 'stack')
+
+    def __init__(self, started_at, culprit, stack):
+        self.started_at = started_at
+        self.duration = None  # se completa cuando el bucle vuelve a latir
+        self.culprit = culprit
+        self.stack = stack
+
+
+class LoopWatchdog:
+    """Mide el lag del bucle y captura la pila cuando se bloquea más del umbral."""
+
+    def __init__(self, interval=WATCHDOG_INTERVAL, threshold=WATCHDOG_BLOCK_THRESHOLD,
+                 max_incidents=WATCHDOG_MAX_INCIDENTS):
+        self.interval = interval
+        self.threshold = threshold
+        self.incidents = deque(maxlen=max_incidents)
+        self.blocks = 0
+        self.lag = 0.0
+        self.max_lag = 0.0
+        self._last_beat = time.monotonic()
+        self._current = None  # incidente en curso detectado por el hilo vigilante
+        self._loop_thread = None
+        self._stop = threading.Event()
+        self._task = None
+        self._thread = None
+
+    def start(self):
+        """Arranca el latido y el hilo vigilante. Debe llamarse desde el bucle."""
+        if self._task is not None:
+            return
+        self._loop_thread = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _heartbeat(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - expected)
+            self._last_beat = now
+            self.lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            loop_lag.set(lag)
+            loop_lag_histogram.observe(lag)
+            if lag >= self.threshold:
+                self._finish_incident(lag)
+            else:
+                self._current = None  # retraso breve: no llega a ser un bloqueo
+
+    def _finish_incident(self, lag):
+        # El hilo vigilante puede no haberlo visto si el bloqueo fue breve
+        incident, self._current = self._current, None
+        if incident is None:
+            incident = Incident(time.time() - lag, "desconocido", None)
+        incident.duration = lag
+        self.blocks += 1
+        self.incidents.append(incident)
+        loop_blocks.inc(culprit=incident.culprit)
+        loop_block_duration.observe(lag)
+        logger.warning("Bucle de eventos bloqueado %.3f s", lag, extra={'culprit': incident.culprit})
+
+    def _watch(self):
+        # Hilo aparte: sigue funcionando aunque el bucle esté bloqueado
+        # La muestra se toma a mitad del umbral; el latido descarta la
+        # incidencia si el bloqueo no llega a superarlo
+        poll = min(self.interval, self.threshold) / 4
+        while not self._stop.wait(poll):
+            beat = self._last_beat
+            overdue = time.monotonic() - beat - self.interval
+            if overdue < self.threshold / 2 or self._current is not None:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            stack = traceback.format_stack(frame)[-_MAX_STACK_LINES:]
+            if beat == self._last_beat:  # el bucle sigue bloqueado
+                self._current = Incident(time.time() - overdue, _culprit(frame), "".join(stack))
+
+    def stats(self):
+        return {
+            'lag': self.lag,
+            'max_lag': self.max_lag,
+            'blocks': self.blocks,
+            'threshold': self.threshold,
+            'blocked_now': self._current is not None,
+        }
+
+
+watchdog = LoopWatchdog()
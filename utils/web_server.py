@@ -0,0 +1,131 @@
+"""
+Servidor HTTP interno del bot (aiohttp).
+Se ejecuta en el mismo bucle de eventos que discord.py, sin hilos, y sustituye
+al antiguo keep-alive de Flask. Rutas:
+- /        : respuesta mínima para pings externos
+- /healthz : estado de la conexión con el gateway y latencia por shard (liveness)
+- /readyz  : 200 solo cuando los comandos están sincronizados y los canales cargados
+- /status  : JSON con servidores, canales vigilados y profundidad de las colas
+- /metrics : métricas en formato de texto de Prometheus
+"""
+import logging
+import math
+import time
+from aiohttp import web
+from config import HTTP_HOST, HTTP_PORT
+from utils.channel_router import channel_router
+from utils.elo_tracker import elo_tracker
+from utils.command_sync import commands_synced
+from utils.guild_store import channel_routes_loaded
+from utils.metrics import registry
+from utils.moderation_queue import moderation_queue
+from utils.rate_limiter import get_scheduler
+from utils.sharding import shard_latencies, shard_guild_counts
+from utils.watchdog import watchdog
+
+logger = logging.getLogger(__name__)
+
+_runner = None
+_started_at = time.monotonic()
+
+
+def _ms(latency):
+    return round(latency * 1000, 1) if math.isfinite(latency) else None
+
+def _latency_ms(bot):
+    return _ms(bot.latency)
+
+def _shards(bot):
+    guild_counts = shard_guild_counts(bot)
+    return [
+        {'id': shard_id, 'latency_ms': _ms(latency), 'connected': _ms(latency) is not None,
+         'guilds': guild_counts.get(shard_id, 0)}
+        for shard_id, latency in shard_latencies(bot)
+    ]
+
+def _gateway_connected(bot):
+    # Con shards, todos los de este proceso deben tener conexión activa
+    latencies = shard_latencies(bot)
+    return not bot.is_closed() and bool(latencies) and all(_ms(latency) is not None for _, latency in latencies)
+
+def _readiness(bot):
+    return {
+        'gateway': bot.is_ready(),
+        'commands_synced': commands_synced(),
+        'channel_routes_loaded': channel_routes_loaded(),
+    }
+
+
+async def home(request):
+    return web.Response(text="Bot is online!")
+
+async def healthz(request):
+    bot = request.app['bot']
+    connected = _gateway_connected(bot)
+    body = {
+        'status': 'ok' if connected else 'disconnected',
+        'gateway_connected': connected,
+        'latency_ms': _latency_ms(bot),
+        'shards': _shards(bot),
+    }
+    return web.json_response(body, status=200 if connected else 503)
+
+async def readyz(request):
+    checks = _readiness(request.app['bot'])
+    ready = all(checks.values())
+    return web.json_response({'ready': ready, 'checks': checks}, status=200 if ready else 503)
+
+async def status(request):
+    bot = request.app['bot']
+    guilds = bot.guilds
+    body = {
+        'uptime_s': round(time.monotonic() - _started_at, 1),
+        'gateway_connected': _gateway_connected(bot),
+        'latency_ms': _latency_ms(bot),
+        'ready': _readiness(bot),
+        'shards': _shards(bot),
+        'guilds': len(guilds),
+        'guilds_unavailable': sum(1 for guild in guilds if guild.unavailable),
+        'watched_channels': len(channel_router),
+        'queues': {
+            'moderation_pending': moderation_queue.pending(),
+            'faceit_requests': get_scheduler().queue_depth(),
+        },
+        'moderation': moderation_queue.stats(),
+        'elo_tracker': elo_tracker.stats(),
+        'event_loop': watchdog.stats(),
+    }
+    return web.json_response(body)
+
+async def metrics(request):
+    return web.Response(text=registry.render(), content_type='text/plain', charset='utf-8',
+                        headers={'X-Content-Type-Options': 'nosniff'})
+
+
+def create_app(bot):
+    app = web.Application()
+    app['bot'] = bot
+    app.router.add_get('/', home)
+    app.router.add_get('/healthz', healthz)
+    app.router.add_get('/readyz', readyz)
+    app.router.add_get('/status', status)
+    app.router.add_get('/metrics', metrics)
+    return app
+
+async def start_web_server(bot, host=HTTP_HOST, port=HTTP_PORT):
+    """Arranca el servidor en el bucle actual (no hace nada si el puerto es 0)."""
+    global _runner
+    if _runner is not None or not port:
+        return
+    runner = web.AppRunner(create_app(bot), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    _runner = runner
+    logger.info("Servidor HTTP escuchando en %s:%d", host, port)
+
+async def stop_web_server():
+    """Detiene el servidor HTTP (se llama al apagar el bot)."""
+    global _runner
+    if _runner is not None:
+        await _runner.cleanup()
+        _runner = None